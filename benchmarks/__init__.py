@@ -0,0 +1,6 @@
+"""
+Benchmarks for the win_unc library. These do not run any shell commands, so they can be run on
+any platform from the root of the repository, for example::
+
+    $ python -m benchmarks.memory
+"""
@@ -0,0 +1,107 @@
+"""
+Generates synthetic `NET USE` output for benchmarks. The output mimics the real command's fixed
+width columns, including rows whose "Network" column is wrapped onto a second line, printer
+mappings and a mix of statuses.
+"""
+
+import random
+import string
+
+
+HEADER = '''New connections will be remembered.
+
+
+Status       Local     Remote                    Network
+
+-------------------------------------------------------------------------------
+'''
+
+FOOTER = '''The command completed successfully.
+
+'''
+
+EMPTY = '''New connections will be remembered.
+
+There are no entries in the list.
+
+'''
+
+NETWORK = 'Microsoft Windows Network'
+STATUSES = ['OK', 'Disconnected', 'Unavailable']
+REMOTE_WIDTH = 25
+
+
+class Corpus(object):
+    """
+    A synthetic `NET USE` output along with what a correct parser should find in it.
+    """
+
+    def __init__(self, text, remotes, drives, printer_count):
+        """
+        `text` is the output of `NET USE`.
+        `remotes` is a list of the UNC paths of every non-printer row, in order.
+        `drives` is a list of the drive letters that are mounted, in order.
+        `printer_count` is the number of printer mappings, which parsers must skip.
+        """
+        self.text = text
+        self.remotes = remotes
+        self.drives = drives
+        self.printer_count = printer_count
+
+    def get_row_count(self):
+        return len(self.remotes)
+
+    def get_lines(self):
+        return self.text.splitlines()
+
+
+def generate(rows, wrapped_ratio=0.3, printer_ratio=0.02, mounted_ratio=0.5, seed=0):
+    """
+    Returns a `Corpus` whose `NET USE` output has `rows` rows that are not printer mappings.
+    `wrapped_ratio` is the fraction of rows with a remote path too long for its column, which
+                    makes `NET USE` wrap the row onto a second line.
+    `printer_ratio` is the fraction of extra printer mappings to add.
+    `mounted_ratio` is the fraction of rows that are mounted to a drive letter. No more than 26
+                    rows can be mounted.
+    `seed` makes the output reproducible.
+    """
+    if rows == 0:
+        return Corpus(EMPTY, [], [], 0)
+
+    rand = random.Random(seed)
+    free_drives = list(reversed(string.ascii_uppercase))
+    lines, remotes, drives = [], [], []
+    printer_count = 0
+
+    for index in range(rows):
+        status = rand.choice(STATUSES)
+        drive = (free_drives.pop() + ':'
+                 if free_drives and rand.random() < mounted_ratio else '')
+        remote = _make_remote(rand, index, rand.random() < wrapped_ratio)
+        lines.extend(_format_row(status, drive, remote, NETWORK))
+        remotes.append(remote)
+        if drive:
+            drives.append(drive)
+
+        if rand.random() < printer_ratio:
+            printer_count += 1
+            lines.extend(_format_row('OK', 'LPT{0}:'.format(printer_count % 9 + 1),
+                                     r'\\print{0}\queue'.format(index), 'Printer'))
+
+    return Corpus(HEADER + '\n'.join(lines) + '\n' + FOOTER, remotes, drives, printer_count)
+
+
+def _make_remote(rand, index, wrapped):
+    server = 'srv{0:05d}'.format(index)
+    share = 'share{0}'.format(rand.randint(0, 99))
+    if wrapped:
+        share += r'\departments\finance\reports'
+    return '\\\\{0}\\{1}'.format(server, share)
+
+
+def _format_row(status, local, remote, network):
+    prefix = '{0:<13}{1:<10}'.format(status, local)
+    if len(remote) > REMOTE_WIDTH:
+        return [prefix + remote, ' ' * 49 + network]
+    else:
+        return [prefix + '{0:<26}'.format(remote) + network]
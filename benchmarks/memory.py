@@ -0,0 +1,57 @@
+"""
+Measures how much memory parsed `NET USE` rows take. Each row is stored both as a `NetUseRow`
+and as the dictionary that `NetUseTable` used to store, so the two can be compared.
+"""
+
+import sys
+import tracemalloc
+
+from win_unc.disk_drive import DiskDrive
+from win_unc.internal.net_use_table import NetUseRow
+from win_unc.unc_directory import UncDirectory
+
+
+DEFAULT_ROW_COUNT = 10000
+
+
+def build_rows(count, make_row):
+    """
+    Returns a list of `count` rows, each created by calling `make_row` with a local `DiskDrive`,
+    a remote `UncDirectory` and a status string.
+    """
+    return [make_row(DiskDrive(chr(ord('A') + i % 26)),
+                     UncDirectory(r'\\server{0}\share{0}'.format(i)),
+                     'ok')
+            for i in range(count)]
+
+
+def measure(func):
+    """
+    Returns the number of bytes still allocated by the result of calling `func`.
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def make_dict_row(local, remote, status):
+    return {'local': local, 'remote': remote, 'status': status}
+
+
+def main(count=DEFAULT_ROW_COUNT):
+    dict_bytes = measure(lambda: build_rows(count, make_dict_row))
+    slot_bytes = measure(lambda: build_rows(count, NetUseRow))
+
+    print('Rows:                   {0}'.format(count))
+    print('dict rows:              {0:.1f} bytes/row'.format(dict_bytes / count))
+    print('NetUseRow rows:         {0:.1f} bytes/row'.format(slot_bytes / count))
+    print('Reduction:              {0:.1%}'.format(1 - slot_bytes / float(dict_bytes)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT)
@@ -0,0 +1,279 @@
+"""
+Runs the win_unc benchmark suite against synthetic `NET USE` output and reports throughput and
+peak memory. No shell commands are run, so the suite works on any platform.
+
+Usage::
+
+    $ python -m benchmarks.run --sizes 10,1000,100000 --output results.json
+    $ python -m benchmarks.run --compare results.json
+
+Results are saved as JSON so that runs from different commits can be compared with `--compare`.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import generate
+from win_unc import query
+from win_unc.backends import CommandBackend, SimulatorBackend, use_backend
+from win_unc.connecting import UncDirectoryMount
+from win_unc.disk_drive import DiskDrive
+from win_unc.internal.net_use_table import parse_net_use_table
+from win_unc.path_index import UncPathIndex
+from win_unc.unc_directory import UncDirectory
+
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+DEFAULT_MIN_TIME = 0.5
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+LOOKUPS_PER_ROUND = 1000
+
+
+class CorpusBackend(CommandBackend):
+    """
+    A backend whose `NET USE` output is always the text of a `Corpus`.
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+
+    def run(self, command, logger=None, timeout=None):
+        return self.corpus.text, ''
+
+    def get_used_drive_letters(self):
+        return {drive[0] for drive in self.corpus.drives}
+
+
+class Benchmark(object):
+    """
+    A named operation to measure against corpora of different sizes.
+    """
+
+    def __init__(self, name, unit, setup):
+        """
+        `name` identifies the benchmark in results.
+        `unit` names what one item of throughput is (e.g. "rows").
+        `setup` is a function that takes a `Corpus` and returns a tuple of a function to measure
+                and the number of `unit`s that one call to that function processes.
+        """
+        self.name = name
+        self.unit = unit
+        self.setup = setup
+
+
+def setup_parse(corpus):
+    return lambda: parse_net_use_table(corpus.text), corpus.get_row_count()
+
+
+def setup_matching_rows(corpus):
+    table = parse_net_use_table(corpus.text)
+    remotes = [UncDirectory(path) for path in corpus.remotes[:LOOKUPS_PER_ROUND]]
+    drives = [DiskDrive(drive) for drive in corpus.drives]
+
+    def lookup():
+        for remote in remotes:
+            table.get_matching_rows(remote=remote)
+        for drive in drives:
+            table.get_matching_rows(local=drive)
+
+    return lookup, len(remotes) + len(drives)
+
+
+def setup_path_lookups(corpus):
+    index = UncPathIndex(parse_net_use_table(corpus.text))
+    paths = [path + r'\dir\file.txt' for path in corpus.remotes[:LOOKUPS_PER_ROUND]]
+    return lambda: index.get_rows_for_paths(paths), len(paths)
+
+
+def setup_current_connections(corpus):
+    def get_connections():
+        with use_backend(CorpusBackend(corpus)):
+            return query.get_current_connections(fresh=True)
+
+    return get_connections, corpus.get_row_count()
+
+
+def setup_mount_cycle(corpus):
+    """
+    Mounts, checks and unmounts a share against a `SimulatorBackend` holding the corpus's
+    connections, which measures the library's own overhead for a `with` block.
+    """
+    backend = SimulatorBackend()
+    for remote in corpus.remotes:
+        backend.add_connection(remote)
+    unc = UncDirectory(r'\\benchmark\share')
+
+    def mount_cycle():
+        with use_backend(backend):
+            with UncDirectoryMount(unc, DiskDrive('Z:')) as mount:
+                mount.is_mounted()
+
+    return mount_cycle, 1
+
+
+def setup_construction(corpus):
+    paths = corpus.remotes[:LOOKUPS_PER_ROUND]
+    drives = corpus.drives
+
+    def construct():
+        for path in paths:
+            UncDirectory(path)
+        for drive in drives:
+            DiskDrive(drive)
+
+    return construct, len(paths) + len(drives)
+
+
+BENCHMARKS = [
+    Benchmark('parse_net_use_table', 'rows', setup_parse),
+    Benchmark('get_matching_rows', 'lookups', setup_matching_rows),
+    Benchmark('path_lookups', 'lookups', setup_path_lookups),
+    Benchmark('get_current_connections', 'rows', setup_current_connections),
+    Benchmark('construction', 'objects', setup_construction),
+    Benchmark('mount_cycle', 'cycles', setup_mount_cycle),
+]
+
+
+def check_corpus(corpus):
+    """
+    Raises an `AssertionError` if the parser does not find exactly what `corpus` contains, since
+    a fast but wrong parser should not produce benchmark results.
+    """
+    table = parse_net_use_table(corpus.text)
+    assert [row.remote.get_path() for row in table.rows] == corpus.remotes
+    assert [drive.get_drive() for drive in table.get_connected_devices()] == corpus.drives
+
+
+def measure(benchmark, corpus, min_time):
+    """
+    Returns a result dictionary for running `benchmark` against `corpus` repeatedly for at least
+    `min_time` seconds.
+    """
+    func, items = benchmark.setup(corpus)
+    func()  # Warm up.
+
+    calls, start = 0, time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = elapsed / calls
+    return {'name': benchmark.name,
+            'size': corpus.get_row_count(),
+            'seconds_per_call': seconds,
+            'throughput': items / seconds if seconds else None,
+            'unit': '{0}/s'.format(benchmark.unit),
+            'peak_bytes': peak}
+
+
+def run(sizes, names=None, min_time=DEFAULT_MIN_TIME, report=print):
+    """
+    Runs every benchmark (or only those named in `names`) against a corpus of each size in
+    `sizes` and returns the results document.
+    """
+    results = []
+    for size in sizes:
+        corpus = generate(size)
+        check_corpus(corpus)
+        for benchmark in BENCHMARKS:
+            if names and benchmark.name not in names:
+                continue
+            result = measure(benchmark, corpus, min_time)
+            results.append(result)
+            report(format_result(result))
+
+    return {'meta': get_metadata(), 'results': results}
+
+
+def format_result(result):
+    return '{name:<26}{size:>8} rows {throughput:>14,.0f} {unit:<11}{peak:>12,} peak bytes'.format(
+        name=result['name'],
+        size=result['size'],
+        throughput=result['throughput'] or 0,
+        unit=result['unit'],
+        peak=result['peak_bytes'])
+
+
+def get_metadata():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                         stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def compare(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD, report=print):
+    """
+    Reports the change in throughput for every benchmark in both `baseline` and `current`
+    (results documents) and returns a list of the results that are slower by more than
+    `threshold` (a fraction).
+    """
+    old = {(r['name'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = old.get((result['name'], result['size']))
+        if not before or not before['throughput'] or not result['throughput']:
+            continue
+        change = result['throughput'] / before['throughput'] - 1
+        regressed = change < -threshold
+        if regressed:
+            regressions.append(result)
+        report('{name:<26}{size:>8} rows {change:>+8.1%}{flag}'.format(
+            name=result['name'], size=result['size'], change=change,
+            flag='  REGRESSION' if regressed else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated corpus sizes in rows')
+    parser.add_argument('--only', action='append',
+                        choices=[benchmark.name for benchmark in BENCHMARKS],
+                        help='run only the named benchmark (may be repeated)')
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                        help='minimum seconds to spend on each measurement')
+    parser.add_argument('--output', help='file to save the results to as JSON')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='JSON results file to compare this run against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='fractional slowdown that counts as a regression')
+    args = parser.parse_args(argv)
+
+    current = run([int(size) for size in args.sizes.split(',')], args.only, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(current, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        print('')
+        print('Compared with {0}:'.format(baseline['meta'].get('commit') or args.compare))
+        if compare(baseline, current, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup
 
 from win_unc import __version__
 
@@ -13,9 +13,16 @@ setup(
     url='https://github.com/CovenantEyes/py_win_unc',
     download_url='https://github.com/CovenantEyes/py_win_unc/zipball/v' + __version__,
     keywords=['directory', 'folder', 'unc', 'local', 'remote', 'path'],
+    python_requires='>=3.7',
     classifiers=[
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2.7',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         'Development Status :: 4 - Beta',
         'Environment :: Other Environment',
         'Intended Audience :: Developers',
@@ -62,7 +69,7 @@ Below is a simple example::
 
     conn = UncDirectoryMount(UncDirectory(r'\\home\shared'), DiskDrive('Z:'))
     conn.mount()
-    print 'Drive connected:', conn.is_mounted()
+    print('Drive connected:', conn.is_mounted())
     conn.unmount()
 
 You can also provide credentials like this::
@@ -1,5 +1,7 @@
 from unittest import TestCase
 
+from win_unc.backends import use_backend
+from win_unc.circuit_breaker import get_circuit_breaker
 from win_unc.internal.shell import run
 from win_unc.unc_directory import UncDirectory
 from win_unc.internal.current_state import get_current_net_use_table
@@ -28,3 +30,17 @@ class LocalHostConnectionTest(TestCase):
     def localhost_is_connected(self):
         net_use = get_current_net_use_table()
         return UncDirectory(self.LOCALHOST_UNC) in net_use.get_connected_paths()
+
+
+def use_test_backend(test_case, backend):
+    """
+    Makes `backend` execute this library's commands until `test_case` finishes and returns it.
+    Every circuit of the process-wide `CircuitBreaker` is closed before and after, so that the
+    failures of one test do not open circuits in another.
+    """
+    context = use_backend(backend)
+    context.__enter__()
+    test_case.addCleanup(context.__exit__, None, None, None)
+    get_circuit_breaker().reset()
+    test_case.addCleanup(lambda: get_circuit_breaker().reset())
+    return backend
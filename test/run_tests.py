@@ -1,18 +1,37 @@
 import platform
 from unittest import main
 
+from test_admission import *
+from test_async_connecting import *
+from test_async_shell import *
+from test_backends import *
+from test_circuit_breaker import *
 from test_cleaners import *
+from test_connecting import *
+from test_current_state import *
 from test_disk_drive import *
+from test_instrumentation import *
+from test_interning import *
+from test_mount_manager import *
+from test_net_errors import *
 from test_net_use_table import *
+from test_path_index import *
+from test_path_translation import *
+from test_query import *
+from test_reconciling import *
 from test_sanitizors import *
+from test_shell import *
+from test_singleflight import *
 from test_utils import *
 from test_unc_directory import *
 from test_unc_credentials import *
 from test_validators import *
+from test_watching import *
 
 
 if platform.system() == 'Windows':
     print('Including Windows-specific tests')
+    from win_test_backends import *
     from win_test_connecting import *
     from win_test_connecting_with_credentials import *
     from win_test_disk_drive import *
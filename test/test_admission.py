@@ -0,0 +1,212 @@
+import asyncio
+import time
+from threading import Lock, Thread
+from unittest import TestCase
+
+from win_unc.admission import (
+    AdmissionController, AdmissionLimits, AdmissionState, get_admission_controller,
+    set_admission_controller)
+from win_unc.backends import SimulatorBackend
+from win_unc.connecting import UncDirectoryMount, connect_many
+from win_unc.disk_drive import DiskDrive
+from win_unc.internal import current_state
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+class ConcurrencyCounter(object):
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self._lock = Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._lock:
+            self.running -= 1
+
+
+def wait_for_waiting(controller, host, count):
+    deadline = time.monotonic() + 5
+    while controller.get_states()[host].waiting < count:
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out waiting for the queue.')
+        time.sleep(0.001)
+
+
+class TestAdmissionController(TestCase):
+    def test_concurrency_limit(self):
+        controller = AdmissionController(max_concurrent=2)
+        counter = ConcurrencyCounter()
+
+        def work():
+            with controller.admit('server'), counter:
+                time.sleep(0.02)
+
+        threads = [Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.max_running, 2)
+        self.assertEqual(controller.get_states(), {'server': AdmissionState('server', 0, 0, None)})
+
+    def test_fifo(self):
+        controller = AdmissionController(max_concurrent=1)
+        order = []
+
+        def work(number):
+            with controller.admit('server'):
+                order.append(number)
+
+        threads = []
+        with controller.admit('server'):
+            for number in range(5):
+                threads.append(Thread(target=work, args=(number,)))
+                threads[-1].start()
+                wait_for_waiting(controller, 'server', number + 1)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, list(range(5)))
+
+    def test_hosts_are_independent(self):
+        controller = AdmissionController(max_concurrent=1)
+        with controller.admit('a'):
+            with controller.admit('B'):
+                self.assertEqual(set(controller.get_states()), {'a', 'b'})
+
+    def test_rate_limit(self):
+        controller = AdmissionController(max_concurrent=None, rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(6):
+            with controller.admit('server'):
+                pass
+        # Two commands start at once and the other four wait 1/50 of a second each.
+        self.assertGreaterEqual(time.monotonic() - start, 0.07)
+
+    def test_rate_limit_after_concurrency_limit(self):
+        controller = AdmissionController(max_concurrent=1, rate=50, burst=1)
+        order = []
+
+        def work(number):
+            with controller.admit('server'):
+                order.append(number)
+
+        threads = [Thread(target=work, args=(number,)) for number in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(sorted(order), list(range(4)))
+
+    def test_unlimited_by_default(self):
+        controller = AdmissionController()
+        self.assertEqual(controller.default_limits, AdmissionLimits(None, None, 1))
+        with controller.admit('server'), controller.admit('server'), controller.admit('server'):
+            self.assertEqual(controller.get_states(),
+                             {'server': AdmissionState('server', 3, 0, None)})
+
+    def test_set_limits(self):
+        controller = AdmissionController()
+        controller.set_limits('Server', max_concurrent=1, rate=10, burst=3)
+        self.assertEqual(controller.get_limits('server'), AdmissionLimits(1, 10, 3))
+        self.assertEqual(controller.get_limits('other'), controller.default_limits)
+
+    def test_invalid_limits(self):
+        for max_concurrent, rate, burst in [(0, None, 1), (None, 0, 1), (None, -1, 1),
+                                            (None, 10, 0), (None, 10, 0.5)]:
+            self.assertRaises(ValueError, AdmissionController, max_concurrent, rate, burst)
+            self.assertRaises(ValueError, AdmissionController().set_limits, 'server',
+                              max_concurrent, rate, burst)
+
+    def test_async(self):
+        controller = AdmissionController(max_concurrent=2)
+        counter = ConcurrencyCounter()
+
+        async def work():
+            async with controller.admit_async('server'):
+                with counter:
+                    await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*[work() for _ in range(6)])
+
+        asyncio.run(main())
+        self.assertEqual(counter.max_running, 2)
+
+    def test_async_rate_limit(self):
+        controller = AdmissionController(rate=50, burst=1)
+
+        async def main():
+            async def work():
+                async with controller.admit_async('server'):
+                    pass
+            await asyncio.gather(*[work() for _ in range(4)])
+
+        start = time.monotonic()
+        asyncio.run(main())
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+    def test_cancelled_waiter_leaves_queue(self):
+        controller = AdmissionController(max_concurrent=1)
+
+        async def main():
+            async with controller.admit_async('server'):
+                task = asyncio.ensure_future(controller.admit_async('server').__aenter__())
+                await asyncio.sleep(0.01)
+                self.assertEqual(controller.get_states()['server'].waiting, 1)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            self.assertEqual(controller.get_states()['server'],
+                             AdmissionState('server', 0, 0, None))
+
+        asyncio.run(main())
+
+    def test_threads_and_tasks_share_the_queue(self):
+        controller = AdmissionController(max_concurrent=1)
+        order = []
+
+        def work():
+            with controller.admit('server'):
+                order.append('thread')
+
+        async def work_async():
+            async with controller.admit_async('server'):
+                order.append('task')
+
+        async def main():
+            async with controller.admit_async('server'):
+                thread = Thread(target=work)
+                thread.start()
+                wait_for_waiting(controller, 'server', 1)
+                task = asyncio.ensure_future(work_async())
+                await asyncio.sleep(0.01)
+            await task
+            thread.join(5)
+
+        asyncio.run(main())
+        self.assertEqual(order, ['thread', 'task'])
+
+
+class TestAdmissionInConnecting(TestCase):
+    def setUp(self):
+        current_state.invalidate_net_use_table()
+        previous = get_admission_controller()
+        set_admission_controller(AdmissionController(max_concurrent=1))
+        self.addCleanup(set_admission_controller, previous)
+        use_test_backend(self, SimulatorBackend(latency=0.02))
+
+    def test_connect_many_is_admitted_one_at_a_time(self):
+        mounts = [UncDirectoryMount(UncDirectory(r'\\server\s' + str(i)), DiskDrive(drive))
+                  for i, drive in enumerate('DEFG')]
+        start = time.monotonic()
+        results = connect_many(mounts, max_workers=4)
+        # One `NET USE` query and four connections that may not overlap.
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual([result.error for result in results], [None] * 4)
+        self.assertEqual(get_admission_controller().get_states()['server'].running, 0)
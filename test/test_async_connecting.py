@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from win_unc import async_query
+from win_unc.async_connecting import AsyncUncDirectoryConnection, AsyncUncDirectoryMount
+from win_unc.backends import SimulatorBackend
+from win_unc.disk_drive import DiskDrive
+from win_unc.errors import ShellCommandError
+from win_unc.internal import current_state
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+class AsyncSimulatorTestCase(TestCase):
+    def setUp(self):
+        current_state.invalidate_net_use_table()
+        self.backend = SimulatorBackend()
+        use_test_backend(self, self.backend)
+
+
+class TestAsyncUncDirectoryConnection(AsyncSimulatorTestCase):
+    def test_connect(self):
+        conn = AsyncUncDirectoryMount(UncDirectory(r'\\server\share'), DiskDrive('Z:'))
+        asyncio.run(conn.connect())
+        self.assertEqual(self.backend.get_connections(), [('Z:', r'\\server\share', 'OK')])
+
+    def test_connect_error(self):
+        conn = AsyncUncDirectoryMount(UncDirectory(r'\\server\share'), DiskDrive('C:'))
+        self.assertRaises(ShellCommandError, asyncio.run, conn.connect())
+
+    def test_disconnect(self):
+        self.backend.add_connection(r'\\server\share', 'Z:')
+        conn = AsyncUncDirectoryMount(UncDirectory(r'\\server\share'), DiskDrive('Z:'))
+        asyncio.run(conn.disconnect())
+        self.assertEqual(self.backend.commands, ['NET USE Z: /DELETE /YES'])
+        self.assertEqual(self.backend.get_connections(), [])
+
+    def test_is_connected(self):
+        conn = AsyncUncDirectoryMount(UncDirectory(r'\\server\share'), DiskDrive('Z:'))
+        self.assertFalse(asyncio.run(conn.is_connected()))
+
+        self.backend.add_connection(r'\\server\share', 'Z:')
+        self.assertTrue(asyncio.run(conn.is_connected()))
+        self.assertEqual(asyncio.run(conn.get_connection_status()), 'ok')
+
+    def test_context_manager(self):
+        async def use():
+            async with AsyncUncDirectoryConnection(UncDirectory(r'\\server\share')):
+                self.assertEqual(len(self.backend.get_connections()), 1)
+
+        asyncio.run(use())
+        self.assertEqual(self.backend.get_connections(), [])
+
+    def test_mount_context_manager(self):
+        async def use():
+            async with AsyncUncDirectoryMount(UncDirectory(r'\\server\share'), DiskDrive('Z:')):
+                self.assertEqual(len(self.backend.get_connections()), 1)
+
+        asyncio.run(use())
+        self.assertEqual(self.backend.get_connections(), [])
+        self.assertEqual(len(self.backend.commands), 2)
+
+    def test_many_at_once(self):
+        async def mount_all():
+            conns = [AsyncUncDirectoryMount(UncDirectory(r'\\server\share' + letter),
+                                            DiskDrive(letter))
+                     for letter in 'DEFGH']
+            await asyncio.gather(*[conn.mount() for conn in conns])
+
+        self.backend.latency = 0.1
+        asyncio.run(mount_all())
+        self.assertEqual(len(self.backend.get_connections()), 5)
+
+    def test_automatic_disk_drive_is_selected_when_mounting(self):
+        loop_threads = []
+        probe_threads = []
+        get_used_drive_letters = self.backend.get_used_drive_letters
+        def probe():
+            probe_threads.append(threading.current_thread())
+            return get_used_drive_letters()
+        self.backend.get_used_drive_letters = probe
+
+        mount = AsyncUncDirectoryMount(UncDirectory(r'\\server\share'))
+        self.assertIsNone(mount.disk_drive)
+        self.assertEqual(self.backend.commands, [])
+
+        async def mount_and_check():
+            loop_threads.append(threading.current_thread())
+            async with mount:
+                return await mount.is_mounted()
+
+        self.assertTrue(asyncio.run(mount_and_check()))
+        self.assertEqual(mount.disk_drive, DiskDrive('Z:'))
+        self.assertTrue(probe_threads)
+        self.assertNotIn(loop_threads[0], probe_threads)
+
+    def test_sync_context_manager_is_rejected(self):
+        conn = AsyncUncDirectoryConnection(UncDirectory(r'\\server\share'))
+        with self.assertRaises(TypeError):
+            with conn:
+                pass
+
+
+class TestAsyncQuery(AsyncSimulatorTestCase):
+    def test_get_current_connections(self):
+        self.assertEqual(asyncio.run(async_query.get_current_connections()), [])
+
+        self.backend.add_connection(r'\\server\share', 'Z:')
+        [conn] = asyncio.run(async_query.get_current_connections())
+        self.assertIsInstance(conn, AsyncUncDirectoryMount)
+        self.assertEqual(conn.disk_drive, DiskDrive('Z:'))
+
+    def test_get_connection_for_disk_drive(self):
+        self.backend.add_connection(r'\\server\share', 'Z:')
+        conn = asyncio.run(async_query.get_connection_for_disk_drive(DiskDrive('Z:')))
+        self.assertEqual(conn.unc, UncDirectory(r'\\server\share'))
+        self.assertIsNone(asyncio.run(async_query.get_connection_for_disk_drive(DiskDrive('Y:'))))
@@ -0,0 +1,51 @@
+import asyncio
+import sys
+import time
+from unittest import TestCase
+
+from win_unc.errors import ShellCommandError, ShellCommandTimeoutError
+from win_unc.internal.async_shell import run_async
+
+
+def python_command(code):
+    return '"{python}" -c "{code}"'.format(python=sys.executable, code=code)
+
+
+class TestRunAsync(TestCase):
+    def test_output(self):
+        stdout, stderr = asyncio.run(run_async(python_command("print('out')")))
+        self.assertEqual(stdout.strip(), 'out')
+        self.assertEqual(stderr, '')
+
+    def test_error_code(self):
+        with self.assertRaises(ShellCommandError) as context:
+            asyncio.run(run_async(python_command('import sys; sys.exit(3)')))
+        self.assertEqual(context.exception.error_code, 3)
+
+    def test_argument_list(self):
+        args = ['a b', 'c"d', 'e&f']
+        stdout, _ = asyncio.run(run_async(
+            [sys.executable, '-c', 'import sys; print(sys.argv[1:])'] + args))
+        self.assertEqual(stdout.strip(), repr(args))
+
+    def test_concurrent(self):
+        async def run_many():
+            return await asyncio.gather(*[run_async(python_command('print(1)')) for _ in range(5)])
+        self.assertEqual(len(asyncio.run(run_many())), 5)
+
+    def test_timeout(self):
+        start = time.time()
+        with self.assertRaises(ShellCommandTimeoutError):
+            asyncio.run(run_async(python_command('import time; time.sleep(30)'), timeout=0.5))
+        self.assertLess(time.time() - start, 10)
+
+    def test_cancel(self):
+        async def cancel():
+            task = asyncio.ensure_future(run_async(python_command('import time; time.sleep(30)')))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            await task
+
+        start = time.time()
+        self.assertRaises(asyncio.CancelledError, asyncio.run, cancel())
+        self.assertLess(time.time() - start, 10)
@@ -0,0 +1,102 @@
+from unittest import TestCase
+
+from win_unc import backends
+from win_unc.backends import (
+    SimulatorBackend, WNetBackend, parse_net_use_arguments, split_command, use_backend,
+    win32wnet_available)
+from win_unc.connecting import UncDirectoryConnection, UncDirectoryMount
+from win_unc.disk_drive import DiskDrive, get_available_disk_drive
+from win_unc.errors import NoDrivesAvailableError, ShellCommandError
+from win_unc.internal import current_state
+from win_unc.internal.net_use_table import parse_net_use_table
+from win_unc.unc_credentials import UncCredentials
+from win_unc.unc_directory import UncDirectory
+
+
+class TestSplitCommand(TestCase):
+    def test_split_command(self):
+        self.assertEqual(split_command('NET USE'), ['NET', 'USE'])
+        self.assertEqual(split_command(r'NET USE "Z:" "\\a\b c" /YES'),
+                         ['NET', 'USE', 'Z:', r'\\a\b c', '/YES'])
+        self.assertEqual(split_command(r'"p \"w" /USER:"a b"'), ['p "w', '/USER:a b'])
+        self.assertEqual(split_command('""'), [''])
+
+
+class TestParseNetUseArguments(TestCase):
+    def test_parse_net_use_arguments(self):
+        self.assertEqual(parse_net_use_arguments([]), ([], {}))
+        self.assertEqual(
+            parse_net_use_arguments(['Z:', r'\\a\b', 'pw', '/user:x:y', '/PERSISTENT:NO']),
+            (['Z:', r'\\a\b', 'pw'], {'/USER': 'x:y', '/PERSISTENT': 'NO'}))
+        self.assertEqual(parse_net_use_arguments(['Z:', '/DELETE', '/YES']),
+                         (['Z:'], {'/DELETE': '', '/YES': ''}))
+
+
+class TestWNetBackend(TestCase):
+    def test_requires_pywin32(self):
+        if win32wnet_available:
+            self.skipTest('pywin32 is installed')
+        self.assertRaises(ImportError, WNetBackend)
+
+
+class TestSimulatorBackend(TestCase):
+    def test_render_and_parse(self):
+        backend = SimulatorBackend()
+        self.assertEqual(parse_net_use_table(backend.render()).rows, [])
+
+        backend.add_connection(r'\\server\share', 'Z:')
+        backend.add_connection(r'\\server\a-very-long-share-name-that-wraps', status='Disconnected')
+        table = parse_net_use_table(backend.render())
+        self.assertEqual(table.get_connected_devices(), [DiskDrive('Z:')])
+        self.assertEqual(table.get_connected_paths(),
+                         [UncDirectory(r'\\server\share'),
+                          UncDirectory(r'\\server\a-very-long-share-name-that-wraps')])
+        self.assertEqual(table.rows[1].status, 'disconnected')
+
+    def test_connect_and_disconnect(self):
+        backend = SimulatorBackend()
+        with use_backend(backend):
+            creds = UncCredentials('user', 'p "w')
+            mount = UncDirectoryMount(UncDirectory(r'\\server\share', creds), DiskDrive('Z:'))
+            conn = UncDirectoryConnection(UncDirectory(r'\\server\IPC$'))
+
+            mount.mount()
+            conn.connect()
+            self.assertTrue(mount.is_mounted())
+            self.assertTrue(conn.is_connected())
+            self.assertEqual(len(backend.get_connections()), 2)
+
+            self.assertRaises(ShellCommandError, mount.mount)
+
+            mount.unmount()
+            conn.disconnect()
+            self.assertFalse(mount.is_mounted())
+            self.assertFalse(conn.is_connected())
+            self.assertRaises(ShellCommandError, conn.disconnect)
+
+    def test_failure_rate(self):
+        backend = SimulatorBackend(failure_rate=1)
+        self.assertRaises(ShellCommandError, backend.run, 'NET USE')
+        self.assertRaises(ShellCommandError, SimulatorBackend().run, 'DIR')
+
+    def test_used_drive_letters(self):
+        backend = SimulatorBackend(local_drives='CD')
+        backend.add_connection(r'\\server\share', 'Z:')
+        self.assertEqual(backend.get_used_drive_letters(), {'C', 'D', 'Z'})
+
+        with use_backend(backend):
+            self.assertEqual(get_available_disk_drive(), DiskDrive('Y:'))
+
+        with use_backend(SimulatorBackend(local_drives='ABCDEFGHIJKLMNOPQRSTUVWXYZ')):
+            self.assertRaises(NoDrivesAvailableError, get_available_disk_drive)
+
+
+class TestUseBackend(TestCase):
+    def test_use_backend(self):
+        default = backends.get_backend()
+        simulator = SimulatorBackend()
+        with use_backend(simulator):
+            self.assertIs(backends.get_backend(), simulator)
+            current_state.get_current_net_use_table(fresh=True)
+        self.assertIs(backends.get_backend(), default)
+        self.assertEqual(simulator.commands, ['NET USE'])
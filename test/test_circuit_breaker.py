@@ -0,0 +1,140 @@
+import asyncio
+from unittest import TestCase
+
+from win_unc.async_connecting import AsyncUncDirectoryConnection
+from win_unc.backends import SimulatorBackend, use_backend
+from win_unc.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitState, get_circuit_breaker,
+    set_circuit_breaker)
+from win_unc.connecting import UncDirectoryConnection
+from win_unc.errors import (
+    CircuitOpenError, LogonFailureError, NetworkUnavailableError, ShellCommandTimeoutError)
+from win_unc.internal import current_state
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+def fail(breaker, host, error=None):
+    try:
+        with breaker.guard(host):
+            raise error or ShellCommandTimeoutError('NET USE', 1)
+    except ShellCommandTimeoutError:
+        pass
+
+
+class TestCircuitBreaker(TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, cool_down=60)
+        for _ in range(3):
+            fail(breaker, 'server')
+        self.assertEqual(breaker.get_state('SERVER').state, OPEN)
+
+        with self.assertRaises(CircuitOpenError) as context:
+            with breaker.guard('server'):
+                self.fail('The block must not run while the circuit is open.')
+        self.assertEqual(context.exception.host, 'server')
+        self.assertGreater(context.exception.retry_after, 0)
+        self.assertIsInstance(context.exception.last_error, ShellCommandTimeoutError)
+        self.assertEqual(breaker.get_state('other').state, CLOSED)
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        fail(breaker, 'server')
+        with breaker.guard('server'):
+            pass
+        fail(breaker, 'server')
+        self.assertEqual(breaker.get_state('server').state, CLOSED)
+        self.assertEqual(breaker.get_state('server').failures, 1)
+
+    def test_errors_that_are_not_retryable_do_not_count(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        with self.assertRaises(LogonFailureError):
+            with breaker.guard('server'):
+                raise LogonFailureError('NET USE', 2, None, 1326, 'Bad password.')
+        self.assertEqual(breaker.get_state('server').state, CLOSED)
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, cool_down=0)
+        fail(breaker, 'server')
+        self.assertEqual(breaker.get_state('server').state, OPEN)
+
+        with breaker.guard('server'):
+            self.assertEqual(breaker.get_state('server').state, HALF_OPEN)
+            # Only one probe is let through at a time.
+            self.assertRaises(CircuitOpenError, breaker.before_attempt, 'server')
+        self.assertEqual(breaker.get_state('server').state, CLOSED)
+
+    def test_failed_probe_opens_again(self):
+        breaker = CircuitBreaker(failure_threshold=2, cool_down=0)
+        fail(breaker, 'server')
+        fail(breaker, 'server')
+        fail(breaker, 'server')
+        state = breaker.get_state('server')
+        self.assertEqual((state.state, state.failures), (OPEN, 3))
+
+    def test_abandoned_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, cool_down=0)
+        fail(breaker, 'server')
+        with self.assertRaises(KeyboardInterrupt):
+            with breaker.guard('server'):
+                raise KeyboardInterrupt()
+        self.assertEqual(breaker.get_state('server').state, OPEN)
+        breaker.before_attempt('server')
+
+    def test_get_state_of_unknown_host(self):
+        breaker = CircuitBreaker()
+        self.assertEqual(breaker.get_state('Server'), CircuitState('server', CLOSED, 0, None, None))
+        self.assertEqual(breaker._circuits, {})
+
+    def test_get_states_and_reset(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        fail(breaker, 'a')
+        with breaker.guard('b'):
+            pass
+        self.assertEqual(list(breaker.get_states()), ['a'])
+        breaker.reset('A')
+        self.assertEqual(breaker.get_states(), {})
+
+    def test_never_opens_without_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=None)
+        for _ in range(10):
+            fail(breaker, 'server')
+        self.assertEqual(breaker.get_state('server').state, CLOSED)
+
+
+class TestConnecting(TestCase):
+    def setUp(self):
+        current_state.invalidate_net_use_table()
+        previous = get_circuit_breaker()
+        set_circuit_breaker(CircuitBreaker(failure_threshold=2, cool_down=60))
+        self.addCleanup(set_circuit_breaker, previous)
+        self.backend = SimulatorBackend(failure_rate=1)
+        use_test_backend(self, self.backend)
+
+    def test_connect_fails_fast(self):
+        conn = UncDirectoryConnection(UncDirectory(r'\\Down\share'))
+        self.assertRaises(NetworkUnavailableError, conn.connect)
+        self.assertRaises(NetworkUnavailableError, conn.connect)
+        self.assertRaises(CircuitOpenError, conn.connect)
+        self.assertEqual(len(self.backend.commands), 2)
+        self.assertEqual(get_circuit_breaker().get_state('down').state, OPEN)
+
+        self.backend.failure_rate = 0
+        UncDirectoryConnection(UncDirectory(r'\\up\share')).connect()
+
+    def test_async_connect_fails_fast(self):
+        conn = AsyncUncDirectoryConnection(UncDirectory(r'\\down\share'))
+        for _ in range(2):
+            self.assertRaises(NetworkUnavailableError, asyncio.run, conn.connect())
+        self.assertRaises(CircuitOpenError, asyncio.run, conn.connect())
+        self.assertEqual(len(self.backend.commands), 2)
+
+    def test_circuits_outlive_backend_changes(self):
+        conn = UncDirectoryConnection(UncDirectory(r'\\down\share'))
+        for _ in range(2):
+            self.assertRaises(NetworkUnavailableError, conn.connect)
+        with use_backend(SimulatorBackend()):
+            self.assertRaises(CircuitOpenError, conn.connect)
+            get_circuit_breaker().reset()
+            conn.connect()
@@ -0,0 +1,131 @@
+from concurrent.futures import CancelledError
+from unittest import TestCase
+
+from win_unc.backends import SimulatorBackend
+from win_unc.connecting import (
+    UncDirectoryConnection, UncDirectoryMount, connect_many, disconnect_many)
+from win_unc.disk_drive import DiskDrive
+from win_unc.errors import ShellCommandError
+from win_unc.internal import current_state
+from win_unc.unc_credentials import UncCredentials
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+class SimulatorTestCase(TestCase):
+    """
+    Runs every command against a `SimulatorBackend` that has a share mounted on "Y:" and a local
+    disk on "C:".
+    """
+
+    def setUp(self):
+        current_state.invalidate_net_use_table()
+        self.backend = SimulatorBackend()
+        self.backend.add_connection(r'\\server\connected', 'Y:')
+        use_test_backend(self, self.backend)
+
+    def get_changes(self):
+        return [command for command in self.backend.commands if command != 'NET USE']
+
+
+def mount(path, drive):
+    return UncDirectoryMount(UncDirectory(path), DiskDrive(drive))
+
+
+class TestCommands(TestCase):
+    def test_connection_command(self):
+        unc = UncDirectory(r'\\server\share', UncCredentials('user', 'pa "ss" & %x%'))
+        conn = UncDirectoryMount(unc, DiskDrive('Z:'), persistent=True)
+        self.assertEqual(conn._get_connection_command('user', 'pa "ss" & %x%'),
+                         ['NET', 'USE', 'Z:', r'\\server\share', 'pa "ss" & %x%', '/USER:user',
+                          '/PERSISTENT:YES'])
+
+    def test_connection_command_without_drive(self):
+        conn = UncDirectoryConnection(UncDirectory(r'\\server\share'), persistent=True)
+        self.assertEqual(conn._get_connection_command(),
+                         ['NET', 'USE', r'\\server\share', '/PERSISTENT:NO'])
+
+    def test_disconnection_command(self):
+        self.assertEqual(mount(r'\\server\share', 'Z:')._get_disconnection_command(),
+                         ['NET', 'USE', 'Z:', '/DELETE', '/YES'])
+
+
+class TestConnectMany(SimulatorTestCase):
+    def test_connect_many(self):
+        conns = [mount(r'\\server\a', 'A:'), mount(r'\\server\connected', 'Y:'),
+                 mount(r'\\server\b', 'B:')]
+        results = connect_many(conns, max_workers=2)
+
+        self.assertEqual([r.connection for r in results], conns)
+        self.assertEqual([r.changed for r in results], [True, False, True])
+        self.assertEqual([r.error for r in results], [None, None, None])
+        self.assertEqual(len(self.get_changes()), 2)
+        self.assertEqual(self.backend.commands.count('NET USE'), 1)
+
+    def test_errors_are_returned(self):
+        results = connect_many([mount(r'\\server\bad', 'C:'), mount(r'\\server\b', 'B:')])
+        self.assertIsInstance(results[0].error, ShellCommandError)
+        self.assertFalse(results[0].changed)
+        self.assertIsNone(results[1].error)
+
+    def test_fail_fast(self):
+        conns = [mount(r'\\server\bad', 'C:')] + [mount(r'\\server\s' + str(i), 'B:')
+                                                  for i in range(20)]
+        results = connect_many(conns, max_workers=1, fail_fast=True)
+        self.assertIsInstance(results[0].error, ShellCommandError)
+        # The single worker may already have started the next command when the error is seen.
+        self.assertTrue(all(isinstance(r.error, CancelledError) for r in results[2:]))
+        self.assertLessEqual(len(self.get_changes()), 2)
+
+    def test_nothing_to_do(self):
+        self.assertEqual(connect_many([]), [])
+
+
+class TestDisconnectMany(SimulatorTestCase):
+    def test_disconnect_many(self):
+        conns = [mount(r'\\server\connected', 'Y:'),
+                 UncDirectoryConnection(UncDirectory(r'\\server\a'))]
+        results = disconnect_many(conns)
+        self.assertEqual([r.changed for r in results], [True, False])
+        self.assertEqual(self.get_changes(), ['NET USE Y: /DELETE /YES'])
+        self.assertEqual(self.backend.get_connections(), [])
+
+
+class TestContextManager(SimulatorTestCase):
+    def test_mount(self):
+        with mount(r'\\server\share', 'Z:'):
+            self.assertIn(('Z:', r'\\server\share', 'OK'), self.backend.get_connections())
+        self.assertEqual(self.backend.commands,
+                         [r'NET USE Z: \\server\share /PERSISTENT:NO',
+                          'NET USE Z: /DELETE /YES'])
+
+    def test_mount_already_mounted(self):
+        with mount(r'\\server\connected', 'Y:'):
+            pass
+        self.assertEqual(self.get_changes(), [r'NET USE Y: \\server\connected /PERSISTENT:NO'])
+        self.assertEqual(len(self.backend.get_connections()), 1)
+
+    def test_drive_used_by_another_share(self):
+        with self.assertRaises(ShellCommandError):
+            with mount(r'\\server\other', 'Y:'):
+                pass
+        self.assertEqual(len(self.backend.get_connections()), 1)
+
+    def test_disconnected_inside_block(self):
+        with mount(r'\\server\share', 'Z:') as conn:
+            conn.disconnect()
+        self.assertEqual(self.backend.get_connections(), [(r'Y:', r'\\server\connected', 'OK')])
+
+    def test_connection_without_drive_is_checked(self):
+        self.backend.add_connection(r'\\server\deviceless')
+        with UncDirectoryConnection(UncDirectory(r'\\server\deviceless')):
+            pass
+        self.assertEqual(self.backend.commands, ['NET USE'])
+
+    def test_verify(self):
+        conn = UncDirectoryMount(UncDirectory(r'\\server\share'), DiskDrive('Z:'), verify=True)
+        with conn:
+            pass
+        self.assertEqual(self.backend.commands.count('NET USE'), 2)
+        self.assertEqual(len(self.get_changes()), 2)
@@ -0,0 +1,115 @@
+import time
+from threading import Thread
+from time import monotonic
+from unittest import TestCase
+
+from win_unc.backends import SimulatorBackend, use_backend
+from win_unc.internal import current_state
+from win_unc.internal.current_state import NetUseTableCache
+
+from connection_test_utils import use_test_backend
+
+
+class TestNetUseTableCache(TestCase):
+    def setUp(self):
+        self.backend = SimulatorBackend()
+        use_test_backend(self, self.backend)
+
+    def get_query_count(self):
+        return self.backend.commands.count('NET USE')
+
+    def test_no_caching_by_default(self):
+        cache = NetUseTableCache()
+        self.assertIsNot(cache.get(), cache.get())
+        self.assertEqual(self.get_query_count(), 2)
+
+    def test_ttl(self):
+        cache = NetUseTableCache(ttl=60)
+        self.assertIs(cache.get(), cache.get())
+        self.assertEqual(self.get_query_count(), 1)
+
+    def test_max_age_override(self):
+        cache = NetUseTableCache(ttl=60)
+        table = cache.get()
+        self.assertIsNot(cache.get(max_age=0), table)
+        self.assertEqual(self.get_query_count(), 2)
+
+        cache = NetUseTableCache()
+        table = cache.get()
+        self.assertIs(cache.get(max_age=60), table)
+
+    def test_fresh(self):
+        cache = NetUseTableCache(ttl=60)
+        table = cache.get()
+        self.assertIsNot(cache.get(fresh=True), table)
+        self.assertEqual(self.get_query_count(), 2)
+
+    def test_invalidate(self):
+        cache = NetUseTableCache(ttl=60)
+        table = cache.get()
+        cache.invalidate()
+        self.assertIsNot(cache.get(), table)
+        self.assertEqual(self.get_query_count(), 2)
+
+    def test_concurrent_queries_are_coalesced(self):
+        self.backend.latency = 0.2
+        cache = NetUseTableCache()
+        threads = [Thread(target=cache.get) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(cache.get_stats()['queries'] + cache.get_stats()['coalesced'], 20)
+        self.assertLess(self.get_query_count(), 20)
+
+    def test_invalidate_does_not_join_older_query(self):
+        self.backend.latency = 0.3
+        cache = NetUseTableCache()
+        first = Thread(target=cache.get)
+        first.start()
+        self.backend.latency = 0
+        cache.invalidate()
+        cache.get()
+        first.join()
+        self.assertEqual(cache.get_stats(), {'queries': 2, 'coalesced': 0})
+
+    def test_invalidate_discards_in_flight_query(self):
+        self.backend.latency = 0.2
+        cache = NetUseTableCache(ttl=60)
+        first = Thread(target=cache.get)
+        first.start()
+        time.sleep(0.05)
+        self.backend.add_connection(r'\\server\share', 'Z:')
+        cache.invalidate()
+        first.join()
+
+        # The query started before `invalidate`, so its table must not be cached.
+        self.assertIsNone(cache.peek())
+        self.backend.latency = 0
+        self.assertEqual(len(cache.get().rows), 1)
+        self.assertEqual(self.get_query_count(), 2)
+
+    def test_put_ignores_snapshots_started_before_invalidate(self):
+        cache = NetUseTableCache(ttl=60)
+        taken_at = monotonic()
+        cache.invalidate()
+        cache.put(object(), taken_at)
+        self.assertIsNone(cache.peek())
+
+    def test_put_keeps_newest(self):
+        cache = NetUseTableCache(ttl=60)
+        newer, older = object(), object()
+        cache.put(newer, taken_at=2)
+        cache.put(older, taken_at=1)
+        self.assertIs(cache._table, newer)
+
+
+class TestIterCurrentNetUseRows(TestCase):
+    def test_rows(self):
+        backend = SimulatorBackend()
+        backend.add_connection(r'\\server\a', 'A:')
+        backend.add_connection(r'\\server\b')
+        with use_backend(backend):
+            rows = list(current_state.iter_current_net_use_rows())
+        self.assertEqual([row.remote.get_path() for row in rows], [r'\\server\a', r'\\server\b'])
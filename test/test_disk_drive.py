@@ -1,7 +1,15 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 
-from win_unc.errors import InvalidDiskDriveError
-from win_unc.disk_drive import DiskDrive
+from win_unc.backends import SimulatorBackend
+from win_unc.async_connecting import AsyncUncDirectoryMount
+from win_unc.connecting import UncDirectoryMount, reserve_disk_drive
+from win_unc.errors import InvalidDiskDriveError, NoDrivesAvailableError, ShellCommandError
+from win_unc.disk_drive import DiskDrive, DriveLetterAllocator, get_drive_letter_allocator
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
 
 
 class TestDiskDrive(TestCase):
@@ -32,3 +40,95 @@ class TestDiskDrive(TestCase):
         self.assertEqual(DiskDrive('a'), DiskDrive('A:'))
         self.assertEqual(DiskDrive('A:\\'), DiskDrive('A:'))
         self.assertNotEqual(DiskDrive('A:'), DiskDrive('Z:'))
+
+
+class TestDriveLetterAllocator(TestCase):
+    def setUp(self):
+        self.backend = SimulatorBackend(local_drives='ABCDEFGHIJKLMNOPQRSTUV')
+        self.backend.add_connection(r'\\server\share', 'W:')
+        use_test_backend(self, self.backend)
+        self.allocator = DriveLetterAllocator()
+
+    def test_allocate(self):
+        self.assertEqual(self.allocator.get_available(), DiskDrive('Z:'))
+        self.assertEqual(self.allocator.allocate(2), [DiskDrive('Z:'), DiskDrive('Y:')])
+        self.assertEqual(self.allocator.allocate(), [DiskDrive('X:')])
+        self.assertRaises(NoDrivesAvailableError, self.allocator.allocate)
+        self.assertEqual(self.backend.commands, ['NET USE'])
+
+    def test_allocate_is_all_or_nothing(self):
+        self.assertRaises(NoDrivesAvailableError, self.allocator.allocate, 4)
+        self.assertEqual(len(self.allocator.allocate(3)), 3)
+
+    def test_reserve_and_release(self):
+        self.assertTrue(self.allocator.reserve(DiskDrive('Y:')))
+        self.assertFalse(self.allocator.reserve(DiskDrive('Y:')))
+        self.assertFalse(self.allocator.reserve(DiskDrive('W:')))
+        self.allocator.release(DiskDrive('Y:'))
+        self.assertTrue(self.allocator.reserve(DiskDrive('Y:')))
+
+    def test_invalidate(self):
+        self.allocator.allocate()
+        self.backend.add_connection(r'\\server\other', 'Y:')
+        self.allocator.invalidate()
+        self.assertEqual(self.allocator.allocate(), [DiskDrive('X:')])
+
+    def test_parallel_mounts_do_not_collide(self):
+        mounts = [UncDirectoryMount(UncDirectory(r'\\server\{0}'.format(name)))
+                  for name in 'abc']
+        self.assertEqual(set(mount.disk_drive for mount in mounts), {DiskDrive('Z:')})
+
+        with ThreadPoolExecutor(3) as executor:
+            list(executor.map(UncDirectoryMount.mount, mounts))
+        self.assertEqual(set(mount.disk_drive.get_drive() for mount in mounts),
+                         {'X:', 'Y:', 'Z:'})
+
+        mounts[0].unmount()
+        self.assertEqual(get_drive_letter_allocator().get_available(), mounts[0].disk_drive)
+
+    def test_failed_mount_releases_drive(self):
+        mount = UncDirectoryMount(UncDirectory(r'\\server\a'))
+        self.backend.failure_rate = 1
+        self.assertRaises(ShellCommandError, mount.mount)
+        self.backend.failure_rate = 0
+        self.assertEqual(get_drive_letter_allocator().get_available(), DiskDrive('Z:'))
+
+    def test_failed_mount_keeps_reservation_of_other_mount(self):
+        mounting = UncDirectoryMount(UncDirectory(r'\\server\a'))
+        reserve_disk_drive(mounting)
+        self.assertEqual(mounting.disk_drive, DiskDrive('Z:'))
+        mount = UncDirectoryMount(UncDirectory(r'\\server\b'), DiskDrive('Z:'))
+        self.backend.failure_rate = 1
+        self.assertRaises(ShellCommandError, mount.mount)
+        self.backend.failure_rate = 0
+        self.assertEqual(get_drive_letter_allocator().get_available(), DiskDrive('Y:'))
+
+    def test_mapping_added_externally_is_skipped(self):
+        with UncDirectoryMount(UncDirectory(r'\\server\a')) as mount:
+            self.assertEqual(mount.disk_drive, DiskDrive('Z:'))
+        self.backend.add_connection(r'\\other\share', 'Z:')
+        with UncDirectoryMount(UncDirectory(r'\\server\b')) as mount:
+            self.assertEqual(mount.disk_drive, DiskDrive('Y:'))
+            self.assertTrue(mount.is_mounted())
+
+        async def mount_async():
+            async with AsyncUncDirectoryMount(UncDirectory(r'\\server\c')):
+                pass
+            self.backend.add_connection(r'\\other\share', 'Y:')
+            async with AsyncUncDirectoryMount(UncDirectory(r'\\server\d')) as mount:
+                return mount.disk_drive
+
+        self.assertEqual(asyncio.run(mount_async()), DiskDrive('X:'))
+
+    def test_mapping_removed_externally_releases_drive(self):
+        for _ in range(3):
+            with UncDirectoryMount(UncDirectory(r'\\server\a')) as mount:
+                self.backend.run(['NET', 'USE', mount.disk_drive.get_drive(), '/DELETE'])
+        self.assertEqual(len(get_drive_letter_allocator().allocate(3)), 3)
+
+    def test_refresh_async(self):
+        allocator = DriveLetterAllocator()
+        asyncio.run(allocator.refresh_async())
+        asyncio.run(allocator.refresh_async())
+        self.assertEqual(allocator.allocate(3), [DiskDrive('Z:'), DiskDrive('Y:'), DiskDrive('X:')])
+        self.assertEqual(self.backend.commands, ['NET USE'])
@@ -0,0 +1,111 @@
+import asyncio
+from unittest import TestCase
+
+import win_unc
+from win_unc import instrumentation
+from win_unc.async_connecting import AsyncUncDirectoryConnection
+from win_unc.backends import SimulatorBackend
+from win_unc.connecting import UncDirectoryConnection, UncDirectoryMount
+from win_unc.disk_drive import DiskDrive
+from win_unc.errors import ShellCommandError
+from win_unc.instrumentation import MetricsAggregator, get_percentile
+from win_unc.internal.current_state import get_current_net_use_table
+from win_unc.unc_credentials import UncCredentials
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+class TestInstrumentation(TestCase):
+    def setUp(self):
+        self.backend = SimulatorBackend()
+        self.backend.add_connection(r'\\server\a', 'A:')
+        self.backend.add_connection(r'\\server\b')
+        use_test_backend(self, self.backend)
+
+        self.records = []
+        instrumentation.add_listener(self.records.append)
+        self.addCleanup(instrumentation.remove_listener, self.records.append)
+        instrumentation.reset_metrics()
+        self.addCleanup(instrumentation.reset_metrics)
+
+    def test_query(self):
+        get_current_net_use_table(fresh=True)
+        record, = self.records
+        self.assertEqual(record.kind, 'query')
+        self.assertEqual(record.command, 'NET USE')
+        self.assertEqual(record.exit_code, 0)
+        self.assertEqual(record.row_count, 2)
+        self.assertEqual(record.output_bytes, len(self.backend.render()))
+        self.assertGreaterEqual(record.wall_time, record.parse_time)
+        self.assertIsNone(record.error)
+
+    def test_connect_and_disconnect(self):
+        unc = UncDirectory(r'\\server\c', UncCredentials('user', 'secret'))
+        conn = UncDirectoryMount(unc, DiskDrive('Z:'))
+        conn.connect()
+        conn.disconnect()
+
+        connect, disconnect = self.records
+        self.assertEqual(connect.kind, 'connect')
+        self.assertNotIn('secret', connect.command)
+        self.assertIn('-----', connect.command)
+        self.assertIsNone(connect.row_count)
+        self.assertEqual(disconnect.kind, 'disconnect')
+
+    def test_failure(self):
+        conn = UncDirectoryConnection(UncDirectory(r'\\server\missing'))
+        self.assertRaises(ShellCommandError, conn.disconnect)
+        record, = self.records
+        self.assertEqual(record.exit_code, 2)
+        self.assertIsInstance(record.error, ShellCommandError)
+
+    def test_failure_is_redacted(self):
+        unc = UncDirectory(r'\\server\c', UncCredentials('user', 'secret'))
+        self.backend.failure_rate = 1
+        with self.assertRaises(ShellCommandError) as context:
+            UncDirectoryMount(unc, DiskDrive('Z:')).connect()
+        self.assertNotIn('secret', str(context.exception))
+        self.assertIn('-----', context.exception.command)
+        record, = self.records
+        self.assertIs(record.error, context.exception)
+
+    def test_async(self):
+        conn = AsyncUncDirectoryConnection(UncDirectory(r'\\server\c'))
+        asyncio.run(conn.connect())
+        asyncio.run(conn.is_connected(fresh=True))
+        self.assertEqual([record.kind for record in self.records], ['connect', 'query'])
+        self.assertEqual(self.records[1].row_count, 3)
+
+    def test_metrics(self):
+        get_current_net_use_table(fresh=True)
+        get_current_net_use_table(fresh=True)
+        metrics = win_unc.get_metrics()['query']
+        self.assertEqual(metrics['count'], 2)
+        self.assertEqual(metrics['errors'], 0)
+        self.assertEqual(metrics['rows'], 4)
+        self.assertLessEqual(metrics['p50'], metrics['p99'])
+
+    def test_listener_errors_are_ignored(self):
+        def fail(record):
+            raise ValueError()
+        instrumentation.add_listener(fail)
+        self.addCleanup(instrumentation.remove_listener, fail)
+        get_current_net_use_table(fresh=True)
+
+
+class TestMetricsAggregator(TestCase):
+    def test_percentiles(self):
+        aggregator = MetricsAggregator(max_samples=100)
+        for wall_time in range(1, 201):
+            aggregator(instrumentation.CommandRecord('query', 'NET USE', wall_time, 0, 0, None,
+                                                     None, None))
+        stats = aggregator.get_stats()['query']
+        self.assertEqual(stats['count'], 200)
+        self.assertEqual((stats['p50'], stats['p95'], stats['p99']), (150, 195, 199))
+
+    def test_get_percentile(self):
+        self.assertIsNone(get_percentile([], 50))
+        self.assertEqual(get_percentile([1], 99), 1)
+        self.assertEqual(get_percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(get_percentile([1, 2, 3, 4], 51), 3)
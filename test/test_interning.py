@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from win_unc import interning as I
+from win_unc.disk_drive import DiskDrive
+from win_unc.errors import InvalidDiskDriveError
+from win_unc.internal.net_use_table import parse_net_use_table
+from win_unc.unc_directory import UncDirectory
+
+from test_net_use_table import VALID_TABLE
+
+
+class TestInternCache(TestCase):
+    def test_hits_and_misses(self):
+        cache = I.InternCache()
+        first = cache.get('a:', DiskDrive)
+        self.assertIs(cache.get('a:', DiskDrive), first)
+        self.assertEqual(cache.get_stats(), {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 1024})
+
+    def test_eviction(self):
+        cache = I.InternCache(maxsize=2)
+        a = cache.get('A', DiskDrive)
+        cache.get('B', DiskDrive)
+        cache.get('A', DiskDrive)
+        cache.get('C', DiskDrive)
+        self.assertIs(cache.get('A', DiskDrive), a)
+        self.assertEqual(cache.get_stats()['size'], 2)
+        cache.get('B', DiskDrive)
+        self.assertEqual(cache.get_stats()['misses'], 4)
+
+    def test_errors_are_not_cached(self):
+        cache = I.InternCache()
+        self.assertRaises(InvalidDiskDriveError, cache.get, '1', DiskDrive)
+        self.assertEqual(cache.get_stats()['size'], 0)
+
+
+class TestInterning(TestCase):
+    def tearDown(self):
+        I.disable_interning()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(I.is_interning_enabled())
+        self.assertIsNone(I.get_interning_stats())
+        self.assertIsNot(I.intern_disk_drive('A:'), I.intern_disk_drive('A:'))
+
+    def test_enabled(self):
+        I.enable_interning()
+        self.assertIs(I.intern_disk_drive('A:'), I.intern_disk_drive('A:'))
+        self.assertIs(I.intern_unc_directory(r'\\a\b'), I.intern_unc_directory(r'\\a\b'))
+        self.assertEqual(I.intern_unc_directory(r'\\a\b'), UncDirectory(r'\\a\b'))
+
+    def test_parsing(self):
+        I.enable_interning()
+        first = parse_net_use_table(VALID_TABLE)
+        second = parse_net_use_table(VALID_TABLE)
+        self.assertIs(first.rows[0]['remote'], second.rows[0]['remote'])
+        self.assertEqual(I.get_interning_stats()['disk_drives']['hits'], 4)
@@ -0,0 +1,112 @@
+import threading
+import time
+from unittest import TestCase
+
+from win_unc.backends import SimulatorBackend
+from win_unc.disk_drive import DiskDrive
+from win_unc.errors import NoDrivesAvailableError
+from win_unc.mount_manager import MountManager
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+class TestMountManager(TestCase):
+    def setUp(self):
+        self.backend = SimulatorBackend(local_drives='ABCDEFGHIJKLMNOPQRSTUVWX')
+        use_test_backend(self, self.backend)
+
+    def get_mounted(self):
+        return sorted(local for local, _, _ in self.backend.get_connections())
+
+    def get_connect_count(self):
+        return sum(1 for command in self.backend.commands if '/PERSISTENT' in command)
+
+    def test_shares_mounts(self):
+        manager = MountManager(idle_timeout=None)
+        unc = UncDirectory(r'\\server\share')
+        with manager.acquire(unc) as first:
+            with manager.acquire(UncDirectory(r'\\SERVER\share')) as second:
+                self.assertIs(first.mount, second.mount)
+                self.assertEqual(first.get_path(), 'Z:')
+                self.assertEqual(manager.get_stats(), {'mounts': 1, 'leases': 2, 'evictions': 0})
+        with manager.acquire(unc):
+            pass
+        self.assertEqual(self.get_connect_count(), 1)
+        self.assertEqual(self.get_mounted(), ['Z:'])
+
+    def test_unmounts_immediately_without_idle_timeout(self):
+        manager = MountManager(idle_timeout=0)
+        lease = manager.acquire(UncDirectory(r'\\server\share'))
+        lease.release()
+        lease.release()
+        self.assertEqual(self.get_mounted(), [])
+        self.assertEqual(manager.get_stats(), {'mounts': 0, 'leases': 0, 'evictions': 1})
+
+    def test_idle_timeout(self):
+        manager = MountManager(idle_timeout=0.05)
+        manager.acquire(UncDirectory(r'\\server\share')).release()
+        self.assertEqual(self.get_mounted(), ['Z:'])
+        deadline = time.time() + 5
+        while self.get_mounted() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.get_mounted(), [])
+
+    def test_idle_timeout_keeps_one_timer_per_mount(self):
+        def get_waiting_timers():
+            return [thread for thread in threading.enumerate()
+                    if isinstance(thread, threading.Timer) and not thread.finished.is_set()]
+
+        manager = MountManager(idle_timeout=60)
+        unc = UncDirectory(r'\\server\share')
+        timers = get_waiting_timers()
+        for _ in range(20):
+            manager.acquire(unc).release()
+        self.assertEqual(len(get_waiting_timers()), len(timers) + 1)
+        with manager.acquire(unc):
+            self.assertEqual(get_waiting_timers(), timers)
+        self.assertEqual(manager.evict_idle(), 1)
+        self.assertEqual(get_waiting_timers(), timers)
+
+    def test_evict_idle(self):
+        manager = MountManager(idle_timeout=None)
+        lease = manager.acquire(UncDirectory(r'\\server\a'))
+        manager.acquire(UncDirectory(r'\\server\b')).release()
+        self.assertEqual(manager.evict_idle(), 1)
+        self.assertEqual(self.get_mounted(), ['Z:'])
+        lease.release()
+        manager.close()
+        self.assertEqual(self.get_mounted(), [])
+
+    def test_evicts_least_recently_used(self):
+        manager = MountManager(idle_timeout=None)
+        a, b, c = [UncDirectory(r'\\server\{0}'.format(name)) for name in 'abc']
+        manager.acquire(a).release()
+        manager.acquire(b).release()
+        manager.acquire(a).release()
+
+        with manager.acquire(c) as lease:
+            self.assertEqual(lease.disk_drive, DiskDrive('Y:'))
+            remotes = [remote for _, remote, _ in self.backend.get_connections()]
+            self.assertEqual(sorted(remotes), [r'\\server\a', r'\\server\c'])
+
+            with manager.acquire(a):
+                with self.assertRaises(NoDrivesAvailableError):
+                    manager.acquire(b)
+        self.assertEqual(manager.get_stats()['leases'], 0)
+
+    def test_evicts_when_selected_drive_is_taken(self):
+        manager = MountManager(idle_timeout=None)
+        manager.acquire(UncDirectory(r'\\server\a')).release()
+        self.backend.add_connection(r'\\other\share', 'Y:')
+        with manager.acquire(UncDirectory(r'\\server\b')) as lease:
+            self.assertEqual(lease.get_path(), 'Z:')
+        self.assertEqual(manager.get_stats()['evictions'], 1)
+
+    def test_uses_existing_mounts(self):
+        self.backend.add_connection(r'\\server\share', 'Y:')
+        manager = MountManager(idle_timeout=0)
+        with manager.acquire(UncDirectory(r'\\server\share')) as lease:
+            self.assertEqual(lease.disk_drive, DiskDrive('Y:'))
+        self.assertEqual(self.get_mounted(), ['Y:'])
+        self.assertEqual(self.get_connect_count(), 0)
@@ -0,0 +1,116 @@
+import sys
+from unittest import TestCase
+
+from win_unc.backends import SimulatorBackend
+from win_unc.connecting import UncDirectoryMount
+from win_unc.disk_drive import DiskDrive
+from win_unc.errors import (
+    ConnectionNotFoundError, CredentialConflictError, DeviceInUseError, NetCommandError,
+    NetworkUnavailableError, ShellCommandError, ShellCommandTimeoutError)
+from win_unc.internal import current_state
+from win_unc.internal.net_errors import (
+    format_system_error, get_command_error, parse_system_error)
+from win_unc.internal.shell import run
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+SYSTEM_ERROR_53 = 'System error 53 has occurred.\r\n\r\nThe network path was not found.\r\n\r\n'
+NET_ERROR_2250 = ('The network connection could not be found.\r\n\r\n'
+                  'More help is available by typing NET HELPMSG 2250.\r\n\r\n')
+
+
+class TestParseSystemError(TestCase):
+    def test_system_error(self):
+        self.assertEqual(parse_system_error(SYSTEM_ERROR_53),
+                         (53, 'The network path was not found.'))
+
+    def test_net_error(self):
+        self.assertEqual(parse_system_error(NET_ERROR_2250),
+                         (2250, 'The network connection could not be found.'))
+
+    def test_localized(self):
+        self.assertEqual(parse_system_error('Systemfehler 1219 aufgetreten.\r\n\r\nText.\r\n'),
+                         (1219, 'Text.'))
+
+    def test_number_in_message(self):
+        message = 'The network connection \\\\fileserver01\\share could not be found.'
+        stderr = message + '\r\n\r\nMore help is available by typing NET HELPMSG 2250.\r\n\r\n'
+        self.assertEqual(parse_system_error(stderr), (2250, message))
+
+    def test_no_number(self):
+        self.assertIsNone(parse_system_error('Something went wrong.\r\n'))
+        self.assertIsNone(parse_system_error(''))
+        self.assertIsNone(parse_system_error(None))
+
+    def test_format_system_error(self):
+        self.assertEqual(format_system_error(53, 'The network path was not found.'),
+                         SYSTEM_ERROR_53)
+        self.assertEqual(format_system_error(2250, 'The network connection could not be found.'),
+                         NET_ERROR_2250)
+
+
+class TestGetCommandError(TestCase):
+    def test_known_number(self):
+        error = get_command_error('NET USE', 2, SYSTEM_ERROR_53)
+        self.assertIsInstance(error, NetworkUnavailableError)
+        self.assertEqual(error.system_error, 53)
+        self.assertEqual(error.message, 'The network path was not found.')
+        self.assertEqual(error.error_code, 2)
+        self.assertEqual(error.stderr, SYSTEM_ERROR_53)
+        self.assertTrue(error.retryable)
+        self.assertIn('system error 53', str(error))
+
+    def test_not_retryable(self):
+        error = get_command_error('NET USE', 2, format_system_error(1219, 'Conflict.'))
+        self.assertIsInstance(error, CredentialConflictError)
+        self.assertFalse(error.retryable)
+
+    def test_unknown_number(self):
+        error = get_command_error('NET USE', 2, format_system_error(9999, 'Unknown.'))
+        self.assertIs(type(error), NetCommandError)
+        self.assertFalse(error.retryable)
+
+    def test_no_number(self):
+        error = get_command_error('NET USE', 2, 'Oops.')
+        self.assertIs(type(error), ShellCommandError)
+        self.assertEqual(error.stderr, 'Oops.')
+
+    def test_timeout_is_retryable(self):
+        self.assertTrue(ShellCommandTimeoutError('NET USE', 1).retryable)
+
+
+class TestRaisedErrors(TestCase):
+    def setUp(self):
+        current_state.invalidate_net_use_table()
+        self.backend = SimulatorBackend()
+        self.backend.add_connection(r'\\server\used', 'Y:')
+        use_test_backend(self, self.backend)
+
+    def test_shell(self):
+        code = 'import sys; sys.stderr.write({0!r}); sys.exit(2)'.format(SYSTEM_ERROR_53)
+        with self.assertRaises(NetworkUnavailableError) as context:
+            run([sys.executable, '-c', code])
+        self.assertEqual(context.exception.error_code, 2)
+
+    def test_simulator(self):
+        mount = UncDirectoryMount(UncDirectory(r'\\server\other'), DiskDrive('Y:'))
+        self.assertRaises(DeviceInUseError, mount.mount)
+        self.assertRaises(ConnectionNotFoundError, self.backend.run,
+                          ['NET', 'USE', 'Q:', '/DELETE'])
+        self.assertRaises(NetworkUnavailableError, SimulatorBackend(failure_rate=1).run,
+                          ['NET', 'USE'])
+
+    def test_context_manager_fails_fast(self):
+        self.backend.failure_rate = 1
+        with self.assertRaises(NetworkUnavailableError):
+            with UncDirectoryMount(UncDirectory(r'\\server\share'), DiskDrive('Z:')):
+                pass
+        # The failure says that the share was not already mounted, so `NET USE` is not run.
+        self.assertEqual(self.backend.commands, [r'NET USE Z: \\server\share /PERSISTENT:NO'])
+
+    def test_context_manager_ignores_missing_connection(self):
+        with UncDirectoryMount(UncDirectory(r'\\server\share'), DiskDrive('Z:')):
+            self.backend.run(['NET', 'USE', 'Z:', '/DELETE'])
+        self.assertNotIn('NET USE', self.backend.commands)
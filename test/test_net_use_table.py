@@ -1,7 +1,9 @@
 from unittest import TestCase
 
 from win_unc.disk_drive import DiskDrive
-from win_unc.internal.net_use_table import NetUseTable, parse_net_use_table
+from win_unc.internal.net_use_table import (
+    NetUseRow, NetUseTable, iter_net_use_rows, parse_net_use_table)
+from win_unc.unc_credentials import UncCredentials
 from win_unc.unc_directory import UncDirectory
 
 
@@ -145,3 +147,83 @@ class TestNetUseTable(TestCase):
         self.assertEqual(table.get_matching_rows(status='ABC'), [row])
         self.assertEqual(table.get_matching_rows(status='abc'), [row])
         self.assertEqual(table.get_matching_rows(status='cba'), [])
+
+    def test_get_matching_rows_with_objects(self):
+        table = NetUseTable()
+        row = table.add_row({'local': 'A:', 'remote': r'\\Remote\A', 'status': 'OK'})
+
+        creds = UncCredentials('user', 'pass')
+        self.assertEqual(table.get_matching_rows(local=DiskDrive('a')), [row])
+        self.assertEqual(table.get_matching_rows(remote=UncDirectory(r'\\remote\a')), [row])
+        self.assertEqual(table.get_matching_rows(remote=UncDirectory(r'\\remote\a', creds)), [row])
+        self.assertEqual(table.get_matching_rows(local=DiskDrive('a'),
+                                                 remote=UncDirectory(r'\\remote\a'),
+                                                 status='ok'),
+                         [row])
+        self.assertEqual(table.get_matching_rows(local=DiskDrive('b'),
+                                                 remote=UncDirectory(r'\\remote\a')),
+                         [])
+
+    def test_get_matching_rows_keeps_order(self):
+        table = NetUseTable()
+        rows = [table.add_row({'local': letter, 'remote': r'\\remote', 'status': 'OK'})
+                for letter in 'DCBA']
+        self.assertEqual(table.get_matching_rows(remote=r'\\remote', status='ok'), rows)
+        self.assertEqual(table.get_connected_devices(), [DiskDrive(l) for l in 'DCBA'])
+
+
+class TestIteratingNetUseRows(TestCase):
+    """
+    Tests the streaming `NET USE` parser.
+    """
+
+    def test_empty_table(self):
+        self.assertEqual(list(iter_net_use_rows(EMPTY_TABLE.splitlines())), [])
+
+    def test_rows(self):
+        rows = list(iter_net_use_rows(VALID_TABLE.splitlines()))
+        self.assertEqual([row['local'] for row in rows],
+                         [DiskDrive('A:'), DiskDrive('B:'), DiskDrive('C:'), DiskDrive('D:'), None])
+        self.assertEqual(rows[0]['remote'], UncDirectory(r'\\some.remote.path\with-a-long-path'))
+        self.assertEqual(rows[3]['remote'], UncDirectory(r'\\a'))
+        self.assertEqual(rows[3]['status'], 'unavailable')
+
+    def test_windows_line_endings(self):
+        lines = VALID_TABLE.replace('\n', '\r\n').split('\n')
+        self.assertEqual(len(list(iter_net_use_rows(lines))), 5)
+
+    def test_stops_early(self):
+        lines = iter(VALID_TABLE.splitlines())
+        rows = iter_net_use_rows(lines)
+        self.assertEqual(next(rows)['local'], DiskDrive('A:'))
+        self.assertTrue(next(lines).startswith('Disconnected'))
+
+
+class TestNetUseRow(TestCase):
+    def test_access(self):
+        row = NetUseRow(DiskDrive('A:'), UncDirectory(r'\\remote'), 'ok')
+        self.assertEqual(row.local, DiskDrive('A:'))
+        self.assertEqual(row['remote'], UncDirectory(r'\\remote'))
+        self.assertEqual(row.get('status'), 'ok')
+        self.assertIsNone(row.get('network'))
+        self.assertRaises(KeyError, lambda: row['network'])
+        self.assertIn('local', row)
+
+    def test_mapping(self):
+        row = NetUseRow(DiskDrive('A:'), UncDirectory(r'\\remote'), 'ok')
+        self.assertEqual(list(row), ['local', 'remote', 'status'])
+        self.assertEqual(len(row), 3)
+        self.assertEqual(row.values(), [DiskDrive('A:'), UncDirectory(r'\\remote'), 'ok'])
+        self.assertEqual(dict(row.items()), dict(row))
+        self.assertEqual(dict(row), {'local': DiskDrive('A:'),
+                                     'remote': UncDirectory(r'\\remote'),
+                                     'status': 'ok'})
+        self.assertNotEqual(row, dict(row))
+
+    def test_eq(self):
+        self.assertEqual(NetUseRow(DiskDrive('A:'), None, 'ok'), NetUseRow(DiskDrive('a'), None, 'ok'))
+        self.assertNotEqual(NetUseRow(DiskDrive('A:'), None, 'ok'), NetUseRow(None, None, 'ok'))
+
+    def test_no_instance_dict(self):
+        for obj in [NetUseRow(), DiskDrive('A:'), UncDirectory(r'\\remote'), UncCredentials()]:
+            self.assertFalse(hasattr(obj, '__dict__'))
@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from win_unc import query
+from win_unc.backends import SimulatorBackend, use_backend
+from win_unc.connecting import UncDirectoryConnection, UncDirectoryMount
+from win_unc.disk_drive import DiskDrive
+from win_unc.internal.net_use_table import parse_net_use_table
+from win_unc.path_index import UncPathIndex, get_path_index
+from win_unc.unc_directory import UncDirectory
+
+
+def get_table():
+    backend = SimulatorBackend()
+    backend.add_connection(r'\\server\share')
+    backend.add_connection(r'\\server\share\nested', 'Y:')
+    backend.add_connection(r'\\server\other', 'X:')
+    backend.add_connection(r'\\server\other')
+    backend.add_connection(r'\\host\IPC$')
+    return parse_net_use_table(backend.render())
+
+
+class TestUncPathIndex(TestCase):
+    def setUp(self):
+        self.index = UncPathIndex(get_table())
+
+    def get_remote(self, path):
+        row = self.index.get_row(path)
+        return row.remote.get_path() if row else None
+
+    def test_longest_prefix(self):
+        self.assertEqual(self.get_remote(r'\\server\share\a\b\c.txt'), r'\\server\share')
+        self.assertEqual(self.get_remote(r'\\SERVER\Share\Nested\c.txt'), r'\\server\share\nested')
+        self.assertEqual(self.get_remote(r'\\server\share\nested'), r'\\server\share\nested')
+        self.assertEqual(self.get_remote(r'\\server\share\nestedx'), r'\\server\share')
+        self.assertEqual(self.get_remote('//server/share/a/'), r'\\server\share')
+        self.assertEqual(self.get_remote(r'\\host\share\a'), r'\\host\IPC$')
+
+    def test_no_match(self):
+        self.assertIsNone(self.index.get_row(r'\\server'))
+        self.assertIsNone(self.index.get_row(r'\\server\missing\a'))
+        self.assertIsNone(self.index.get_row(r'server\share'))
+        self.assertIsNone(self.index.get_row(r'Z:\a'))
+        self.assertIsNone(UncPathIndex().get_row(r'\\server\share'))
+
+    def test_prefers_mounts(self):
+        self.assertEqual(self.index.get_row(r'\\server\other\a').local, DiskDrive('X:'))
+        self.assertEqual(len(self.index.get_rows(r'\\server\other\a')), 2)
+
+    def test_drive_paths(self):
+        self.assertEqual(self.get_remote(r'y:\a\b.txt'), r'\\server\share\nested')
+        self.assertEqual(self.get_remote('X:'), r'\\server\other')
+
+    def test_get_rows_for_paths(self):
+        paths = [r'\\server\share\{0}.txt'.format(n) for n in range(1000)] + [r'\\nowhere\x']
+        rows = self.index.get_rows_for_paths(paths)
+        self.assertEqual(len(rows), 1001)
+        self.assertIsNone(rows[r'\\nowhere\x'])
+        self.assertEqual(rows[paths[0]].remote, UncDirectory(r'\\server\share'))
+
+    def test_shared_index(self):
+        table = get_table()
+        self.assertIs(get_path_index(table), get_path_index(table))
+
+
+class TestQueryPaths(TestCase):
+    def test_get_connection_for_path(self):
+        backend = SimulatorBackend()
+        backend.add_connection(r'\\server\share', 'Z:')
+        backend.add_connection(r'\\server\other')
+        with use_backend(backend):
+            mount = query.get_connection_for_path(r'\\server\share\a.txt')
+            self.assertIsInstance(mount, UncDirectoryMount)
+            self.assertEqual(mount.disk_drive, DiskDrive('Z:'))
+
+            connections = query.get_connections_for_paths([r'\\server\other\a', r'\\x\y'])
+            self.assertIsInstance(connections[r'\\server\other\a'], UncDirectoryConnection)
+            self.assertIsNone(connections[r'\\x\y'])
+        self.assertEqual(backend.commands, ['NET USE', 'NET USE'])
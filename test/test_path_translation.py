@@ -0,0 +1,59 @@
+import time
+from unittest import TestCase
+
+from win_unc.backends import SimulatorBackend
+from win_unc.internal import current_state
+from win_unc.path_translation import PathTranslator
+
+from connection_test_utils import use_test_backend
+
+
+class TestPathTranslator(TestCase):
+    def setUp(self):
+        current_state.invalidate_net_use_table()
+        self.backend = SimulatorBackend()
+        self.backend.add_connection(r'\\server\share', 'Z:')
+        self.backend.add_connection(r'\\server\share\nested', 'Y:')
+        self.backend.add_connection(r'\\server\deviceless')
+        use_test_backend(self, self.backend)
+        self.translator = PathTranslator(max_age=60)
+
+    def test_to_drive_path(self):
+        to_drive_path = self.translator.to_drive_path
+        self.assertEqual(to_drive_path(r'\\server\share\Dir\File.txt'), r'Z:\Dir\File.txt')
+        self.assertEqual(to_drive_path(r'\\SERVER\Share'), 'Z:\\')
+        self.assertEqual(to_drive_path('//server/share/a/'), 'Z:\\a\\')
+        self.assertEqual(to_drive_path(r'\\server\share\nested\a'), r'Y:\a')
+        self.assertIsNone(to_drive_path(r'\\server\deviceless\a'))
+        self.assertIsNone(to_drive_path(r'\\server\other'))
+        self.assertIsNone(to_drive_path(r'Z:\a'))
+
+    def test_to_unc_path(self):
+        to_unc_path = self.translator.to_unc_path
+        self.assertEqual(to_unc_path(r'z:\Dir\File.txt'), r'\\server\share\Dir\File.txt')
+        self.assertEqual(to_unc_path('Z:\\'), r'\\server\share')
+        self.assertEqual(to_unc_path('Y:'), r'\\server\share\nested')
+        self.assertIsNone(to_unc_path(r'C:\a'))
+        self.assertIsNone(to_unc_path(r'\\server\share'))
+
+    def test_streams(self):
+        paths = (r'\\server\share\{0}'.format(n) for n in range(1000))
+        drive_paths = list(self.translator.to_drive_paths(paths))
+        self.assertEqual(drive_paths[-1], r'Z:\999')
+        self.assertEqual(list(self.translator.to_unc_paths(drive_paths + [r'C:\a']))[-2:],
+                         [r'\\server\share\999', r'C:\a'])
+        self.assertEqual(self.backend.commands, ['NET USE'])
+
+    def test_refreshes_when_snapshot_changes(self):
+        translator = PathTranslator(max_age=0.05)
+        self.assertIsNone(translator.to_unc_path(r'X:\a'))
+        self.backend.add_connection(r'\\server\new', 'X:')
+        self.assertIsNone(translator.to_unc_path(r'X:\a'))
+        time.sleep(0.1)
+        self.assertEqual(translator.to_unc_path(r'X:\a'), r'\\server\new\a')
+
+    def test_refresh(self):
+        self.translator.to_unc_path(r'X:\a')
+        self.backend.add_connection(r'\\server\new', 'X:')
+        self.translator.refresh()
+        self.assertEqual(self.translator.to_unc_path(r'X:\a'), r'\\server\new\a')
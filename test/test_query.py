@@ -0,0 +1,46 @@
+import asyncio
+from unittest import TestCase
+
+from win_unc import async_query, query
+from win_unc.async_connecting import AsyncUncDirectoryMount
+from win_unc.backends import SimulatorBackend
+from win_unc.connecting import UncDirectoryConnection, UncDirectoryMount
+from win_unc.disk_drive import DiskDrive
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+class TestBatchQueries(TestCase):
+    def setUp(self):
+        self.backend = SimulatorBackend()
+        self.backend.add_connection(r'\\server\mounted', 'Y:')
+        self.backend.add_connection(r'\\server\connected')
+        use_test_backend(self, self.backend)
+
+    def test_unc_directories(self):
+        uncs = [UncDirectory(r'\\server\mounted'), UncDirectory(r'\\SERVER\connected\\'),
+                UncDirectory(r'\\server\missing')]
+        connections = query.get_connections_for_unc_directories(uncs)
+
+        self.assertEqual(list(connections), uncs)
+        self.assertIsInstance(connections[uncs[0]], UncDirectoryMount)
+        self.assertEqual(connections[uncs[0]].disk_drive, DiskDrive('Y:'))
+        self.assertIsInstance(connections[uncs[1]], UncDirectoryConnection)
+        self.assertEqual(connections[uncs[1]].unc, uncs[1])
+        self.assertIsNone(connections[uncs[2]])
+        self.assertEqual(self.backend.commands, ['NET USE'])
+
+    def test_disk_drives(self):
+        drives = [DiskDrive('Y:'), DiskDrive('Z:')]
+        connections = query.get_connections_for_disk_drives(drives)
+
+        self.assertEqual(connections[drives[0]].unc, UncDirectory(r'\\server\mounted'))
+        self.assertIsNone(connections[drives[1]])
+        self.assertEqual(self.backend.commands, ['NET USE'])
+
+    def test_async(self):
+        drives = [DiskDrive('Y:'), DiskDrive('Z:')]
+        connections = asyncio.run(async_query.get_connections_for_disk_drives(drives))
+        self.assertIsInstance(connections[drives[0]], AsyncUncDirectoryMount)
+        self.assertIsNone(connections[drives[1]])
@@ -0,0 +1,136 @@
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from unittest import TestCase
+
+from win_unc import __main__ as cli
+from win_unc.backends import SimulatorBackend
+from win_unc.connecting import UncDirectoryConnection, UncDirectoryMount
+from win_unc.disk_drive import DiskDrive
+from win_unc.internal import current_state
+from win_unc.reconciling import (
+    CONNECT, DISCONNECT, KEEP, REMAP, plan_reconciliation, read_manifest, reconcile)
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import use_test_backend
+
+
+def mount(path, drive):
+    return UncDirectoryMount(UncDirectory(path), DiskDrive(drive))
+
+
+class ReconcilingTestCase(TestCase):
+    def setUp(self):
+        current_state.invalidate_net_use_table()
+        self.backend = SimulatorBackend()
+        self.backend.add_connection(r'\\server\keep', 'X:')
+        self.backend.add_connection(r'\\server\old', 'Y:')
+        self.backend.add_connection(r'\\server\extra')
+        use_test_backend(self, self.backend)
+
+    def get_changes(self):
+        return [command for command in self.backend.commands if command != 'NET USE']
+
+
+class TestReconcile(ReconcilingTestCase):
+    def get_desired(self):
+        return [mount(r'\\server\keep', 'X:'), mount(r'\\server\new', 'Y:'),
+                (UncDirectory(r'\\server\deviceless'), None), mount(r'\\server\z', 'Z:')]
+
+    def test_plan(self):
+        plan = plan_reconciliation(self.get_desired())
+        self.assertEqual([planned.action for planned in plan], [KEEP, REMAP, CONNECT, CONNECT])
+        self.assertEqual(plan[1].previous.unc, UncDirectory(r'\\server\old'))
+        self.assertIsInstance(plan[2].connection, UncDirectoryConnection)
+        self.assertEqual(self.backend.commands, ['NET USE'])
+
+    def test_prune(self):
+        plan = plan_reconciliation(self.get_desired(), prune=True)
+        self.assertEqual([planned.action for planned in plan][-1], DISCONNECT)
+        self.assertEqual(plan[-1].connection.unc, UncDirectory(r'\\server\extra'))
+        self.assertEqual(len(plan), 5)
+
+    def test_reconcile(self):
+        results = reconcile(self.get_desired(), prune=True, max_workers=2)
+        self.assertEqual([result.changed for result in results], [False, True, True, True, True])
+        self.assertEqual([result.error for result in results], [None] * 5)
+        self.assertEqual(sorted(self.backend.get_connections(), key=lambda c: c[1]),
+                         [(None, r'\\server\deviceless', 'OK'), ('X:', r'\\server\keep', 'OK'),
+                          ('Y:', r'\\server\new', 'OK'), ('Z:', r'\\server\z', 'OK')])
+        self.assertEqual(self.backend.commands.count('NET USE'), 1)
+        self.assertEqual(len(self.get_changes()), 5)
+
+        self.assertEqual([result.planned.action for result in reconcile(self.get_desired())],
+                         [KEEP] * 4)
+
+    def test_dry_run(self):
+        results = reconcile(self.get_desired(), prune=True, dry_run=True)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.get_changes(), [])
+
+    def test_errors_are_returned(self):
+        results = reconcile([mount(r'\\server\c', 'C:')])
+        self.assertIsNotNone(results[0].error)
+
+    def test_unavailable_connection_is_repaired(self):
+        self.backend.add_connection(r'\\server\broken', 'W:', 'Unavailable')
+        plan = plan_reconciliation([mount(r'\\server\broken', 'W:')], prune=True)
+        self.assertEqual(plan[0].action, REMAP)
+        self.assertEqual(plan[0].previous.unc, UncDirectory(r'\\server\broken'))
+        self.assertNotIn(r'\\server\broken',
+                         [planned.connection.get_path() for planned in plan[1:]])
+
+        results = reconcile([mount(r'\\server\broken', 'W:')])
+        self.assertEqual(results[0].error, None)
+        self.assertIn(('W:', r'\\server\broken', 'OK'), self.backend.get_connections())
+
+    def test_conflicting_drives(self):
+        with self.assertRaises(ValueError):
+            plan_reconciliation([mount(r'\\server\a', 'Z:'), mount(r'\\server\b', 'Z:')])
+
+
+class TestManifest(ReconcilingTestCase):
+    MANIFEST = {'mounts': [{'path': r'\\server\keep', 'drive': 'X:'},
+                           {'path': r'\\server\new', 'drive': 'Y:', 'username': 'user',
+                            'password': 'secret', 'persistent': True},
+                           {'path': r'\\server\deviceless'}]}
+
+    def write_manifest(self, manifest=None):
+        handle, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w') as file:
+            json.dump(manifest or self.MANIFEST, file)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_read_manifest(self):
+        connections = read_manifest(io.StringIO(json.dumps(self.MANIFEST)))
+        self.assertEqual(connections[1].disk_drive, DiskDrive('Y:'))
+        self.assertEqual(connections[1].get_username(), 'user')
+        self.assertTrue(connections[1].persistent)
+        self.assertIsNone(connections[2].disk_drive)
+
+    def test_apply(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(cli.main(['apply', self.write_manifest(), '--prune']), 0)
+        self.assertNotIn('secret', output.getvalue())
+        self.assertEqual(len(output.getvalue().splitlines()), 4)
+        self.assertIn(('Y:', r'\\server\new', 'OK'), self.backend.get_connections())
+
+    def test_apply_failure_hides_password(self):
+        manifest = {'mounts': [{'path': r'\\server\new', 'drive': 'C:', 'username': 'user',
+                                'password': 'secret'}]}
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(cli.main(['apply', self.write_manifest(manifest)]), 1)
+        self.assertNotIn('secret', output.getvalue())
+        self.assertIn('DeviceInUseError (system error 85)', output.getvalue())
+
+    def test_apply_dry_run(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(cli.main(['apply', self.write_manifest(), '--dry-run']), 0)
+        self.assertIn('planned', output.getvalue())
+        self.assertEqual(self.get_changes(), [])
@@ -0,0 +1,89 @@
+import sys
+import time
+from unittest import TestCase
+
+from win_unc.errors import ShellCommandError, ShellCommandTimeoutError
+from win_unc.internal.shell import format_command, iter_output_lines, run
+
+
+def python_command(code):
+    return '"{python}" -c "{code}"'.format(python=sys.executable, code=code)
+
+
+class TestRun(TestCase):
+    def test_output(self):
+        stdout, stderr = run(python_command("print('out')"))
+        self.assertEqual(stdout.strip(), 'out')
+        self.assertEqual(stderr, '')
+
+    def test_error_code(self):
+        with self.assertRaises(ShellCommandError) as context:
+            run(python_command('import sys; sys.exit(3)'))
+        self.assertEqual(context.exception.error_code, 3)
+
+    def test_argument_list(self):
+        args = ['a b', 'c"d', 'e&f', '%PATH%', 'g\\']
+        stdout, _ = run([sys.executable, '-c', 'import sys; print(sys.argv[1:])'] + args)
+        self.assertEqual(stdout.strip(), repr(args))
+
+    def test_argument_list_error_code(self):
+        with self.assertRaises(ShellCommandError) as context:
+            run([sys.executable, '-c', 'import sys; sys.exit(3)'])
+        self.assertEqual(context.exception.error_code, 3)
+        self.assertIsInstance(context.exception.command, str)
+
+    def test_answers_prompts(self):
+        stdout, _ = run(python_command("print(repr(input()))"))
+        self.assertEqual(stdout.strip(), "''")
+
+    def test_large_output_does_not_block(self):
+        stdout, _ = run(python_command("print('x' * 1000000)"), timeout=30)
+        self.assertEqual(len(stdout.strip()), 1000000)
+
+    def test_output_is_bounded(self):
+        stdout, _ = run(python_command("print('x' * 100000)"), timeout=30, max_output_size=10)
+        self.assertEqual(stdout, 'x' * 10)
+
+    def test_timeout(self):
+        start = time.time()
+        with self.assertRaises(ShellCommandTimeoutError) as context:
+            run(python_command('import time; time.sleep(30)'), timeout=0.5)
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual(context.exception.timeout, 0.5)
+
+
+class TestFormatCommand(TestCase):
+    def test_list(self):
+        self.assertEqual(format_command(['NET', 'USE', 'Z:', r'\\a\b c', 'x"y']),
+                         r'NET USE Z: "\\a\b c" x\"y')
+
+    def test_string(self):
+        self.assertEqual(format_command('NET USE'), 'NET USE')
+
+
+class TestIterOutputLines(TestCase):
+    def test_lines(self):
+        lines = list(iter_output_lines(python_command("print('a'); print('b')")))
+        self.assertEqual(lines, ['a', 'b'])
+
+    def test_error_code(self):
+        with self.assertRaises(ShellCommandError):
+            list(iter_output_lines(python_command("print('a'); import sys; sys.exit(3)")))
+
+    def test_argument_list(self):
+        lines = list(iter_output_lines([sys.executable, '-c', "print('a'); print('b')"]))
+        self.assertEqual(lines, ['a', 'b'])
+
+    def test_stop_early(self):
+        start = time.time()
+        lines = iter_output_lines(
+            python_command("import time; print('a', flush=True); time.sleep(30)"))
+        self.assertEqual(next(lines), 'a')
+        lines.close()
+        self.assertLess(time.time() - start, 10)
+
+    def test_timeout(self):
+        start = time.time()
+        with self.assertRaises(ShellCommandTimeoutError):
+            list(iter_output_lines(python_command('import time; time.sleep(30)'), timeout=0.5))
+        self.assertLess(time.time() - start, 10)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from threading import Thread
+from unittest import TestCase
+
+from win_unc.internal.singleflight import SingleFlight
+
+
+class TestSingleFlight(TestCase):
+    def run_threads(self, count, target):
+        threads = [Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_coalesces_threads(self):
+        flight = SingleFlight()
+        results = []
+        def slow():
+            time.sleep(0.2)
+            return object()
+
+        self.run_threads(10, lambda: results.append(flight.do('key', slow)))
+        self.assertEqual(len(set(map(id, results))), 1)
+        self.assertEqual(flight.get_stats(), {'calls': 1, 'coalesced': 9})
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+        errors = []
+        def fail():
+            time.sleep(0.2)
+            raise ValueError()
+
+        def call():
+            try:
+                flight.do('key', fail)
+            except ValueError as error:
+                errors.append(error)
+
+        self.run_threads(5, call)
+        self.assertEqual(len(errors), 5)
+
+    def test_interruptions_are_not_shared(self):
+        flight = SingleFlight()
+        results = []
+        def interrupt_first_call():
+            time.sleep(0.2)
+            if not results:
+                results.append(None)
+                raise KeyboardInterrupt()
+            return 'result'
+
+        def call():
+            try:
+                results.append(flight.do('key', interrupt_first_call))
+            except KeyboardInterrupt:
+                results.append('interrupted')
+
+        self.run_threads(5, call)
+        self.assertEqual(sorted(results[1:]), ['interrupted'] + ['result'] * 4)
+        self.assertEqual(flight.get_stats(), {'calls': 2, 'coalesced': 7})
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+        self.assertEqual(flight.do('key', lambda: 2), 2)
+        self.assertEqual(flight.get_stats(), {'calls': 2, 'coalesced': 0})
+
+    def test_different_keys(self):
+        flight = SingleFlight()
+        self.run_threads(2, lambda: flight.do(object(), lambda: time.sleep(0.1)))
+        self.assertEqual(flight.get_stats()['calls'], 2)
+
+    def test_coalesces_tasks(self):
+        flight = SingleFlight()
+        async def slow():
+            await asyncio.sleep(0.1)
+            return object()
+
+        async def call_many():
+            return await asyncio.gather(*[flight.do_async('key', slow) for _ in range(10)])
+
+        results = asyncio.run(call_many())
+        self.assertEqual(len(set(map(id, results))), 1)
+        self.assertEqual(flight.get_stats(), {'calls': 1, 'coalesced': 9})
+
+    def test_cancelling_a_waiter(self):
+        flight = SingleFlight()
+        async def slow():
+            await asyncio.sleep(0.1)
+            return 'done'
+
+        async def cancel_one():
+            first = asyncio.ensure_future(flight.do_async('key', slow))
+            second = asyncio.ensure_future(flight.do_async('key', slow))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(cancel_one()), 'done')
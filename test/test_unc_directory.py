@@ -59,6 +59,11 @@ class TestUncDirectory(TestCase):
 
         self.assertNotEqual(UncDirectory(r'\\path'), 'somestring')
 
+    def test_hash(self):
+        self.assertEqual(hash(UncDirectory(r'\\A\b')), hash(UncDirectory(r'\\a\B')))
+        self.assertEqual(hash(UncDirectory(r'\\a\IPC$')), hash(UncDirectory(r'\\a')))
+        self.assertEqual(len({UncDirectory(r'\\A'), UncDirectory(r'\\a')}), 1)
+
     def test_get_normalized_path(self):
         self.assertEqual(UncDirectory(r'\\abc').get_normalized_path(), r'\\abc')
         self.assertEqual(UncDirectory(r'\\ABC').get_normalized_path(), r'\\abc')
@@ -68,6 +73,11 @@ class TestUncDirectory(TestCase):
         self.assertEqual(UncDirectory(r'\\abc\IPC$').get_normalized_path(), r'\\abc')
         self.assertEqual(UncDirectory(r'\\abc\ipc$').get_normalized_path(), r'\\abc')
 
+    def test_get_host(self):
+        self.assertEqual(UncDirectory(r'\\abc').get_host(), 'abc')
+        self.assertEqual(UncDirectory(r'\\ABC\def\ghi').get_host(), 'abc')
+        self.assertEqual(UncDirectory(r'\\10.0.0.1\IPC$').get_host(), '10.0.0.1')
+
     def test_get_auth_path(self):
         self.assertEqual(UncDirectory(r'\\path').get_auth_path(), r'\\path')
 
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from unittest import TestCase
+
+from win_unc.backends import SimulatorBackend
+from win_unc.disk_drive import DiskDrive
+from win_unc.unc_directory import UncDirectory
+from win_unc.watching import (
+    ConnectionAdded, ConnectionRemoved, ConnectionStatusChanged, ConnectionWatcher)
+
+from connection_test_utils import use_test_backend
+
+
+class TestConnectionWatcher(TestCase):
+    def setUp(self):
+        self.backend = SimulatorBackend()
+        self.backend.add_connection(r'\\server\a', 'A:')
+        self.backend.add_connection(r'\\server\b')
+        use_test_backend(self, self.backend)
+
+    def change_connections(self):
+        self.backend.add_connection(r'\\server\a', 'A:', status='Disconnected')
+        self.backend.run(r'NET USE "\\server\b" /DELETE')
+        self.backend.add_connection(r'\\server\c', 'C:')
+
+    def assert_changes(self, events):
+        self.assertEqual([type(event) for event in events],
+                         [ConnectionRemoved, ConnectionAdded, ConnectionStatusChanged])
+        removed, added, changed = events
+        self.assertEqual(removed.connection.unc, UncDirectory(r'\\server\b'))
+        self.assertIsNone(removed.connection.disk_drive)
+        self.assertEqual(added.connection.disk_drive, DiskDrive('C:'))
+        self.assertEqual(added.status, 'ok')
+        self.assertEqual(changed.connection.unc, UncDirectory(r'\\server\a'))
+        self.assertEqual((changed.old_status, changed.new_status), ('ok', 'disconnected'))
+
+    def test_first_poll_has_no_changes(self):
+        watcher = ConnectionWatcher()
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(watcher.poll(), [])
+
+    def test_poll(self):
+        watcher = ConnectionWatcher()
+        watcher.poll()
+        self.change_connections()
+        self.assert_changes(watcher.poll())
+        self.assertEqual(watcher.poll(), [])
+
+    def test_callbacks(self):
+        events = []
+        watcher = ConnectionWatcher()
+        watcher.add_callback(events.append)
+        watcher.poll()
+        self.change_connections()
+        watcher.poll()
+        self.assert_changes(events)
+
+    def test_background_thread(self):
+        events = []
+        watcher = ConnectionWatcher(interval=0.01)
+        watcher.add_callback(events.append)
+        # The changes are made before the watcher starts, so that one poll finds all of them.
+        watcher.poll()
+        self.change_connections()
+        with watcher:
+            deadline = time.time() + 5
+            while len(events) < 3 and time.time() < deadline:
+                time.sleep(0.01)
+        self.assert_changes(events)
+
+    def test_async_iterator(self):
+        watcher = ConnectionWatcher(interval=0.01)
+
+        async def collect():
+            events = []
+            async for event in watcher:
+                events.append(event)
+                if len(events) == 3:
+                    return events
+
+        async def main():
+            await watcher.poll_async()
+            self.change_connections()
+            return await collect()
+
+        self.assert_changes(asyncio.run(main()))
@@ -0,0 +1,23 @@
+from win_unc.backends import WNetBackend, use_backend
+from win_unc.connecting import UncDirectoryConnection
+from win_unc.errors import ConnectionNotFoundError
+from win_unc.unc_directory import UncDirectory
+
+from connection_test_utils import LocalHostConnectionTest
+
+
+class TestWNetBackend(LocalHostConnectionTest):
+    def test_connect(self):
+        with use_backend(WNetBackend()):
+            conn = UncDirectoryConnection(UncDirectory(self.LOCALHOST_UNC))
+            conn.connect()
+            self.assertTrue(self.localhost_is_connected())
+            self.assertTrue(conn.is_connected())
+
+            conn.disconnect()
+            self.assertFalse(self.localhost_is_connected())
+            self.assertRaises(ConnectionNotFoundError, conn.disconnect)
+
+    def test_other_commands(self):
+        stdout, _ = WNetBackend().run('echo hello')
+        self.assertEqual(stdout.strip(), 'hello')
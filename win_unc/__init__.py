@@ -2,8 +2,10 @@
 Exports version information for this library and the most commonly used classes and functions.
 """
 
+from win_unc.async_connecting import AsyncUncDirectoryConnection, AsyncUncDirectoryMount
 from win_unc.connecting import UncDirectoryConnection, UncDirectoryMount
 from win_unc.disk_drive import DiskDrive
+from win_unc.instrumentation import get_metrics
 from win_unc.unc_credentials import UncCredentials
 from win_unc.unc_directory import UncDirectory
 
@@ -11,8 +13,11 @@ from win_unc.unc_directory import UncDirectory
 __version__ = '0.6.1'
 VERSION = tuple(map(int, __version__.split('.')))
 
-__all__ = ['UncDirectoryConnection',
+__all__ = ['AsyncUncDirectoryConnection',
+           'AsyncUncDirectoryMount',
+           'UncDirectoryConnection',
            'UncDirectoryMount',
            'DiskDrive',
            'UncCredentials',
-           'UncDirectory']
+           'UncDirectory',
+           'get_metrics']
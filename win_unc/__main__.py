@@ -0,0 +1,87 @@
+"""
+Command-line interface for win_unc.
+
+Usage::
+
+    > python -m win_unc apply manifest.json [--prune] [--dry-run] [--max-workers N]
+
+`apply` connects and disconnects UNC directories until the system matches the manifest (see
+`win_unc.reconciling.read_manifest` for its format).
+"""
+
+import argparse
+import sys
+
+from win_unc.connecting import DEFAULT_MAX_WORKERS
+from win_unc.errors import NetCommandError, ShellCommandError
+from win_unc.reconciling import KEEP, apply_plan, plan_reconciliation, read_manifest
+
+
+def apply(args):
+    with open(args.manifest) as manifest:
+        desired = read_manifest(manifest)
+
+    results = apply_plan(plan_reconciliation(desired, args.prune), args.max_workers, args.dry_run)
+    for result in results:
+        print(format_result(result, args.dry_run))
+    return 1 if any(result.error for result in results) else 0
+
+
+def format_result(result, dry_run=False):
+    planned = result.planned
+    description = '{action:<11}{connection}'.format(
+        action=planned.action, connection=format_connection(planned.connection))
+    if planned.previous is not None:
+        description += ' (replacing {0})'.format(format_connection(planned.previous))
+
+    if result.error is not None:
+        return '{0}: failed: {1}'.format(description, format_error(result.error))
+    elif dry_run and planned.action != KEEP:
+        return '{0}: planned'.format(description)
+    else:
+        return description
+
+
+def format_error(error):
+    # Errors from shell commands are described without their command, which has the password.
+    if isinstance(error, NetCommandError):
+        return '{name} (system error {number}): {message}'.format(
+            name=type(error).__name__, number=error.system_error, message=error.message)
+    elif isinstance(error, ShellCommandError):
+        return '{name} (error code {code})'.format(name=type(error).__name__,
+                                                   code=error.error_code)
+    else:
+        return '{name}: {error}'.format(name=type(error).__name__, error=error)
+
+
+def format_connection(conn):
+    # Only the path is shown so that passwords are never printed.
+    if conn.disk_drive:
+        return '{drive} {path}'.format(drive=conn.disk_drive, path=conn.get_path())
+    else:
+        return conn.get_path()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m win_unc',
+                                     description='Manages UNC connections on Windows.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    apply_parser = commands.add_parser(
+        'apply', help='connect and disconnect UNC directories to match a JSON manifest')
+    apply_parser.add_argument('manifest', help='path to the JSON manifest')
+    apply_parser.add_argument('--prune', action='store_true',
+                              help='also disconnect connections that are not in the manifest')
+    apply_parser.add_argument('--dry-run', action='store_true',
+                              help='print the plan without running it')
+    apply_parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                              help='maximum number of commands to run at the same time')
+    apply_parser.set_defaults(func=apply)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
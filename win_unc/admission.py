@@ -0,0 +1,261 @@
+"""
+Contains admission control that keeps connecting and disconnecting from overwhelming a server.
+Commands for the same server host wait in one first-in, first-out queue and are let through while
+fewer than a maximum number of them are running and, if a rate is set, while a token bucket has
+tokens. Threads and `asyncio` tasks share the same queues.
+
+The limits apply within one process.
+"""
+
+import asyncio
+from collections import deque, namedtuple
+from contextlib import asynccontextmanager, contextmanager
+from threading import Event, Lock
+from time import monotonic
+
+
+# By default commands are let through at once, so admission only queues them once limits are set.
+DEFAULT_MAX_CONCURRENT = None
+DEFAULT_RATE = None
+DEFAULT_BURST = 1
+
+# The limits for one server host.
+# `max_concurrent` is the number of commands that may run at the same time or `None` for no limit.
+# `rate` is the number of commands that may start per second or `None` for no limit.
+# `burst` is the number of commands that may start at once after an idle period when `rate` is set.
+AdmissionLimits = namedtuple('AdmissionLimits', ['max_concurrent', 'rate', 'burst'])
+
+# The admission state of one server host.
+# `host` is the lowercase host name of the server.
+# `running` is the number of commands that have been admitted and have not finished.
+# `waiting` is the number of commands in the queue.
+# `tokens` is the number of commands that may start now according to the rate limit, or `None` if
+#          there is no rate limit.
+AdmissionState = namedtuple('AdmissionState', ['host', 'running', 'waiting', 'tokens'])
+
+
+class _Waiter(object):
+    """
+    A thread or task in a host's queue. `wake` may be called from any thread.
+    """
+
+    __slots__ = ('admitted', 'event', 'loop')
+
+    def __init__(self, loop=None):
+        self.admitted = False
+        self.event = asyncio.Event() if loop else Event()
+        self.loop = loop
+
+    def wake(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.event.set)
+        else:
+            self.event.set()
+
+
+class _Gate(object):
+    __slots__ = ('limits', 'queue', 'running', 'tokens', 'updated_at')
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.queue = deque()
+        self.running = 0
+        self.tokens = limits.burst
+        self.updated_at = monotonic()
+
+
+class AdmissionController(object):
+    """
+    Admits commands for each server host in the order they arrive, within that host's
+    `AdmissionLimits`.
+    """
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, rate=DEFAULT_RATE,
+                 burst=DEFAULT_BURST):
+        """
+        The arguments are the default `AdmissionLimits` for every host (see `set_limits`).
+        """
+        self.default_limits = _get_limits(max_concurrent, rate, burst)
+        self._limits = {}
+        self._gates = {}
+        self._lock = Lock()
+
+    def set_limits(self, host, max_concurrent=DEFAULT_MAX_CONCURRENT, rate=DEFAULT_RATE,
+                   burst=DEFAULT_BURST):
+        """
+        Sets the `AdmissionLimits` for `host` in place of the defaults. Commands that have already
+        been admitted are not affected. This raises a `ValueError` if `max_concurrent` is less than
+        `1`, `rate` is not positive or `burst` is less than `1`.
+        """
+        limits = _get_limits(max_concurrent, rate, burst)
+        with self._lock:
+            self._limits[host.lower()] = limits
+            gate = self._gates.get(host.lower())
+            if gate is not None:
+                self._refill(gate)
+                gate.limits = limits
+                gate.tokens = min(gate.tokens, burst)
+                self._admit_waiters(gate)
+
+    def get_limits(self, host):
+        """
+        Returns the `AdmissionLimits` for `host`.
+        """
+        with self._lock:
+            return self._limits.get(host.lower(), self.default_limits)
+
+    @contextmanager
+    def admit(self, host):
+        """
+        A context manager that blocks until a command for `host` may run and lets the next one in
+        when it exits.
+        """
+        gate, waiter = self._enqueue(host, _Waiter())
+        try:
+            while True:
+                with self._lock:
+                    delay = self._admit_waiters(gate, waiter)
+                    if waiter.admitted:
+                        break
+                    waiter.event.clear()
+                waiter.event.wait(delay)
+        except BaseException:
+            self._leave(gate, waiter)
+            raise
+        try:
+            yield
+        finally:
+            self._release(gate)
+
+    @asynccontextmanager
+    async def admit_async(self, host):
+        """
+        The same as `admit`, except that the event loop is not blocked while waiting.
+        """
+        gate, waiter = self._enqueue(host, _Waiter(asyncio.get_running_loop()))
+        try:
+            while True:
+                with self._lock:
+                    delay = self._admit_waiters(gate, waiter)
+                    if waiter.admitted:
+                        break
+                    waiter.event.clear()
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._leave(gate, waiter)
+            raise
+        try:
+            yield
+        finally:
+            self._release(gate)
+
+    def get_states(self):
+        """
+        Returns a dictionary mapping each host that commands have been admitted for to its
+        `AdmissionState`.
+        """
+        with self._lock:
+            states = {}
+            for host, gate in self._gates.items():
+                self._refill(gate)
+                tokens = gate.tokens if gate.limits.rate is not None else None
+                states[host] = AdmissionState(host, gate.running, len(gate.queue), tokens)
+            return states
+
+    def _enqueue(self, host, waiter):
+        with self._lock:
+            host = host.lower()
+            gate = self._gates.get(host)
+            if gate is None:
+                gate = self._gates[host] = _Gate(self._limits.get(host, self.default_limits))
+            gate.queue.append(waiter)
+        return gate, waiter
+
+    def _leave(self, gate, waiter):
+        """
+        Takes `waiter` out of the queue after it stopped waiting, giving its place to the next
+        waiter if it had been admitted.
+        """
+        with self._lock:
+            if waiter.admitted:
+                gate.running -= 1
+            else:
+                gate.queue.remove(waiter)
+            self._admit_waiters(gate)
+
+    def _release(self, gate):
+        with self._lock:
+            gate.running -= 1
+            self._admit_waiters(gate)
+
+    def _admit_waiters(self, gate, current=None):
+        """
+        Admits waiters from the front of `gate`'s queue while its limits allow. If `current`, the
+        calling waiter, is still waiting, returns the number of seconds it must wait for the rate
+        limit or `None` if it must wait until it is woken.
+        The waiter at the front of the queue is woken when only the rate limit holds it back, so
+        that it waits for the next token itself.
+        """
+        limits = gate.limits
+        while gate.queue:
+            if limits.max_concurrent is not None and gate.running >= limits.max_concurrent:
+                return None
+            if limits.rate is not None:
+                self._refill(gate)
+                if gate.tokens < 1:
+                    if gate.queue[0] is not current:
+                        gate.queue[0].wake()
+                        return None
+                    return (1 - gate.tokens) / limits.rate
+                gate.tokens -= 1
+            waiter = gate.queue.popleft()
+            waiter.admitted = True
+            gate.running += 1
+            if waiter is not current:
+                waiter.wake()
+        return None
+
+    @staticmethod
+    def _refill(gate):
+        now = monotonic()
+        if gate.limits.rate is not None:
+            gate.tokens = min(gate.limits.burst,
+                              gate.tokens + (now - gate.updated_at) * gate.limits.rate)
+        gate.updated_at = now
+
+
+def _get_limits(max_concurrent, rate, burst):
+    """
+    Returns `AdmissionLimits` with the given values, or raises a `ValueError` if no command could
+    ever be admitted with them.
+    """
+    if max_concurrent is not None and max_concurrent < 1:
+        raise ValueError('max_concurrent must be None or at least 1, not {0!r}.'.format(
+            max_concurrent))
+    if rate is not None and not rate > 0:
+        raise ValueError('rate must be None or positive, not {0!r}.'.format(rate))
+    if not burst >= 1:
+        raise ValueError('burst must be at least 1, not {0!r}.'.format(burst))
+    return AdmissionLimits(max_concurrent, rate, burst)
+
+
+_controller = AdmissionController()
+
+
+def get_admission_controller():
+    """
+    Returns the process-wide `AdmissionController` that connecting and disconnecting go through.
+    """
+    return _controller
+
+
+def set_admission_controller(controller):
+    """
+    Replaces the process-wide `AdmissionController` with `controller`, e.g. to change the default
+    limits.
+    """
+    global _controller
+    _controller = controller
@@ -0,0 +1,176 @@
+"""
+Contains `asyncio` counterparts to the classes in `win_unc.connecting`. Every method that runs a
+shell command is a coroutine, so many connections can be made concurrently from one event loop.
+"""
+
+from win_unc.admission import get_admission_controller
+from win_unc.circuit_breaker import get_circuit_breaker
+from win_unc.connecting import (
+    UncDirectoryConnection, may_already_be_connected, must_retry_on_another_drive,
+    release_disk_drive, reserve_disk_drive)
+from win_unc.disk_drive import get_drive_letter_allocator
+from win_unc.errors import ConnectionNotFoundError, ShellCommandError
+from win_unc.instrumentation import CONNECT, DISCONNECT, run_command_async
+from win_unc.internal.current_state import (
+    get_current_net_use_table_async, invalidate_net_use_table)
+from win_unc.internal.loggers import no_logging
+from win_unc.internal.shell import format_command
+
+
+class AsyncUncDirectoryConnection(UncDirectoryConnection):
+    """
+    A `UncDirectoryConnection` whose `connect`, `disconnect`, `is_connected` and
+    `get_connection_status` methods are coroutines. Use it with `async with` instead of `with`.
+    """
+
+    async def connect(self):
+        """
+        Connects the UNC directory. If the comand fails, this will raise a `ShellCommandError`.
+        """
+        self.logger('Connecting the network UNC path "{path}".'.format(path=self.get_path()))
+        await self._connect_with_creds(self.get_username(), self.get_password())
+
+    async def disconnect(self):
+        """
+        Disconnects the UNC path. If the command fails, this will raise a `ShellCommandError`.
+        """
+        self.logger('Disconnecting the network UNC path "{path}".'.format(path=self.get_path()))
+        async with get_admission_controller().admit_async(self.unc.get_host()):
+            try:
+                await run_command_async(DISCONNECT, self._get_disconnection_command(),
+                                        self.logger, self.timeout)
+            finally:
+                invalidate_net_use_table()
+
+    async def is_connected(self, max_age=None, fresh=False):
+        """
+        Returns `True` if the system registers this `AsyncUncDirectoryConnection` as connected.
+        """
+        return await self.get_connection_status(max_age, fresh) in ['ok', 'disconnected']
+
+    async def get_connection_status(self, max_age=None, fresh=False):
+        """
+        Returns this `AsyncUncDirectoryConnection`'s status according to the system. See
+        `UncDirectoryConnection.get_connection_status` for the possible values.
+        """
+        return self._get_status_from_table(await get_current_net_use_table_async(max_age, fresh))
+
+    async def _connect_with_creds(self, username=None, password=None):
+        command = self._get_connection_command(username, password)
+        redacted_command = self._get_connection_command(username, '-----') if password else command
+        self.logger(format_command(redacted_command))
+        host = self.unc.get_host()
+        with get_circuit_breaker().guard(host):
+            async with get_admission_controller().admit_async(host):
+                try:
+                    await run_command_async(CONNECT, command, self.logger, self.timeout,
+                                            redacted_command)
+                finally:
+                    invalidate_net_use_table()
+
+    def __enter__(self):
+        raise TypeError('Use "async with" with {cls} objects.'.format(cls=self.__class__.__name__))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    async def __aenter__(self):
+        if self._must_check_before_connecting():
+            self._was_connected_before_enter = await self.is_connected()
+            if not self._was_connected_before_enter:
+                await self.connect()
+        else:
+            try:
+                await self.connect()
+                self._was_connected_before_enter = False
+            except ShellCommandError as error:
+                if not may_already_be_connected(error) or not await self.is_connected(fresh=True):
+                    raise
+                self._was_connected_before_enter = True
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            if self._was_connected_before_enter:
+                return
+            elif self.verify:
+                if await self.is_connected():
+                    await self.disconnect()
+            else:
+                try:
+                    await self.disconnect()
+                except ConnectionNotFoundError:
+                    pass
+                except ShellCommandError:
+                    if await self.is_connected(fresh=True):
+                        raise
+        finally:
+            self._was_connected_before_enter = None
+
+
+class AsyncUncDirectoryMount(AsyncUncDirectoryConnection):
+    """
+    An `AsyncUncDirectoryConnection` specifically for mounting UNC paths to a local drive letter.
+    """
+
+    def __init__(self, unc, disk_drive=None, persistent=False, logger=no_logging, timeout=None,
+                 verify=False):
+        """
+        Accepts the same arguments as `UncDirectoryMount`. If `disk_drive` is `None`, then an
+        available disk drive on the system will be automatically selected as a local mount point
+        when this `AsyncUncDirectoryMount` is mounted, or a `NoDrivesAvailableError` will be raised.
+        Until then, `disk_drive` is `None`. Selecting the drive probes the drives in use without
+        blocking the event loop (see `DriveLetterAllocator.refresh_async`).
+        """
+        self._auto_disk_drive = not disk_drive
+        self._reserved_disk_drive = False
+        super(AsyncUncDirectoryMount, self).__init__(unc, disk_drive, persistent, logger, timeout,
+                                                     verify)
+
+    async def connect(self):
+        attempts = 0
+        while True:
+            if self._auto_disk_drive:
+                await get_drive_letter_allocator().refresh_async()
+            reserve_disk_drive(self)
+            try:
+                await super(AsyncUncDirectoryMount, self).connect()
+                return
+            except BaseException as error:
+                release_disk_drive(self, failed=True)
+                if not must_retry_on_another_drive(self, error, attempts):
+                    raise
+                attempts += 1
+
+    def _must_check_before_connecting(self):
+        # The disk drive may not have been selected yet, but it is always mounted on one.
+        return self.verify
+
+    async def disconnect(self):
+        failed = True
+        try:
+            await super(AsyncUncDirectoryMount, self).disconnect()
+            failed = False
+        except ConnectionNotFoundError:
+            failed = False
+            raise
+        finally:
+            release_disk_drive(self, failed)
+
+    async def mount(self):
+        """
+        An alias for `AsyncUncDirectoryConnection`'s `connect` method.
+        """
+        await self.connect()
+
+    async def unmount(self):
+        """
+        An alias for `AsyncUncDirectoryConnection`'s `disconnect` method.
+        """
+        await self.disconnect()
+
+    async def is_mounted(self, max_age=None, fresh=False):
+        """
+        An alias for `AsyncUncDirectoryConnection`'s `is_connected` method.
+        """
+        return await self.is_connected(max_age, fresh)
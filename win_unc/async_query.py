@@ -0,0 +1,67 @@
+"""
+`asyncio` counterparts to the functions in `win_unc.query`. The returned objects are
+`AsyncUncDirectoryConnection` and `AsyncUncDirectoryMount` objects.
+"""
+
+from win_unc.async_connecting import AsyncUncDirectoryConnection, AsyncUncDirectoryMount
+from win_unc.internal.connection_rows import get_connection_for_row, get_first_connection
+from win_unc.internal.current_state import get_current_net_use_table_async
+
+
+__all__ = ['get_current_connections', 'get_connection_for_unc_directory', 'get_connection_for_disk_drive',
+           'get_connections_for_unc_directories', 'get_connections_for_disk_drives']
+
+
+async def get_current_connections(max_age=None, fresh=False):
+    """
+    Returns a list of `AsyncUncDirectoryConnection` or `AsyncUncDirectoryMount` objects. Each
+    object represents a connection or mount currently recognized by the system.
+    """
+    net_use = await get_current_net_use_table_async(max_age, fresh)
+    return [get_connection_for_row(row, AsyncUncDirectoryConnection, AsyncUncDirectoryMount)
+            for row in net_use.rows]
+
+
+async def get_connection_for_unc_directory(unc, max_age=None, fresh=False):
+    """
+    Returns an `AsyncUncDirectoryConnection` or `AsyncUncDirectoryMount` representing a connected
+    or mounted UNC directory that matches `unc` or `None` if no system connections or mounts
+    match `unc`.
+    `unc` is a `UncDirectory`.
+    """
+    net_use = await get_current_net_use_table_async(max_age, fresh)
+    return get_first_connection(net_use.get_matching_rows(remote=unc),
+                                AsyncUncDirectoryConnection, AsyncUncDirectoryMount)
+
+
+async def get_connection_for_disk_drive(disk_drive, max_age=None, fresh=False):
+    """
+    Returns an `AsyncUncDirectoryMount` representing a mounted UNC directory that matches
+    `disk_drive` or `None` if no system mounts match `disk_drive`.
+    `disk_drive` is a `DiskDrive`.
+    """
+    net_use = await get_current_net_use_table_async(max_age, fresh)
+    matching = net_use.get_matching_rows(local=disk_drive)
+    return AsyncUncDirectoryMount(matching[0]['remote'], matching[0]['local']) if matching else None
+
+
+async def get_connections_for_unc_directories(uncs, max_age=None, fresh=False):
+    """
+    Returns a dictionary mapping each `UncDirectory` in the iterable `uncs` to what
+    `get_connection_for_unc_directory` would return for it, all from one `NET USE` snapshot.
+    """
+    net_use = await get_current_net_use_table_async(max_age, fresh)
+    return {unc: get_first_connection(net_use.get_matching_rows(remote=unc),
+                                      AsyncUncDirectoryConnection, AsyncUncDirectoryMount)
+            for unc in uncs}
+
+
+async def get_connections_for_disk_drives(disk_drives, max_age=None, fresh=False):
+    """
+    Returns a dictionary mapping each `DiskDrive` in the iterable `disk_drives` to what
+    `get_connection_for_disk_drive` would return for it, all from one `NET USE` snapshot.
+    """
+    net_use = await get_current_net_use_table_async(max_age, fresh)
+    return {disk_drive: get_first_connection(net_use.get_matching_rows(local=disk_drive),
+                                             AsyncUncDirectoryConnection, AsyncUncDirectoryMount)
+            for disk_drive in disk_drives}
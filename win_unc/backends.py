@@ -0,0 +1,436 @@
+"""
+Backends that execute the Windows commands this library builds. Every connect, disconnect and
+query goes through the current backend, which is a `ShellBackend` unless `set_backend` is called.
+
+`WNetBackend` runs `NET USE` commands in this process with the Windows networking functions, so no
+process is started for connecting, disconnecting or querying.
+
+`SimulatorBackend` keeps an in-memory table of connections and answers `NET USE` commands the way
+Windows would, so the library can be tested, profiled and load-tested on any platform.
+"""
+
+import asyncio
+import os
+import random
+import re
+import string
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+try:
+    import win32api
+    win32api_available = True
+except ImportError:
+    win32api_available = False
+try:
+    import win32netcon
+    import win32wnet
+    win32wnet_available = True
+except ImportError:
+    win32wnet_available = False
+
+from win_unc.errors import ShellCommandError
+from win_unc.internal import async_shell, shell
+from win_unc.internal.loggers import no_logging
+from win_unc.internal.net_errors import format_system_error, get_command_error
+from win_unc.unc_directory import normalize_unc_path
+
+
+# The exit code of `NET` when it fails.
+NET_ERROR_CODE = 2
+
+NET_USE_HEADER = (
+    'New connections will be remembered.\r\n\r\n\r\n'
+    'Status       Local     Remote                    Network\r\n\r\n'
+    '-------------------------------------------------------------------------------\r\n')
+NET_USE_EMPTY = ('New connections will be remembered.\r\n\r\n'
+                 'There are no entries in the list.\r\n\r\n')
+COMMAND_COMPLETED = 'The command completed successfully.\r\n\r\n'
+
+
+class CommandBackend(object):
+    """
+    The interface for executing commands. Subclasses must implement `run` and
+    `get_used_drive_letters`. The other methods have default implementations based on `run`.
+    """
+
+    def run(self, command, logger=no_logging, timeout=None):
+        """
+        Executes `command`, a list of the program and its arguments or a command line string, and
+        returns its `stdout` and `stderr` as a tuple in that order. If the command fails, this must
+        raise a `ShellCommandError`. The arguments have the same meaning as for
+        `win_unc.internal.shell.run`.
+        """
+        raise NotImplementedError
+
+    def iter_output_lines(self, command, logger=no_logging, timeout=None):
+        """
+        Executes `command` and yields each line of its `stdout`.
+        """
+        stdout, _ = self.run(command, logger, timeout)
+        for line in stdout.splitlines():
+            yield line
+
+    async def run_async(self, command, logger=no_logging, timeout=None):
+        """
+        The same as `run`, except that the event loop is not blocked while `command` runs.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.run, command, logger, timeout)
+
+    def get_used_drive_letters(self):
+        """
+        Returns a set of the upper-case letters of every disk drive that is in use.
+        """
+        raise NotImplementedError
+
+
+class ShellBackend(CommandBackend):
+    """
+    Executes lists of arguments as new processes and command line strings in the Windows shell.
+    """
+
+    def run(self, command, logger=no_logging, timeout=None):
+        return shell.run(command, logger, timeout)
+
+    def iter_output_lines(self, command, logger=no_logging, timeout=None):
+        return shell.iter_output_lines(command, logger, timeout)
+
+    async def run_async(self, command, logger=no_logging, timeout=None):
+        return await async_shell.run_async(command, logger, timeout)
+
+    def get_used_drive_letters(self):
+        if win32api_available:
+            drives = win32api.GetLogicalDriveStrings().split('\000')
+            return {drive[0].upper() for drive in drives if drive}
+        else:
+            return {letter for letter in string.ascii_uppercase
+                    if os.path.isdir(letter + ':\\')}
+
+
+class WNetBackend(ShellBackend):
+    """
+    Executes `NET USE` commands in this process with the Windows networking functions
+    (`WNetAddConnection2`, `WNetCancelConnection2` and `WNetOpenEnum`) instead of starting
+    `net.exe` for each of them, and answers them the way `NET USE` would. Other commands are
+    executed as by `ShellBackend`. This backend requires the `pywin32` package.
+
+    The Windows networking functions cannot be interrupted, so `timeout` has no effect on
+    `NET USE` commands.
+    """
+
+    # The status `NET USE` shows for remembered connections that are not connected.
+    UNAVAILABLE = 'Unavailable'
+
+    def __init__(self):
+        if not win32wnet_available:
+            raise ImportError('WNetBackend requires the pywin32 package.')
+
+    def run(self, command, logger=no_logging, timeout=None):
+        args = split_command(command) if isinstance(command, str) else list(command)
+        if not is_net_use_command(args):
+            return ShellBackend.run(self, command, logger, timeout)
+
+        positional, options = parse_net_use_arguments(args[2:])
+        try:
+            if not positional:
+                return render_net_use_output(self._get_connections()), ''
+            elif '/DELETE' in options or '/D' in options:
+                force = '/YES' in options or '/Y' in options
+                win32wnet.WNetCancelConnection2(positional[0], 0, force)
+                return '{0} was deleted successfully.\r\n\r\n'.format(positional[0]), ''
+            else:
+                self._connect(positional, options)
+                return COMMAND_COMPLETED, ''
+        except win32wnet.error as error:
+            raise get_command_error(shell.format_command(command), NET_ERROR_CODE,
+                                    format_system_error(error.winerror, error.strerror))
+
+    def iter_output_lines(self, command, logger=no_logging, timeout=None):
+        return CommandBackend.iter_output_lines(self, command, logger, timeout)
+
+    async def run_async(self, command, logger=no_logging, timeout=None):
+        return await CommandBackend.run_async(self, command, logger, timeout)
+
+    @staticmethod
+    def _connect(positional, options):
+        local = positional[0].upper() if is_drive_argument(positional[0]) else None
+        remote_and_password = positional[1:] if local else positional
+
+        resource = win32wnet.NETRESOURCE()
+        resource.lpRemoteName = remote_and_password[0]
+        if local:
+            resource.lpLocalName = local
+            resource.dwType = win32netcon.RESOURCETYPE_DISK
+        else:
+            resource.dwType = win32netcon.RESOURCETYPE_ANY
+
+        password = remote_and_password[1] if len(remote_and_password) > 1 else None
+        username = options.get('/USER') or None
+        persistent = options.get('/PERSISTENT', '').upper() == 'YES'
+        flags = win32netcon.CONNECT_UPDATE_PROFILE if persistent else 0
+        win32wnet.WNetAddConnection2(resource, password, username, flags)
+
+    def _get_connections(self):
+        """
+        Returns a list of `(status, local, remote)` tuples for the current connections followed by
+        the remembered connections that are not connected.
+        """
+        connected = self._enumerate(win32netcon.RESOURCE_CONNECTED)
+        connections = [('OK', resource.lpLocalName or None, resource.lpRemoteName)
+                       for resource in connected]
+        drives = {resource.lpLocalName.upper() for resource in connected if resource.lpLocalName}
+        for resource in self._enumerate(win32netcon.RESOURCE_REMEMBERED):
+            if resource.lpLocalName and resource.lpLocalName.upper() not in drives:
+                connections.append((self.UNAVAILABLE, resource.lpLocalName,
+                                    resource.lpRemoteName))
+        return connections
+
+    @staticmethod
+    def _enumerate(scope):
+        handle = win32wnet.WNetOpenEnum(scope, win32netcon.RESOURCETYPE_ANY, 0, None)
+        try:
+            resources = []
+            while True:
+                batch = win32wnet.WNetEnumResource(handle, 0)
+                if not batch:
+                    return resources
+                resources.extend(batch)
+        finally:
+            win32wnet.WNetCloseEnum(handle)
+
+
+class SimulatedConnection(object):
+    """
+    A connection in a `SimulatorBackend`'s connection table.
+    """
+
+    __slots__ = ('local', 'remote', 'status')
+
+    def __init__(self, local, remote, status):
+        self.local = local
+        self.remote = remote
+        self.status = status
+
+
+class SimulatorBackend(CommandBackend):
+    """
+    Simulates `NET USE` without running any commands. Connections are kept in memory and the
+    output of `NET USE` is rendered the way Windows renders it. Every command is appended to
+    `commands` as a command line string.
+    """
+
+    DEVICE_IN_USE = (85, 'The local device name is already in use.')
+    NOT_FOUND = (2250, 'The network connection could not be found.')
+    NETWORK_PATH_NOT_FOUND = (53, 'The network path was not found.')
+
+    def __init__(self, latency=0, failure_rate=0, seed=None, local_drives='C'):
+        """
+        `latency` is the number of seconds every command takes. It may also be a tuple of the
+                  minimum and maximum number of seconds, in which case each command takes a
+                  random time in that range.
+        `failure_rate` is the fraction (from `0` to `1`) of commands that fail at random with
+                       "System error 53" as if the server could not be reached.
+        `seed` makes the random latencies and failures reproducible.
+        `local_drives` is an iterable of the letters of drives that are in use by local disks.
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.local_drives = set(letter.upper() for letter in local_drives)
+        self.commands = []
+        self._random = random.Random(seed)
+        self._connections = OrderedDict()
+        self._lock = Lock()
+
+    def add_connection(self, remote, local=None, status='OK'):
+        """
+        Adds a connection to the simulated table as if it had been made outside of this library.
+        `remote` is a UNC path string.
+        `local` is a drive string (e.g. "Z:") or `None`.
+        `status` is the status as `NET USE` would show it (e.g. "OK" or "Disconnected").
+        """
+        with self._lock:
+            self._connections[self._get_key(local, remote)] = SimulatedConnection(
+                local.upper() if local else None, remote, status)
+
+    def get_connections(self):
+        """
+        Returns a list of `(local, remote, status)` tuples for every simulated connection.
+        """
+        with self._lock:
+            return [(c.local, c.remote, c.status) for c in self._connections.values()]
+
+    def render(self):
+        """
+        Returns the output that `NET USE` would print for the simulated connections.
+        """
+        with self._lock:
+            return render_net_use_output([(conn.status, conn.local, conn.remote)
+                                          for conn in self._connections.values()])
+
+    def run(self, command, logger=no_logging, timeout=None):
+        time.sleep(self._get_latency())
+        return self._execute(command)
+
+    async def run_async(self, command, logger=no_logging, timeout=None):
+        await asyncio.sleep(self._get_latency())
+        return self._execute(command)
+
+    def get_used_drive_letters(self):
+        with self._lock:
+            mounted = {conn.local[0] for conn in self._connections.values() if conn.local}
+        return self.local_drives | mounted
+
+    def _get_latency(self):
+        with self._lock:
+            if isinstance(self.latency, tuple):
+                return self._random.uniform(*self.latency)
+            return self.latency
+
+    def _execute(self, command):
+        # Commands are recorded and reported as command line strings, however they were given.
+        args = split_command(command) if isinstance(command, str) else list(command)
+        command = shell.format_command(command)
+        with self._lock:
+            self.commands.append(command)
+            failed = self.failure_rate and self._random.random() < self.failure_rate
+
+        if not is_net_use_command(args):
+            raise ShellCommandError(command, 1)
+        if failed:
+            self._fail(command, self.NETWORK_PATH_NOT_FOUND)
+
+        positional, options = parse_net_use_arguments(args[2:])
+
+        if not positional:
+            return self.render(), ''
+        elif '/DELETE' in options or '/D' in options:
+            return self._delete(command, positional[0])
+        else:
+            return self._connect(command, positional)
+
+    def _connect(self, command, positional):
+        local = positional[0].upper() if is_drive_argument(positional[0]) else None
+        remote = positional[1] if local else positional[0]
+        key = self._get_key(local, remote)
+
+        with self._lock:
+            in_use = local and (local[0] in self.local_drives
+                                or any(conn.local == local for conn in self._connections.values()))
+            if not in_use:
+                self._connections[key] = SimulatedConnection(local, remote, 'OK')
+        if in_use:
+            self._fail(command, self.DEVICE_IN_USE)
+        return COMMAND_COMPLETED, ''
+
+    def _delete(self, command, identifier):
+        with self._lock:
+            if is_drive_argument(identifier):
+                keys = [key for key, conn in self._connections.items()
+                        if conn.local == identifier.upper()]
+            else:
+                path = normalize_unc_path(identifier)
+                keys = [key for key, conn in self._connections.items()
+                        if not conn.local and normalize_unc_path(conn.remote) == path]
+            for key in keys:
+                del self._connections[key]
+        if not keys:
+            self._fail(command, self.NOT_FOUND)
+        return '{0} was deleted successfully.\r\n\r\n'.format(identifier), ''
+
+    def _fail(self, command, error):
+        """
+        Raises the error that `NET USE` would report for `error`, a tuple of the system error
+        number and its message.
+        """
+        raise get_command_error(command, NET_ERROR_CODE, format_system_error(*error))
+
+    @staticmethod
+    def _get_key(local, remote):
+        return local.upper() if local else normalize_unc_path(remote)
+
+
+_QUOTED = r'"(?:\\"|[^"])*"'
+_COMMAND_ARGUMENT = re.compile(r'(?:[^\s"]+|' + _QUOTED + ')+')
+_QUOTED_PART = re.compile('"((?:\\\\"|[^"])*)"')
+
+
+def split_command(command):
+    """
+    Splits a Windows command line into its arguments. Double-quoted parts of an argument may
+    contain spaces and `\\"` for a literal double quote. Other backslashes are kept as they are.
+    """
+    return [_QUOTED_PART.sub(lambda match: match.group(1).replace('\\"', '"'), arg)
+            for arg in _COMMAND_ARGUMENT.findall(command)]
+
+
+def is_drive_argument(arg):
+    return len(arg) == 2 and arg[1] == ':' and arg[0].isalpha()
+
+
+def is_net_use_command(args):
+    return [arg.upper() for arg in args[:2]] == ['NET', 'USE']
+
+
+def parse_net_use_arguments(args):
+    """
+    Returns a tuple of a list of the positional arguments in `args`, the arguments that follow
+    `NET USE`, and a dictionary mapping the upper-case name of each option (e.g. "/USER") to its
+    value (e.g. "name", or "" for options without a value).
+    """
+    positional = [arg for arg in args if not arg.startswith('/')]
+    options = dict((name.upper(), value) for name, _, value
+                   in (arg.partition(':') for arg in args if arg.startswith('/')))
+    return positional, options
+
+
+def render_net_use_output(connections):
+    """
+    Returns the output that `NET USE` prints for `connections`, a list of `(status, local, remote)`
+    tuples where `status` is the status as `NET USE` shows it (e.g. "OK"), `local` is a drive
+    string or `None` and `remote` is a UNC path string.
+    """
+    if not connections:
+        return NET_USE_EMPTY
+
+    lines = []
+    for status, local, remote in connections:
+        prefix = '{0:<13}{1:<10}'.format(status, local or '')
+        if len(remote) > 25:
+            lines.append(prefix + remote + '\r\n')
+            lines.append(' ' * 49 + 'Microsoft Windows Network\r\n')
+        else:
+            lines.append(prefix + '{0:<26}Microsoft Windows Network\r\n'.format(remote))
+    return NET_USE_HEADER + ''.join(lines) + COMMAND_COMPLETED
+
+
+_backend = ShellBackend()
+
+
+def get_backend():
+    """
+    Returns the backend that executes this library's commands.
+    """
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Makes `backend`, a `CommandBackend`, execute all of this library's commands from now on.
+    """
+    global _backend
+    _backend = backend
+
+
+@contextmanager
+def use_backend(backend):
+    """
+    A context manager that makes `backend` execute this library's commands until it exits.
+    """
+    previous = get_backend()
+    set_backend(backend)
+    try:
+        yield backend
+    finally:
+        set_backend(previous)
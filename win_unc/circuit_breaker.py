@@ -0,0 +1,176 @@
+"""
+Contains a circuit breaker that stops connecting to servers that cannot be reached. After enough
+consecutive failures against a server, its circuit opens and connecting to it fails at once with a
+`CircuitOpenError` instead of waiting for the network timeout. After a cool-down, one connection
+attempt is let through as a probe; if it succeeds the circuit closes again.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic
+
+from win_unc.errors import CircuitOpenError, ShellCommandError
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOL_DOWN = 30
+
+# The state of the circuit for one server.
+# `host` is the lowercase host name of the server.
+# `state` is `CLOSED`, `OPEN` or `HALF_OPEN` (a probe is running).
+# `failures` is the number of consecutive failures.
+# `opened_at` is the `time.monotonic()` time the circuit last opened or `None` if it is closed.
+# `last_error` is the error of the most recent failure or `None` if the last attempt succeeded.
+CircuitState = namedtuple('CircuitState', ['host', 'state', 'failures', 'opened_at',
+                                           'last_error'])
+
+
+class _Circuit(object):
+    __slots__ = ('state', 'failures', 'opened_at', 'last_error')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+
+
+class CircuitBreaker(object):
+    """
+    Keeps a circuit per server host. Only errors that are `retryable`, such as timeouts and
+    unreachable networks, count as failures. Other errors, such as bad credentials, show that the
+    server answered, so they count as successes.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cool_down=DEFAULT_COOL_DOWN):
+        """
+        `failure_threshold` is the number of consecutive failures that opens a circuit. If it is
+                            `None`, circuits never open.
+        `cool_down` is the number of seconds a circuit stays open before a probe is let through.
+        """
+        self.failure_threshold = failure_threshold
+        self.cool_down = cool_down
+        self._circuits = {}
+        self._lock = Lock()
+
+    @contextmanager
+    def guard(self, host):
+        """
+        A context manager around one attempt to reach `host`. It raises a `CircuitOpenError`
+        without running its block if the circuit for `host` is open, and records whether the block
+        raised a failure. It may be used around `await`s in coroutines.
+        """
+        self.before_attempt(host)
+        try:
+            yield
+        except ShellCommandError as error:
+            self.record_result(host, error)
+            raise
+        except BaseException:
+            self.record_result(host, None, counted=False)
+            raise
+        else:
+            self.record_result(host)
+
+    def before_attempt(self, host):
+        """
+        Raises a `CircuitOpenError` if an attempt to reach `host` may not be made now. If the
+        cool-down has passed, the caller becomes the probe and must call `record_result`.
+        """
+        with self._lock:
+            circuit = self._get_circuit(host)
+            if circuit.state == CLOSED:
+                return
+            retry_after = circuit.opened_at + self.cool_down - monotonic()
+            if circuit.state == OPEN and retry_after <= 0:
+                circuit.state = HALF_OPEN
+                return
+            raise CircuitOpenError(host, max(0, retry_after), circuit.last_error)
+
+    def record_result(self, host, error=None, counted=True):
+        """
+        Records the outcome of an attempt to reach `host`. `error` is the `ShellCommandError` it
+        raised or `None` if it succeeded. `counted` must be `False` if the attempt was abandoned
+        without an outcome (e.g. it was cancelled), in which case a probe may be made again.
+        """
+        with self._lock:
+            circuit = self._get_circuit(host)
+            if not counted:
+                if circuit.state == HALF_OPEN:
+                    circuit.state = OPEN
+            elif error is None or not error.retryable:
+                circuit.state = CLOSED
+                circuit.failures = 0
+                circuit.opened_at = None
+                circuit.last_error = None
+            else:
+                circuit.failures += 1
+                circuit.last_error = error
+                if (circuit.state == HALF_OPEN
+                        or (self.failure_threshold is not None
+                            and circuit.failures >= self.failure_threshold)):
+                    circuit.state = OPEN
+                    circuit.opened_at = monotonic()
+
+    def get_state(self, host):
+        """
+        Returns the `CircuitState` for `host`.
+        """
+        host = host.lower()
+        with self._lock:
+            return self._get_state(host, self._circuits.get(host) or _Circuit())
+
+    def get_states(self):
+        """
+        Returns a dictionary mapping each host that has failed at least once to its
+        `CircuitState`.
+        """
+        with self._lock:
+            return dict((host, self._get_state(host, circuit))
+                        for host, circuit in self._circuits.items() if circuit.failures)
+
+    def reset(self, host=None):
+        """
+        Closes the circuit for `host`, or every circuit if `host` is `None`. Tests that simulate
+        failing servers can call this to start from closed circuits.
+        """
+        with self._lock:
+            if host is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(host.lower(), None)
+
+    def _get_circuit(self, host):
+        host = host.lower()
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = _Circuit()
+        return circuit
+
+    @staticmethod
+    def _get_state(host, circuit):
+        return CircuitState(host, circuit.state, circuit.failures, circuit.opened_at,
+                            circuit.last_error)
+
+
+_breaker = CircuitBreaker()
+
+
+def get_circuit_breaker():
+    """
+    Returns the process-wide `CircuitBreaker` that connecting goes through.
+    """
+    return _breaker
+
+
+def set_circuit_breaker(breaker):
+    """
+    Replaces the process-wide `CircuitBreaker` with `breaker`.
+    """
+    global _breaker
+    _breaker = breaker
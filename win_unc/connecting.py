@@ -2,12 +2,19 @@
 Contains classes for dealing with UNC paths on Windows.
 """
 
+from collections import namedtuple
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+
 from win_unc import sanitizors as S
-from win_unc.disk_drive import get_available_disk_drive
+from win_unc.admission import get_admission_controller
+from win_unc.circuit_breaker import get_circuit_breaker
+from win_unc.disk_drive import get_drive_letter_allocator
+from win_unc.errors import (
+    ConnectionNotFoundError, DeviceInUseError, NetCommandError, ShellCommandError)
+from win_unc.instrumentation import CONNECT, DISCONNECT, run_command
 from win_unc.internal.loggers import no_logging
-from win_unc.internal.net_use_table import parse_net_use_table
-from win_unc.internal.shell import run, ShellCommandError
-from win_unc.internal.current_state import get_current_net_use_table
+from win_unc.internal.shell import format_command
+from win_unc.internal.current_state import get_current_net_use_table, invalidate_net_use_table
 
 
 class UncDirectoryConnection(object):
@@ -15,7 +22,8 @@ class UncDirectoryConnection(object):
     Represents a UNC path as it relates to the current Windows session.
     """
 
-    def __init__(self, unc, disk_drive=None, persistent=False, logger=no_logging):
+    def __init__(self, unc, disk_drive=None, persistent=False, logger=no_logging, timeout=None,
+                 verify=False):
         """
         Returns a new `UncDirectoryConnection` object.
         `unc` is a `UncDirectory` that describes the UNC path and necessary credentials (if
@@ -28,11 +36,20 @@ class UncDirectoryConnection(object):
                      sessions of the current Windows user.
         `logger` is a function that takes exactly one string parameter. It will be called for
                  logging purposes. By default, this is a no-op.
+        `timeout` is the number of seconds that connecting or disconnecting may take before a
+                  `ShellCommandTimeoutError` is raised. If it is `None`, the shell's default
+                  timeout is used.
+        `verify` must be `True` for the context manager to check whether the UNC directory is
+                 connected before connecting and before disconnecting it. Otherwise, a mount is
+                 connected without checking first, and the connection is disconnected on exit
+                 without checking, since the context manager knows that it connected it.
         """
         self.unc = unc
         self.disk_drive = disk_drive
         self.persistent = persistent
         self.logger = logger
+        self.timeout = timeout
+        self.verify = verify
         self._was_connected_before_enter = None  # Flag to handle context manager
 
     def get_path(self):
@@ -66,18 +83,23 @@ class UncDirectoryConnection(object):
         """
         Disconnects the UNC path. If the command fails, this will raise a `ShellCommandError`.
         """
-        identifier = (self.disk_drive.get_drive() if self.disk_drive
-                      else S.sanitize_path(self.unc.get_normalized_path()))
         self.logger('Disconnecting the network UNC path "{path}".'.format(path=self.get_path()))
-        run('NET USE "{id}" /DELETE /YES'.format(id=identifier), self.logger)
+        with get_admission_controller().admit(self.unc.get_host()):
+            try:
+                run_command(DISCONNECT, self._get_disconnection_command(), self.logger,
+                            self.timeout)
+            finally:
+                invalidate_net_use_table()
 
-    def is_connected(self):
+    def is_connected(self, max_age=None, fresh=False):
         """
         Returns `True` if the system registers this `UncDirectoryConnection` as connected.
+        `max_age` and `fresh` control the reuse of cached `NET USE` snapshots (see
+        `get_current_net_use_table`).
         """
-        return self.get_connection_status() in ['ok', 'disconnected']
+        return self.get_connection_status(max_age, fresh) in ['ok', 'disconnected']
 
-    def get_connection_status(self):
+    def get_connection_status(self, max_age=None, fresh=False):
         """
         Returns one of the following based on this `UncDirectoryConnection`'s status according to
         the system:
@@ -85,48 +107,106 @@ class UncDirectoryConnection(object):
             `'disconnected'` - recognized but inactive
             `'unavailable'`  - a previous connection attempt failed
             `None`           - not connected
+        `max_age` and `fresh` control the reuse of cached `NET USE` snapshots (see
+        `get_current_net_use_table`).
+        """
+        return self._get_status_from_table(get_current_net_use_table(max_age, fresh))
+
+    def _get_status_from_table(self, net_use):
+        """
+        Returns this `UncDirectoryConnection`'s status (see `get_connection_status`) according to
+        the `NetUseTable` `net_use`.
         """
-        net_use = get_current_net_use_table()
         matching = net_use.get_matching_rows(local=self.disk_drive, remote=self.unc)
         return matching[0]['status'] if matching else None
 
+    def _get_disconnection_command(self):
+        """
+        Returns the Windows command to be used to disconnect this UNC directory as a list of
+        arguments.
+        """
+        identifier = (self.disk_drive.get_drive() if self.disk_drive
+                      else S.sanitize_path(self.unc.get_normalized_path()))
+        return ['NET', 'USE', identifier, '/DELETE', '/YES']
+
     def _get_connection_command(self, username=None, password=None):
         """
-        Returns the Windows command to be used to connect this UNC directory.
+        Returns the Windows command to be used to connect this UNC directory as a list of
+        arguments. The arguments are passed to `net.exe` without a shell, so they are not escaped.
         `username` and/or `password` are used as credentials if they are supplied.
         """
-        device_str = ' "{0}"'.format(self.disk_drive) if self.disk_drive else ''
-        password_str = ' "{0}"'.format(S.sanitize_for_shell(password)) if password else ''
-        user_str = ' /USER:"{0}"'.format(S.sanitize_username(username)) if username else ''
-
-        return 'NET USE{device} "{path}"{password}{user} /PERSISTENT:{persistent}'.format(
-            device=device_str,
-            path=S.sanitize_unc_path(self.get_path()),
-            password=password_str,
-            user=user_str,
-            persistent='YES' if self.disk_drive and self.persistent else 'NO')
+        command = ['NET', 'USE']
+        if self.disk_drive:
+            command.append(self.disk_drive.get_drive())
+        command.append(S.sanitize_unc_path(self.get_path()))
+        if password:
+            command.append(password)
+        if username:
+            command.append('/USER:' + S.sanitize_username(username))
+        command.append('/PERSISTENT:' + ('YES' if self.disk_drive and self.persistent else 'NO'))
+        return command
 
     def _connect_with_creds(self, username=None, password=None):
         """
         Constructs and executes the Windows connecting command to connect this
         `UncDirectoryConnection`.
         `username` and/or `password` are used as credentials if they are supplied. If there is an
-        error a `ShellCommandError` is raised.
+        error a `ShellCommandError` is raised. If the server's circuit is open, a
+        `CircuitOpenError` is raised without running the command. Otherwise the command waits its
+        turn with the process-wide `AdmissionController`.
         """
         command = self._get_connection_command(username, password)
-        self.logger(self._get_connection_command(username, '-----') if password else command)
-        run(command)
+        redacted_command = self._get_connection_command(username, '-----') if password else command
+        self.logger(format_command(redacted_command))
+        host = self.unc.get_host()
+        with get_circuit_breaker().guard(host), get_admission_controller().admit(host):
+            try:
+                run_command(CONNECT, command, self.logger, self.timeout, redacted_command)
+            finally:
+                invalidate_net_use_table()
 
     def __enter__(self):
-        self._was_connected_before_enter = self.is_connected()
-        if not self._was_connected_before_enter:
-            self.connect()
+        if self._must_check_before_connecting():
+            self._was_connected_before_enter = self.is_connected()
+            if not self._was_connected_before_enter:
+                self.connect()
+        else:
+            # Connecting fails if the drive is already in use, so the connection only has to be
+            # checked when that happens.
+            try:
+                self.connect()
+                self._was_connected_before_enter = False
+            except ShellCommandError as error:
+                if not may_already_be_connected(error) or not self.is_connected(fresh=True):
+                    raise
+                self._was_connected_before_enter = True
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if not self._was_connected_before_enter and self.is_connected():
-            self.disconnect()
-        self._was_connected_before_enter = None
+        try:
+            if self._was_connected_before_enter:
+                return
+            elif self.verify:
+                if self.is_connected():
+                    self.disconnect()
+            else:
+                try:
+                    self.disconnect()
+                except ConnectionNotFoundError:
+                    pass
+                except ShellCommandError:
+                    if self.is_connected(fresh=True):
+                        raise
+        finally:
+            self._was_connected_before_enter = None
+
+    def _must_check_before_connecting(self):
+        """
+        Returns `True` if the context manager must check whether this `UncDirectoryConnection` is
+        connected before connecting it. Connections without a disk drive are always checked since
+        connecting them again succeeds and cannot tell whether they were already connected.
+        """
+        return self.verify or not self.disk_drive
 
     def __str__(self):
         return str(self.unc)
@@ -140,7 +220,8 @@ class UncDirectoryMount(UncDirectoryConnection):
     A `UncDirectoryConnection` specifically for mounting UNC paths to a local drive letter.
     """
 
-    def __init__(self, unc, disk_drive=None, persistent=False, logger=no_logging):
+    def __init__(self, unc, disk_drive=None, persistent=False, logger=no_logging, timeout=None,
+                 verify=False):
         """
         Creates a `UncDirectoryConnection` with a target mount point (drive letter).
         `unc` is a `UncDirectory` that describes the UNC path and necessary credentials (if
@@ -152,9 +233,43 @@ class UncDirectoryMount(UncDirectoryConnection):
                      `UncDirectoryMount` is mounted (i.e. connected).
         `persistent` must be `True` if the UNC directory's connection should persist for all future
                      sessions of the current Windows user.
+
+        An automatically selected disk drive is reserved when this `UncDirectoryMount` is mounted.
+        If another mount has reserved it in the meantime, another available drive is used. If
+        another process has mapped it, the drives in use are probed again and mounting is retried
+        on another drive.
+        Selecting a disk drive runs `NET USE` the first time and whenever the allocator has been
+        invalidated (see `DriveLetterAllocator`).
         """
-        disk_drive = disk_drive if disk_drive else get_available_disk_drive()
-        super(UncDirectoryMount, self).__init__(unc, disk_drive, persistent, logger)
+        self._auto_disk_drive = not disk_drive
+        self._reserved_disk_drive = False
+        disk_drive = disk_drive if disk_drive else get_drive_letter_allocator().get_available()
+        super(UncDirectoryMount, self).__init__(unc, disk_drive, persistent, logger, timeout,
+                                                verify)
+
+    def connect(self):
+        attempts = 0
+        while True:
+            reserve_disk_drive(self)
+            try:
+                super(UncDirectoryMount, self).connect()
+                return
+            except BaseException as error:
+                release_disk_drive(self, failed=True)
+                if not must_retry_on_another_drive(self, error, attempts):
+                    raise
+                attempts += 1
+
+    def disconnect(self):
+        failed = True
+        try:
+            super(UncDirectoryMount, self).disconnect()
+            failed = False
+        except ConnectionNotFoundError:
+            failed = False
+            raise
+        finally:
+            release_disk_drive(self, failed)
 
     def mount(self):
         """
@@ -168,8 +283,127 @@ class UncDirectoryMount(UncDirectoryConnection):
         """
         self.disconnect()
 
-    def is_mounted(self):
+    def is_mounted(self, max_age=None, fresh=False):
         """
         An alias for `UncDirectoryConnection`'s `is_connected` method.
         """
-        return self.is_connected()
+        return self.is_connected(max_age, fresh)
+
+
+def reserve_disk_drive(mount):
+    """
+    Reserves the disk drive of `mount`, a `UncDirectoryMount` or `AsyncUncDirectoryMount`, before
+    it is mounted. If the drive is to be selected automatically and has not been selected yet or is
+    no longer available, `mount` is given an available drive.
+    """
+    allocator = get_drive_letter_allocator()
+    if not mount._auto_disk_drive:
+        mount._reserved_disk_drive = allocator.mark_used(mount.disk_drive)
+    else:
+        if mount.disk_drive is None or not allocator.reserve(mount.disk_drive):
+            mount.disk_drive = allocator.allocate()[0]
+        mount._reserved_disk_drive = True
+
+
+def release_disk_drive(mount, failed=False):
+    """
+    Releases the disk drive of `mount` after it is unmounted or after mounting or unmounting it
+    `failed`, in which case the drives in use are probed again before the next allocation. After a
+    failure, the drive's reservation is only released if `mount` made it, since another mount of
+    the same drive may be in progress.
+    """
+    allocator = get_drive_letter_allocator()
+    if not failed or mount._reserved_disk_drive:
+        allocator.release(mount.disk_drive)
+    mount._reserved_disk_drive = False
+    if failed:
+        # The drive may be in use by something the allocator has not seen.
+        allocator.invalidate()
+
+
+def must_retry_on_another_drive(mount, error, attempts):
+    """
+    Returns `True` if mounting `mount` must be retried after it failed with `error` for the
+    `attempts + 1`th time. This is the case when its automatically selected disk drive was mapped
+    by another process after the allocator probed the drives in use. `release_disk_drive` has
+    invalidated the allocator, so the next `reserve_disk_drive` probes again and selects another
+    drive.
+    """
+    return (mount._auto_disk_drive
+            and isinstance(error, DeviceInUseError)
+            and attempts < AUTO_DISK_DRIVE_RETRIES)
+
+
+def may_already_be_connected(error):
+    """
+    Returns `True` if `error`, the `ShellCommandError` raised by connecting, may mean that the
+    connection already existed. `NET` errors other than a disk drive being in use mean that it did
+    not, so the context managers raise them without running `NET USE` to check.
+    """
+    return isinstance(error, DeviceInUseError) or not isinstance(error, NetCommandError)
+
+
+# The number of times mounting on an automatically selected disk drive is retried on another drive
+# after the selected one turned out to be in use.
+AUTO_DISK_DRIVE_RETRIES = 3
+
+DEFAULT_MAX_WORKERS = 8
+
+# The outcome of one connection in `connect_many` or `disconnect_many`.
+# `connection` is the `UncDirectoryConnection` the outcome is for.
+# `changed` is `True` if a shell command was run successfully for `connection`.
+# `error` is the exception raised for `connection` or `None` if there was no error.
+BulkResult = namedtuple('BulkResult', ['connection', 'changed', 'error'])
+
+
+def connect_many(connections, max_workers=DEFAULT_MAX_WORKERS, fail_fast=False):
+    """
+    Connects many `UncDirectoryConnection` objects in parallel and returns a list of
+    `BulkResult`s in the same order as `connections`. Errors are returned, not raised.
+    `connections` is an iterable of `UncDirectoryConnection` objects. Connections that are already
+                  connected according to a single `NET USE` snapshot are skipped.
+    `max_workers` is the maximum number of shell commands to run at the same time.
+    `fail_fast` must be `True` to stop starting new commands after the first error. Connections
+                that were never attempted have a `CancelledError` as their error.
+    """
+    return _run_many(connections, lambda conn, status: status not in ['ok', 'disconnected'],
+                     lambda conn: conn.connect(), max_workers, fail_fast)
+
+
+def disconnect_many(connections, max_workers=DEFAULT_MAX_WORKERS, fail_fast=False):
+    """
+    Disconnects many `UncDirectoryConnection` objects in parallel and returns a list of
+    `BulkResult`s in the same order as `connections`. Connections that are not connected according
+    to a single `NET USE` snapshot are skipped. The arguments have the same meaning as for
+    `connect_many`.
+    """
+    return _run_many(connections, lambda conn, status: status is not None,
+                     lambda conn: conn.disconnect(), max_workers, fail_fast)
+
+
+def _run_many(connections, needs_operation, operation, max_workers, fail_fast):
+    """
+    Runs `operation` on every connection in `connections` for which `needs_operation` returns
+    `True` given the connection and its status.
+    """
+    connections = list(connections)
+    net_use = get_current_net_use_table(fresh=True)
+    results = [BulkResult(conn, False, None) for conn in connections]
+    pending = [index for index, conn in enumerate(connections)
+               if needs_operation(conn, conn._get_status_from_table(net_use))]
+    if not pending:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+        futures = {executor.submit(operation, connections[index]): index for index in pending}
+        failed = False
+        for future in as_completed(futures):
+            index = futures[future]
+            error = CancelledError() if future.cancelled() else future.exception()
+            results[index] = BulkResult(connections[index], error is None, error)
+            if error is not None and fail_fast and not failed:
+                failed = True
+                for other in futures:
+                    other.cancel()
+
+    return results
@@ -2,14 +2,11 @@
 Class for representing a Windows disk drive.
 """
 
-import os
+import asyncio
 import string
-try:
-    import win32api
-    win32api_available = True
-except ImportError:
-    win32api_available = False
+from threading import Lock
 
+from win_unc.backends import get_backend
 from win_unc.cleaners import clean_drive_letter
 from win_unc.errors import NoDrivesAvailableError, InvalidDiskDriveError
 from win_unc.validators import is_valid_drive_letter
@@ -21,6 +18,8 @@ class DiskDrive(object):
     character. They may map to hardware devices, local directories, or remote directories.
     """
 
+    __slots__ = ('_drive_letter',)
+
     def __init__(self, drive):
         """
         Creates a `DiskDrive` from a `drive`.
@@ -70,16 +69,152 @@ def get_available_disk_drive():
     letters are not as commonly mapped. If the system does not have any drive letters available
     this will raise a `NoDrivesAvailableError`.
     """
-    if win32api_available:
-        drivesused = filter( None, win32api.GetLogicalDriveStrings().split("\000") )
-        for letter in reversed(string.ascii_uppercase):
-            if not letter + ':\\' in drivesused:
-                return DiskDrive(letter)
-        else:
-            raise NoDrivesAvailableError()
+    used = get_backend().get_used_drive_letters()
+    for letter in reversed(string.ascii_uppercase):
+        if letter not in used:
+            return DiskDrive(letter)
     else:
-        for letter in reversed(string.ascii_uppercase):
-            if not os.path.isdir(letter + ':\\'):
-                return DiskDrive(letter)
-        else:
+        raise NoDrivesAvailableError()
+
+
+class DriveLetterAllocator(object):
+    """
+    Hands out drive letters to mounts so that mounts made at the same time never pick the same
+    letter. The letters in use are probed once and combined with the devices in the current
+    `NET USE` table. After that, letters are tracked as they are reserved and released until
+    `invalidate` is called. Setting a different backend also drops all reservations.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._backend = None
+        self._stale = True
+        self._used = 0  # A bitmap with bit `n` set if the `n`th letter of the alphabet is used.
+        self._reserved = 0  # The letters reserved through this allocator.
+
+    def get_available(self):
+        """
+        Returns the `DiskDrive` that `allocate` would return next without reserving it. If no
+        letters are available, this raises a `NoDrivesAvailableError`.
+        """
+        with self._lock:
+            self._refresh_if_needed()
+            return DiskDrive(self._get_free_letters(1)[0])
+
+    def allocate(self, count=1):
+        """
+        Reserves `count` available drive letters and returns a list of them as `DiskDrive`s. If
+        fewer than `count` letters are available, nothing is reserved and this raises a
+        `NoDrivesAvailableError`.
+        """
+        with self._lock:
+            self._refresh_if_needed()
+            letters = self._get_free_letters(count)
+            for letter in letters:
+                self._reserved |= _get_bit(letter)
+            self._used |= self._reserved
+        return [DiskDrive(letter) for letter in letters]
+
+    def reserve(self, disk_drive):
+        """
+        Reserves `disk_drive` and returns `True` if it is available. Otherwise this returns `False`.
+        """
+        bit = _get_bit(disk_drive.get_drive()[0])
+        with self._lock:
+            self._refresh_if_needed()
+            if self._used & bit:
+                return False
+            self._reserved |= bit
+            self._used |= bit
+            return True
+
+    def mark_used(self, disk_drive):
+        """
+        Records that `disk_drive` was chosen by the caller and is about to be used, without
+        checking whether it is available. Returns `True` if this reserved it or `False` if it was
+        already reserved, in which case the caller must not release it after failing to mount it.
+        """
+        bit = _get_bit(disk_drive.get_drive()[0])
+        with self._lock:
+            reserved = not self._reserved & bit
+            self._reserved |= bit
+            self._used |= bit
+            return reserved
+
+    def release(self, disk_drive):
+        """
+        Marks `disk_drive` as available again. Call this after unmounting it or after failing to
+        mount it.
+        """
+        bit = _get_bit(disk_drive.get_drive()[0])
+        with self._lock:
+            self._reserved &= ~bit
+            self._used &= ~bit
+
+    def invalidate(self):
+        """
+        Makes the next call probe the letters that are in use again. Reservations are kept.
+        """
+        with self._lock:
+            self._stale = True
+
+    async def refresh_async(self):
+        """
+        Probes the letters that are in use if the next call would otherwise probe them, without
+        blocking the event loop while `NET USE` runs or the drives are probed.
+        """
+        backend = get_backend()
+        with self._lock:
+            if backend is self._backend and not self._stale:
+                return
+
+        # Deferred because `current_state` imports this module through `net_use_table`.
+        from win_unc.internal.current_state import get_current_net_use_table_async
+
+        table = await get_current_net_use_table_async()
+        loop = asyncio.get_running_loop()
+        letters = await loop.run_in_executor(None, backend.get_used_drive_letters)
+        with self._lock:
+            if get_backend() is backend:
+                self._refresh_if_needed(table, letters)
+
+    def _refresh_if_needed(self, net_use=None, used_letters=None):
+        backend = get_backend()
+        if backend is not self._backend:
+            self._reserved = 0
+        elif not self._stale:
+            return
+
+        if net_use is None:
+            # Deferred because `current_state` imports this module through `net_use_table`.
+            from win_unc.internal.current_state import get_current_net_use_table
+            net_use = get_current_net_use_table()
+
+        letters = set(backend.get_used_drive_letters() if used_letters is None else used_letters)
+        letters.update(drive.get_drive()[0] for drive in net_use.get_connected_devices())
+        self._used = self._reserved
+        for letter in letters:
+            self._used |= _get_bit(letter)
+        self._backend = backend
+        self._stale = False
+
+    def _get_free_letters(self, count):
+        letters = [letter for letter in reversed(string.ascii_uppercase)
+                   if not self._used & _get_bit(letter)][:count]
+        if len(letters) < count:
             raise NoDrivesAvailableError()
+        return letters
+
+
+def _get_bit(letter):
+    return 1 << (ord(letter.upper()) - ord('A'))
+
+
+_allocator = DriveLetterAllocator()
+
+
+def get_drive_letter_allocator():
+    """
+    Returns the process-wide `DriveLetterAllocator` used by `UncDirectoryMount`.
+    """
+    return _allocator
@@ -59,20 +59,48 @@ class NoDrivesAvailableError(WinUncError):
         return 'The system has no drive letters available.'
 
 
+class CircuitOpenError(WinUncError):
+    """
+    Error for the case when a server has failed too often and is not contacted until its
+    circuit breaker lets another attempt through.
+    """
+
+    retryable = True
+
+    def __init__(self, host, retry_after=None, last_error=None):
+        """
+        `host` is the host name of the server.
+        `retry_after` is the number of seconds until another attempt may be made.
+        `last_error` is the error that the last attempt to reach the server failed with.
+        """
+        self.host = host
+        self.retry_after = retry_after
+        self.last_error = last_error
+
+    def __str__(self):
+        return 'The server "{host}" is not contacted for {seconds:.1f} more seconds.'.format(
+            host=self.host, seconds=self.retry_after or 0)
+
+
 class ShellCommandError(WinUncError):
     """
     Error for the case when a Windows shell command returns an error code.
+    `retryable` is `True` if running the same command again may succeed.
     """
 
-    def __init__(self, command=None, error_code=None):
+    retryable = False
+
+    def __init__(self, command=None, error_code=None, stderr=None):
         """
-        Both `command` and `error_code` are optional. The more information that is provided here,
-        the more descriptive the error message will be.
+        All arguments are optional. The more information that is provided here, the more
+        descriptive the error message will be.
         `command` is a string representing the command that was executed in the shell.
         `error_code` is the numeric error code returned by executing `command`.
+        `stderr` is the text that `command` wrote to `stderr`.
         """
         self.command = command
         self.error_code = error_code
+        self.stderr = stderr
 
     def __str__(self):
         if self.command and self.error_code:
@@ -84,3 +112,107 @@ class ShellCommandError(WinUncError):
             return 'Command exited with error code {code}.'.format(code=self.error_code)
         else:
             return 'Command exited with an error.'
+
+
+class NetCommandError(ShellCommandError):
+    """
+    Error for the case when a `NET` command fails with a system error number in its `stderr`, like
+    "System error 53 has occurred." Subclasses are raised for the numbers in their
+    `system_errors`, and this class is raised for all others.
+    """
+
+    system_errors = ()
+
+    def __init__(self, command=None, error_code=None, stderr=None, system_error=None,
+                 message=None):
+        """
+        `system_error` is the Windows system error number reported by `NET`.
+        `message` is the explanation of `system_error` that `NET` printed.
+        The other arguments have the same meaning as for `ShellCommandError`.
+        """
+        super(NetCommandError, self).__init__(command, error_code, stderr)
+        self.system_error = system_error
+        self.message = message
+
+    def __str__(self):
+        return 'The command `{command}` failed with system error {number}: {message}'.format(
+            command=self.command, number=self.system_error, message=self.message)
+
+
+class NetworkUnavailableError(NetCommandError):
+    """
+    Error for the case when the server cannot be reached, which may be temporary.
+    """
+
+    retryable = True
+    system_errors = (51, 53, 64, 121, 1231, 1311)
+
+
+class NetworkNameNotFoundError(NetCommandError):
+    """
+    Error for the case when the server does not have the requested share.
+    """
+
+    system_errors = (67,)
+
+
+class AccessDeniedError(NetCommandError):
+    """
+    Error for the case when the user may not access the share.
+    """
+
+    system_errors = (5,)
+
+
+class LogonFailureError(NetCommandError):
+    """
+    Error for the case when the server rejects the username or password.
+    """
+
+    system_errors = (86, 1326, 1327, 1330, 1909, 2202)
+
+
+class CredentialConflictError(NetCommandError):
+    """
+    Error for the case when the session is already connected to the server with other
+    credentials. Windows allows only one set of credentials per server.
+    """
+
+    system_errors = (1219,)
+
+
+class DeviceInUseError(NetCommandError):
+    """
+    Error for the case when the disk drive to mount on is already in use.
+    """
+
+    system_errors = (85,)
+
+
+class ConnectionNotFoundError(NetCommandError):
+    """
+    Error for the case when the connection to delete does not exist.
+    """
+
+    system_errors = (2250,)
+
+
+class ShellCommandTimeoutError(ShellCommandError):
+    """
+    Error for the case when a Windows shell command does not finish within its timeout and is
+    killed.
+    """
+
+    retryable = True
+
+    def __init__(self, command=None, timeout=None):
+        """
+        `command` is a string representing the command that was executed in the shell.
+        `timeout` is the number of seconds the command was allowed to run.
+        """
+        super(ShellCommandTimeoutError, self).__init__(command)
+        self.timeout = timeout
+
+    def __str__(self):
+        return 'The command `{command}` did not finish within {timeout} seconds.'.format(
+            command=self.command, timeout=self.timeout)
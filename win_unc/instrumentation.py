@@ -0,0 +1,205 @@
+"""
+Structured timing records for the shell commands that this library runs. A `CommandRecord` is
+sent to every listener after each command finishes, and a `MetricsAggregator` that is always
+listening keeps counters and latency percentiles that can be read with `get_metrics`.
+"""
+
+from collections import deque, namedtuple
+from threading import Lock
+from time import perf_counter
+
+from win_unc.backends import get_backend
+from win_unc.errors import ShellCommandError
+from win_unc.internal.loggers import no_logging
+from win_unc.internal.shell import format_command
+
+
+QUERY = 'query'
+CONNECT = 'connect'
+DISCONNECT = 'disconnect'
+
+# The number of recent wall times per kind of command that percentiles are computed from.
+DEFAULT_MAX_SAMPLES = 1000
+
+# The timing of one shell command.
+# `kind` is `QUERY`, `CONNECT` or `DISCONNECT`.
+# `command` is the command line string with any password replaced.
+# `wall_time` is the number of seconds from starting the command to having its result.
+# `exit_code` is `0` on success, the command's error code on failure or `None` if unknown.
+# `output_bytes` is the size of the command's `stdout` and `stderr` in bytes.
+# `parse_time` is the number of seconds spent parsing the output or `None` if it was not parsed.
+# `row_count` is the number of rows parsed from the output or `None` if it was not parsed.
+# `error` is the exception raised for the command or `None` if it succeeded. The `command` of a
+#         `ShellCommandError` is replaced by the redacted command line as well.
+CommandRecord = namedtuple('CommandRecord', ['kind', 'command', 'wall_time', 'exit_code',
+                                             'output_bytes', 'parse_time', 'row_count', 'error'])
+
+
+class MetricsAggregator(object):
+    """
+    A listener that counts `CommandRecord`s and keeps the wall times of the most recent ones for
+    each kind of command.
+    """
+
+    def __init__(self, max_samples=DEFAULT_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._lock = Lock()
+        self._metrics = {}
+
+    def __call__(self, record):
+        with self._lock:
+            metrics = self._metrics.get(record.kind)
+            if metrics is None:
+                metrics = self._metrics[record.kind] = {
+                    'count': 0, 'errors': 0, 'output_bytes': 0, 'rows': 0, 'parse_time': 0.0,
+                    'wall_times': deque(maxlen=self.max_samples)}
+            metrics['count'] += 1
+            metrics['errors'] += record.error is not None
+            metrics['output_bytes'] += record.output_bytes
+            metrics['rows'] += record.row_count or 0
+            metrics['parse_time'] += record.parse_time or 0
+            metrics['wall_times'].append(record.wall_time)
+
+    def get_stats(self):
+        """
+        Returns a dictionary mapping each kind of command to a dictionary of its metrics:
+            `count`        - the number of commands
+            `errors`       - the number of commands that failed
+            `output_bytes` - the total size of their output
+            `rows`         - the total number of rows parsed from their output
+            `parse_time`   - the total number of seconds spent parsing their output
+            `p50`, `p95` and `p99` - percentiles of the recent commands' wall times in seconds
+        """
+        with self._lock:
+            stats = {}
+            for kind, metrics in self._metrics.items():
+                stats[kind] = dict((key, value) for key, value in metrics.items()
+                                   if key != 'wall_times')
+                wall_times = sorted(metrics['wall_times'])
+                for percent in (50, 95, 99):
+                    stats[kind]['p{0}'.format(percent)] = get_percentile(wall_times, percent)
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+
+
+class CommandTimer(object):
+    """
+    Measures one command and sends its `CommandRecord` to the listeners when it finishes.
+    """
+
+    def __init__(self, kind, command):
+        """
+        `command` is the command as a list of arguments or a string, with any password replaced.
+        """
+        self.kind = kind
+        self.command = format_command(command)
+        self.output_bytes = 0
+        self.parse_time = None
+        self.row_count = None
+        self.started_at = perf_counter()
+
+    def add_output(self, *texts):
+        for text in texts:
+            self.output_bytes += len(text.encode('utf-8'))
+
+    def finish(self, error=None):
+        if error is None:
+            exit_code = 0
+        else:
+            exit_code = error.error_code if isinstance(error, ShellCommandError) else None
+        emit(CommandRecord(self.kind, self.command, perf_counter() - self.started_at, exit_code,
+                           self.output_bytes, self.parse_time, self.row_count, error))
+
+
+def run_command(kind, command, logger=no_logging, timeout=None, redacted_command=None):
+    """
+    Runs `command` with the current backend and returns its `stdout` and `stderr` like the
+    backend's `run` method. A `CommandRecord` of `kind` is emitted with `redacted_command` in place
+    of `command` if it is given. A `ShellCommandError` raised for `command` is given
+    `redacted_command` too, so that neither listeners nor callers see the password.
+    """
+    timer = CommandTimer(kind, redacted_command or command)
+    try:
+        stdout, stderr = get_backend().run(command, logger, timeout)
+    except Exception as error:
+        _redact_error(error, timer.command)
+        timer.finish(error)
+        raise
+    timer.add_output(stdout, stderr)
+    timer.finish()
+    return stdout, stderr
+
+
+async def run_command_async(kind, command, logger=no_logging, timeout=None,
+                            redacted_command=None):
+    """
+    The same as `run_command`, except that the event loop is not blocked while `command` runs.
+    """
+    timer = CommandTimer(kind, redacted_command or command)
+    try:
+        stdout, stderr = await get_backend().run_async(command, logger, timeout)
+    except Exception as error:
+        _redact_error(error, timer.command)
+        timer.finish(error)
+        raise
+    timer.add_output(stdout, stderr)
+    timer.finish()
+    return stdout, stderr
+
+
+def _redact_error(error, command):
+    if isinstance(error, ShellCommandError):
+        error.command = command
+
+
+def get_percentile(sorted_values, percent):
+    """
+    Returns the nearest-rank `percent`th percentile of the sorted list `sorted_values` or `None`
+    if it is empty.
+    """
+    if not sorted_values:
+        return None
+    rank = -(-percent * len(sorted_values) // 100)  # Rounds up.
+    return sorted_values[max(rank, 1) - 1]
+
+
+_listeners = []
+_aggregator = MetricsAggregator()
+
+
+def add_listener(listener):
+    """
+    Makes `listener`, a function that takes a `CommandRecord`, get called after every command.
+    Exceptions raised by listeners are ignored.
+    """
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    _listeners.remove(listener)
+
+
+def emit(record):
+    """
+    Sends `record` to the aggregator and every listener.
+    """
+    for listener in [_aggregator] + _listeners:
+        try:
+            listener(record)
+        except Exception:
+            pass
+
+
+def get_metrics():
+    """
+    Returns the process-wide metrics for every kind of command (see
+    `MetricsAggregator.get_stats`).
+    """
+    return _aggregator.get_stats()
+
+
+def reset_metrics():
+    _aggregator.reset()
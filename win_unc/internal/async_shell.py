@@ -0,0 +1,83 @@
+"""
+An `asyncio` counterpart to `win_unc.internal.shell` for running commands without blocking the
+event loop.
+"""
+
+import asyncio
+
+from win_unc.errors import ShellCommandTimeoutError
+from win_unc.internal import shell
+from win_unc.internal.loggers import no_logging
+from win_unc.internal.net_errors import get_command_error
+
+
+async def run_async(command, logger=no_logging, timeout=None,
+                    max_output_size=shell.MAX_OUTPUT_SIZE):
+    """
+    Executes `command` and returns `stdout` and `stderr` as a tuple in that order.
+    This accepts the same arguments and raises the same errors as `win_unc.internal.shell.run`.
+
+    If the calling task is cancelled, `command` and all of its child processes are killed before
+    the cancellation propagates.
+    """
+    timeout = shell.get_default_timeout() if timeout is None else timeout
+    options = dict(stdin=asyncio.subprocess.PIPE,
+                   stdout=asyncio.subprocess.PIPE,
+                   stderr=asyncio.subprocess.PIPE,
+                   **shell.start_options())
+    if isinstance(command, str):
+        process = await asyncio.create_subprocess_shell(command, **options)
+    else:
+        process = await asyncio.create_subprocess_exec(*command, **options)
+
+    try:
+        stdout, stderr, _, _ = await asyncio.wait_for(
+            asyncio.gather(_read_bounded(process.stdout, max_output_size),
+                           _read_bounded(process.stderr, max_output_size),
+                           _feed_stdin(process),
+                           process.wait()),
+            timeout)
+    except asyncio.TimeoutError:
+        logger('Killing a shell command after {timeout} seconds.'.format(timeout=timeout))
+        await _kill(process)
+        raise ShellCommandTimeoutError(shell.format_command(command), timeout)
+    except BaseException:
+        await _kill(process)
+        raise
+
+    if process.returncode == shell.RETURN_CODE_SUCCESS:
+        return stdout, stderr
+    else:
+        raise get_command_error(shell.format_command(command), process.returncode, stderr)
+
+
+async def _read_bounded(stream, max_size):
+    """
+    Reads `stream` to its end and returns at most `max_size` bytes of it as text.
+    """
+    data = bytearray()
+    while True:
+        chunk = await stream.read(shell.READ_CHUNK_SIZE)
+        if not chunk:
+            return data.decode('utf-8', 'replace')
+        data += chunk[:max(max_size - len(data), 0)]
+
+
+async def _feed_stdin(process):
+    try:
+        process.stdin.write(shell.STDIN_INPUT)
+        await process.stdin.drain()
+        process.stdin.close()
+    except (IOError, OSError):
+        pass
+
+
+async def _kill(process):
+    if process.returncode is None:
+        shell.kill_process_tree_by_pid(process.pid)
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+    # Shield the final wait so that a second cancellation cannot leave a zombie process behind.
+    await asyncio.shield(process.wait())
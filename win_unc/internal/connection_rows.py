@@ -0,0 +1,33 @@
+"""
+Functions for turning the rows of a `NetUseTable` into connection objects. The classes of the
+objects can be chosen so that the `asyncio` counterparts can be returned too.
+"""
+
+from win_unc.connecting import UncDirectoryConnection, UncDirectoryMount
+
+
+def get_connection_or_mount(unc, disk_drive=None, connection_class=UncDirectoryConnection,
+                            mount_class=UncDirectoryMount):
+    """
+    Returns a `mount_class` object for `unc` mounted on `disk_drive`, or a `connection_class`
+    object for `unc` if `disk_drive` is `None`.
+    """
+    return mount_class(unc, disk_drive) if disk_drive else connection_class(unc)
+
+
+def get_connection_for_row(row, connection_class=UncDirectoryConnection,
+                           mount_class=UncDirectoryMount):
+    """
+    Returns what `get_connection_or_mount` returns for the connection in the `NetUseTable` row
+    `row`.
+    """
+    return get_connection_or_mount(row['remote'], row['local'], connection_class, mount_class)
+
+
+def get_first_connection(rows, connection_class=UncDirectoryConnection,
+                         mount_class=UncDirectoryMount):
+    """
+    Returns what `get_connection_for_row` returns for the first of `rows`, or `None` if `rows` is
+    empty.
+    """
+    return get_connection_for_row(rows[0], connection_class, mount_class) if rows else None
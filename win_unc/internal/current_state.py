@@ -1,11 +1,244 @@
-from win_unc.internal.net_use_table import parse_net_use_table
-from win_unc.internal.shell import run
+"""
+Functions for querying the current Windows session's state regarding UNC paths. Parsed `NET USE`
+snapshots are cached so that read-heavy callers can share a single `NetUseTable` instead of each
+spawning their own `NET USE` process. Callers that ask for a snapshot while `NET USE` is already
+running wait for that snapshot instead of running `NET USE` again.
+"""
 
+from threading import Lock
+from time import monotonic, perf_counter
 
-def get_current_net_use_table():
+from win_unc.backends import get_backend
+from win_unc.instrumentation import QUERY, CommandTimer
+from win_unc.internal.net_use_table import (
+    iter_net_use_rows, parse_net_use_lines, parse_net_use_table)
+from win_unc.internal.singleflight import SingleFlight
+
+
+# `net.exe` is run directly, without a shell.
+NET_USE_COMMAND = ['NET', 'USE']
+
+# By default snapshots are never reused, which matches the behavior of always running `NET USE`.
+DEFAULT_TTL = 0
+
+
+class NetUseTableCache(object):
+    """
+    Stores the most recent `NetUseTable` snapshot along with the time it was taken, and
+    coalesces concurrent requests for a new snapshot into a single `NET USE`.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        """
+        `ttl` is the number of seconds a snapshot may be reused before `NET USE` is run again.
+              A `ttl` of `0` disables caching.
+        """
+        self.ttl = ttl
+        self._lock = Lock()
+        self._table = None
+        self._taken_at = None
+        self._invalidated_at = None
+        self._generation = 0
+        self._flight = SingleFlight()
+
+    def get(self, max_age=None, fresh=False):
+        """
+        Returns a `NetUseTable` that is no older than `max_age` seconds. If `max_age` is `None`,
+        this cache's `ttl` is used instead. If `fresh` is `True`, a new snapshot is always taken.
+        """
+        table = None if fresh else self.peek(max_age)
+        if table is None:
+            table = self._flight.do(self._generation, self._take_snapshot)
+        return table
+
+    async def get_async(self, max_age=None, fresh=False):
+        """
+        The same as `get`, except that `NET USE` is run without blocking the event loop.
+        """
+        table = None if fresh else self.peek(max_age)
+        if table is None:
+            table = await self._flight.do_async(self._generation, self._take_snapshot_async)
+        return table
+
+    def peek(self, max_age=None):
+        """
+        Returns the cached `NetUseTable` if it is no older than `max_age` seconds or `None`
+        otherwise. If `max_age` is `None`, this cache's `ttl` is used instead.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        if max_age > 0:
+            with self._lock:
+                if self._table is not None and monotonic() - self._taken_at <= max_age:
+                    return self._table
+        return None
+
+    def put(self, table, taken_at=None):
+        """
+        Stores `table` as the most recent snapshot. `taken_at` is the `monotonic` time at which
+        the snapshot was started. An older snapshot will never replace a newer one, and a snapshot
+        started before the last `invalidate` (or in the same clock tick) is not stored.
+        """
+        taken_at = monotonic() if taken_at is None else taken_at
+        with self._lock:
+            if self._invalidated_at is not None and taken_at <= self._invalidated_at:
+                return
+            if self._taken_at is None or taken_at >= self._taken_at:
+                self._table = table
+                self._taken_at = taken_at
+
+    def invalidate(self):
+        """
+        Discards the cached snapshot so that the next request runs `NET USE` again. Requests made
+        after this will not wait for a `NET USE` that started before it.
+        """
+        with self._lock:
+            self._table = None
+            self._taken_at = None
+            self._invalidated_at = monotonic()
+            self._generation += 1
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of `NET USE` `queries` run for this cache and the
+        number of requests that were `coalesced` into a query that was already running.
+        """
+        stats = self._flight.get_stats()
+        return {'queries': stats['calls'], 'coalesced': stats['coalesced']}
+
+    def _take_snapshot(self):
+        taken_at = monotonic()
+        table = _query_net_use_table()
+        self.put(table, taken_at)
+        return table
+
+    async def _take_snapshot_async(self):
+        taken_at = monotonic()
+        table = await _query_net_use_table_async()
+        self.put(table, taken_at)
+        return table
+
+
+_cache = NetUseTableCache()
+
+
+def get_current_net_use_table(max_age=None, fresh=False):
     """
     Returns a `NetUseTable` that describes the current Windows session's status regarding
     all UNC paths.
+    `max_age` is the maximum age in seconds of a cached snapshot that may be returned. If it is
+              `None`, the TTL set with `set_net_use_table_ttl` is used.
+    `fresh` must be `True` to bypass the cache and always run `NET USE`.
+
+    The returned table may be shared with other callers and must not be modified.
+    """
+    return _cache.get(max_age, fresh)
+
+
+async def get_current_net_use_table_async(max_age=None, fresh=False):
+    """
+    The same as `get_current_net_use_table`, except that `NET USE` is run without blocking the
+    event loop.
+    """
+    return await _cache.get_async(max_age, fresh)
+
+
+def set_net_use_table_ttl(ttl):
+    """
+    Sets the number of seconds that a `NET USE` snapshot may be reused by default. A `ttl` of `0`
+    disables caching.
     """
-    stdout, _ = run('NET USE')
-    return parse_net_use_table(stdout)
+    _cache.ttl = ttl
+
+
+def get_net_use_table_ttl():
+    """
+    Returns the number of seconds that a `NET USE` snapshot may be reused by default.
+    """
+    return _cache.ttl
+
+
+def invalidate_net_use_table():
+    """
+    Discards any cached `NET USE` snapshot. This should be called whenever the session's UNC
+    connections are changed.
+    """
+    _cache.invalidate()
+
+
+def get_net_use_query_stats():
+    """
+    Returns a dictionary with the number of `NET USE` `queries` run to take snapshots and the
+    number of requests that were `coalesced` into a query that was already running.
+    """
+    return _cache.get_stats()
+
+
+def iter_current_net_use_rows():
+    """
+    Runs `NET USE` and yields each standardized row of its table as soon as it is read. The
+    cache is bypassed. If the caller stops iterating early, `NET USE` is killed.
+    """
+    lines = get_backend().iter_output_lines(NET_USE_COMMAND)
+    try:
+        for row in iter_net_use_rows(lines):
+            yield row
+    finally:
+        lines.close()
+
+
+def _query_net_use_table():
+    timer = CommandTimer(QUERY, NET_USE_COMMAND)
+    lines = _TimedLines(get_backend().iter_output_lines(NET_USE_COMMAND), timer)
+    try:
+        table = parse_net_use_lines(lines)
+        for _ in lines:
+            pass  # Read the rest of the output so that a failing `NET USE` raises an error.
+    except Exception as error:
+        timer.finish(error)
+        raise
+
+    # Parsing is interleaved with reading, so the parse time is whatever was not spent waiting.
+    timer.parse_time = perf_counter() - timer.started_at - lines.wait_time
+    timer.row_count = len(table.rows)
+    timer.finish()
+    return table
+
+
+async def _query_net_use_table_async():
+    timer = CommandTimer(QUERY, NET_USE_COMMAND)
+    try:
+        stdout, stderr = await get_backend().run_async(NET_USE_COMMAND)
+    except Exception as error:
+        timer.finish(error)
+        raise
+    timer.add_output(stdout, stderr)
+
+    parse_started_at = perf_counter()
+    table = parse_net_use_table(stdout)
+    timer.parse_time = perf_counter() - parse_started_at
+    timer.row_count = len(table.rows)
+    timer.finish()
+    return table
+
+
+class _TimedLines(object):
+    """
+    Wraps an iterator of output lines to count their size and the time spent waiting for them.
+    """
+
+    def __init__(self, lines, timer):
+        self.wait_time = 0
+        self._lines = lines
+        self._timer = timer
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started_at = perf_counter()
+        try:
+            line = next(self._lines)
+        finally:
+            self.wait_time += perf_counter() - started_at
+        self._timer.output_bytes += len(line.encode('utf-8')) + 2  # Includes the line ending.
+        return line
@@ -0,0 +1,89 @@
+"""
+Functions for turning what a failed `NET` command wrote to `stderr` into a typed error (see
+`win_unc.errors.NetCommandError`).
+
+`NET` reports Windows system errors like this:
+
+    System error 53 has occurred.
+
+    The network path was not found.
+
+and its own errors (numbers from 2100 on) like this:
+
+    The network connection could not be found.
+
+    More help is available by typing NET HELPMSG 2250.
+"""
+
+import re
+
+from win_unc import errors as E
+
+
+# The first `NET` error number. Errors from here on are reported with a `NET HELPMSG` hint.
+NERR_BASE = 2100
+
+NET_ERROR_CLASSES = [E.NetworkUnavailableError,
+                     E.NetworkNameNotFoundError,
+                     E.AccessDeniedError,
+                     E.LogonFailureError,
+                     E.CredentialConflictError,
+                     E.DeviceInUseError,
+                     E.ConnectionNotFoundError]
+
+_ERRORS_BY_NUMBER = dict((number, cls) for cls in NET_ERROR_CLASSES for number in cls.system_errors)
+
+_SYSTEM_ERROR_LINE = re.compile(r'System error (\d+) has occurred', re.IGNORECASE)
+_HELP_LINE = re.compile(r'NET HELPMSG (\d+)', re.IGNORECASE)
+# Localized versions of Windows translate the "System error" line, but it still has one number.
+_LOCALIZED_SYSTEM_ERROR_LINE = re.compile(r'^\D*(\d+)\D*$')
+
+
+def parse_system_error(stderr):
+    """
+    Returns a tuple of the system error number and its message from the `stderr` of a `NET`
+    command, or `None` if `stderr` does not contain an error number.
+    """
+    lines = [line.strip() for line in (stderr or '').splitlines() if line.strip()]
+    for index, line in enumerate(lines):
+        match = _SYSTEM_ERROR_LINE.search(line) or _HELP_LINE.search(line)
+        if match:
+            return _get_number_and_message(lines, index, match)
+
+    # A number in the message itself (e.g. in a server name) must not be taken for the error
+    # number, so the localized line is only looked for when no English line was found.
+    if len(lines) > 1:
+        match = _LOCALIZED_SYSTEM_ERROR_LINE.match(lines[0])
+        if match:
+            return _get_number_and_message(lines, 0, match)
+    return None
+
+
+def _get_number_and_message(lines, index, match):
+    message = ' '.join(lines[:index] + lines[index + 1:])
+    return int(match.group(1)), message
+
+
+def get_command_error(command, error_code, stderr):
+    """
+    Returns the error to raise for `command` exiting with `error_code` after writing `stderr`. This
+    is an instance of the `NetCommandError` subclass for the system error number in `stderr`, or a
+    plain `ShellCommandError` if there is no number.
+    """
+    parsed = parse_system_error(stderr)
+    if parsed is None:
+        return E.ShellCommandError(command, error_code, stderr)
+    number, message = parsed
+    cls = _ERRORS_BY_NUMBER.get(number, E.NetCommandError)
+    return cls(command, error_code, stderr, number, message)
+
+
+def format_system_error(number, message):
+    """
+    Returns the text `NET` writes to `stderr` for the system error `number` with `message`.
+    """
+    if number >= NERR_BASE:
+        text = '{message}\r\n\r\nMore help is available by typing NET HELPMSG {number}.\r\n\r\n'
+    else:
+        text = 'System error {number} has occurred.\r\n\r\n{message}\r\n\r\n'
+    return text.format(number=number, message=message)
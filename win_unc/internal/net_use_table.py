@@ -3,14 +3,12 @@ Contains functions and classes for parsing and storing the results of a `net use
 Windows. This table describes what the mounted UNC paths.
 """
 
-from copy import deepcopy
-
+from win_unc.cleaners import clean_drive_letter
 from win_unc.disk_drive import DiskDrive
 from win_unc.errors import InvalidDiskDriveError
-from win_unc.internal.utils import (
-    dict_map, drop_while, take_while, first, rfirst, not_,
-    rekey_dict, remove_nones_in_dict, subdict_matches)
-from win_unc.unc_directory import UncDirectory
+from win_unc.internal.utils import dict_map, rekey_dict
+from win_unc.interning import intern_disk_drive, intern_unc_directory
+from win_unc.unc_directory import UncDirectory, normalize_unc_path
 
 
 class NetUseColumn(object):
@@ -19,6 +17,8 @@ class NetUseColumn(object):
     includes the column's name and how to parse it from a row.
     """
 
+    __slots__ = ('name', 'start', 'end')
+
     def __init__(self, name, start, end):
         """
         `name` is the column's name.
@@ -44,21 +44,105 @@ class NetUseColumn(object):
             end=self.end)
 
 
+class NetUseRow(object):
+    """
+    Stores a single standardized row of a `NetUseTable`. Values can be read as attributes
+    (`row.remote`) or as items (`row['remote']`), and a row can be iterated over like the
+    dictionary it replaces. Unlike that dictionary, a row is never equal to a `dict`, even one with
+    the same items; compare `dict(row)` instead.
+    """
+
+    __slots__ = ('local', 'remote', 'status')
+
+    def __init__(self, local=None, remote=None, status=None):
+        """
+        `local` is a `DiskDrive` or `None` if the row has no local device.
+        `remote` is a `UncDirectory` or `None`.
+        `status` is a lower-case status string or `None`.
+        """
+        self.local = local
+        self.remote = remote
+        self.status = status
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def values(self):
+        return [getattr(self, key) for key in self.__slots__]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, NetUseRow):
+            return (self.local == other.local
+                    and self.remote == other.remote
+                    and self.status == other.status)
+        else:
+            return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None  # Rows are mutable, just like the dictionaries they replace.
+
+    def __repr__(self):
+        return '<{cls}: {local} {remote} {status}>'.format(
+            cls=self.__class__.__name__,
+            local=self.local,
+            remote=self.remote,
+            status=self.status)
+
+
 class NetUseTable(object):
     """
-    Stores parsed data from the output of `NET USE` and provides easy access methods.
+    Stores parsed data from the output of `NET USE` and provides easy access methods. Rows are
+    indexed by local drive, normalized remote path and status so that lookups do not scan the
+    whole table.
     """
 
     def __init__(self):
         self.rows = []
+        self._rows_by_local = {}
+        self._rows_by_remote = {}
+        self._rows_by_status = {}
+        self._rows_by_connection = {}
 
     def add_row(self, row):
         """
         Converts `row` to a standardized row and adds it to the table. The standardized row is returned.
         """
-        standardized_row = standardize_row(row)
-        self.rows.append(standardized_row)
-        return standardized_row
+        return self.add_standardized_row(standardize_row(row))
+
+    def add_standardized_row(self, row):
+        """
+        Adds `row`, which must already be standardized, to the table and returns it.
+        """
+        self.rows.append(row)
+        keys = get_row_keys(row)
+        for index, key in zip(self._get_indexes(), keys):
+            if key is not None:
+                index.setdefault(key, []).append(row)
+        self._rows_by_connection.setdefault(keys[:2], row)
+        return row
 
     def get_column(self, column):
         """
@@ -70,20 +154,36 @@ class NetUseTable(object):
         return self.get_column('remote')
 
     def get_connected_devices(self):
-        return [device for device in self.get_column('local') if device]
+        return [rows[0]['local'] for rows in self._rows_by_local.values()]
+
+    def get_rows_by_connection(self):
+        """
+        Returns a dictionary mapping the connection key of each row (see `get_connection_key`) to
+        the first row with that key. The dictionary must not be modified.
+        """
+        return self._rows_by_connection
 
     def get_matching_rows(self, local=None, remote=None, status=None):
         """
-        Returns a list of rows that match a `search_dict`.
-        `search_dict` is a dictionary with a subset of the keys in a row.
+        Returns a list of rows that match all of the given criteria in the order they were added.
+        `local` is a `DiskDrive` or a string representing one.
+        `remote` is a `UncDirectory` or a string representing one. Credentials are ignored.
+        `status` is a status string. Case is ignored.
+        Criteria that are `None` match every row.
         """
-        credless_remote = UncDirectory(remote.get_path()) if isinstance(remote, UncDirectory) else remote
-        test_row = construct_row_values(
-            remove_nones_in_dict(
-                {'local': local, 'remote': credless_remote, 'status': status}))
+        search_keys = (get_local_key(local), get_remote_key(remote), get_status_key(status))
+        candidates = [index.get(key, [])
+                      for index, key in zip(self._get_indexes(), search_keys)
+                      if key is not None]
+        if len(candidates) <= 1:
+            return list(candidates[0] if candidates else self.rows)
 
-        return [row for row in self.rows if subdict_matches(row, test_row)]
+        return [row for row in min(candidates, key=len)
+                if all(search_key is None or row_key == search_key
+                       for row_key, search_key in zip(get_row_keys(row), search_keys))]
 
+    def _get_indexes(self):
+        return self._rows_by_local, self._rows_by_remote, self._rows_by_status
 
 
 EMPTY_TABLE_INDICATOR = 'There are no entries in the list.'
@@ -100,14 +200,62 @@ MAP_RAW_COLUMNS_TO_STANDARD_COLUMNS = {
 }
 
 COLUMN_CONSTRUCTORS = {
-    'local':  lambda x: DiskDrive(x) if x else None,
-    'remote': lambda x: UncDirectory(x) if x else None,
+    'local':  lambda x: intern_disk_drive(x) if x else None,
+    'remote': lambda x: intern_unc_directory(x) if x else None,
     'status': lambda x: str(x).lower() if x else None,
 }
 
 
+def get_local_key(local):
+    """
+    Returns the index key for the local disk drive `local` or `None` if `local` is `None`.
+    """
+    if isinstance(local, DiskDrive):
+        return local.get_drive()
+    else:
+        return clean_drive_letter(local) + ':' if local is not None else None
+
+
+def get_remote_key(remote):
+    """
+    Returns the index key (the normalized path) for the remote UNC directory `remote` or `None`
+    if `remote` is `None`.
+    """
+    if isinstance(remote, UncDirectory):
+        return remote.get_normalized_path()
+    else:
+        return normalize_unc_path(remote) if remote is not None else None
+
+
+def get_status_key(status):
+    """
+    Returns the index key for the status `status` or `None` if `status` is `None`.
+    """
+    return str(status).lower() if status is not None else None
+
+
+def get_row_keys(row):
+    """
+    Returns a tuple of the local, remote and status index keys for the standardized row `row`.
+    """
+    return (row.local.get_drive() if row.local else None,
+            row.remote.get_normalized_path() if row.remote else None,
+            row.status)
+
+
+def get_connection_key(row):
+    """
+    Returns a tuple of the local and remote index keys for the standardized row `row`. Rows with
+    the same connection key describe the same connection, perhaps with different statuses.
+    """
+    return get_row_keys(row)[:2]
+
+
 def standardize_row(row):
-    return construct_row_values(standardize_row_keys(row))
+    """
+    Converts `row`, a dictionary of raw column values, into a `NetUseRow`.
+    """
+    return NetUseRow(**construct_row_values(standardize_row_keys(row)))
 
 
 def standardize_row_keys(row):
@@ -125,14 +273,10 @@ def is_line_separator(line):
     return line and all(char == '-' for char in line)
 
 
-def get_columns(lines):
+def get_columns(headings):
     """
-    Parses the column headers from a "net use" table into a list of `NetUseColumn` objects.
-    `lines` is a list of strings from the output of `NET USE`.
+    Parses the column headings line from a "net use" table into a list of `NetUseColumn` objects.
     """
-    header_iter = take_while(not_(is_line_separator), lines)
-    headings = rfirst(lambda x: x and x[0].isalpha(), header_iter)
-
     names = headings.split()
     starts = [headings.index(name) for name in names]
     ends = [right - 1 for right in starts[1:]] + [None]
@@ -141,19 +285,6 @@ def get_columns(lines):
             for name, start, end in zip(names, starts, ends)]
 
 
-def get_body(lines):
-    """
-    Extracts only the body of the "net use" table. The body is everything between the column
-    headers and the end of the output.
-    `lines` is a list of strings from the output of `NET USE`.
-    """
-    bottom = drop_while(not_(is_line_separator), lines)
-    is_last_line = lambda x: x and x != LAST_TABLE_LINE
-    return (take_while(is_last_line, bottom[1:])
-            if len(bottom) > 1
-            else [])
-
-
 def parse_singleline_row(line, columns):
     """
     Parses a single-line row from a "net use" table and returns a dictionary mapping from
@@ -169,54 +300,95 @@ def parse_multiline_row(line1, line2, columns):
     """
     Parses a row from a "net use" table that is represented by two lines instead of just one.
     `line1` is the first line for the row.
-    `line2` is the second line for the row.
+    `line2` is the second line for the row. It holds only the value of the last column.
     `columns` is the list of `NetUseColumn`s the would parse a single-line row, but not a
               multiline row.
     """
-    singleline_row = line1 + ' ' + line2.strip()
-    custom_columns = deepcopy(columns)
-    custom_columns[-2].end = len(line1)
-    custom_columns[-1].start = len(line1) + 1
-    return parse_singleline_row(singleline_row, custom_columns)
+    row = {column.name: column.extract(line1) for column in columns[:-2]}
+    row[columns[-2].name] = line1[columns[-2].start:].strip()
+    row[columns[-1].name] = line2.strip()
+    return row
 
 
-def build_net_use_table_from_parts(columns, body_lines):
+def iter_lines(string):
     """
-    Returns a new `NetUseTable` based on `columns` and `body_lines`.
-    `columns` is a list of `NetUseColumn` objects.
-    `body_lines` is a list of strings representing the raw rows of the table. At times, an actual
-                 table row spans multiple lines.
+    Yields each line in `string` without building a list of all the lines.
     """
-    table = NetUseTable()
-    for this_row, next_row in zip(body_lines, body_lines[1:] + ['']):
-        if not this_row.startswith(' '):
-            if next_row.startswith(' '):
-                row_dict = parse_multiline_row(this_row, next_row, columns)
-            else:
-                row_dict = parse_singleline_row(this_row, columns)
-
-            # Ignore invalid disk drives as they are probably printer mappings.
-            try:
-                table.add_row(row_dict)
-            except InvalidDiskDriveError:
-                pass
-
-    return table
+    start = 0
+    while start < len(string):
+        end = string.find('\n', start)
+        if end == -1:
+            end = len(string)
+        yield string[start:end]
+        start = end + 1
 
 
-def parse_populated_net_use_table(string):
+def iter_net_use_rows(lines):
+    """
+    Parses the output of `NET USE` one line at a time and yields a standardized row as soon as it
+    has been read completely. Rows with invalid disk drives (probably printer mappings) are
+    skipped.
+    `lines` is an iterable of strings from the output of `NET USE`. It is only read up to the end
+            of the table, so callers may stop early without reading the rest of the output.
     """
-    Parses a non-empty table from the output of `NET USE` and returns a `NetUseTable`.
+    headings, columns, pending = None, None, None
+
+    for line in lines:
+        line = line.rstrip()
+        if columns is None:
+            if EMPTY_TABLE_INDICATOR in line:
+                return
+            elif is_line_separator(line):
+                if headings is None:
+                    return
+                columns = get_columns(headings)
+            elif line and line[0].isalpha():
+                headings = line
+        elif not line or line == LAST_TABLE_LINE:
+            break
+        elif line.startswith(' '):
+            # A row's last column is wrapped onto its own line when the row is too long.
+            if pending is not None:
+                row = _standardize_or_skip(parse_multiline_row(pending, line, columns))
+                pending = None
+                if row is not None:
+                    yield row
+        else:
+            if pending is not None:
+                row = _standardize_or_skip(parse_singleline_row(pending, columns))
+                if row is not None:
+                    yield row
+            pending = line
+
+    if pending is not None:
+        row = _standardize_or_skip(parse_singleline_row(pending, columns))
+        if row is not None:
+            yield row
+
+
+def parse_net_use_lines(lines):
     """
-    lines = [line.rstrip() for line in string.split('\n')]
-    return build_net_use_table_from_parts(get_columns(lines), get_body(lines))
+    Parses `lines`, an iterable of strings from the output of `NET USE`, into a `NetUseTable` and
+    returns it.
+    """
+    table = NetUseTable()
+    for row in iter_net_use_rows(lines):
+        table.add_standardized_row(row)
+    return table
 
 
 def parse_net_use_table(string):
     """
     Parses `string` into a `NetUseTable` and returns it.
     """
-    if EMPTY_TABLE_INDICATOR in string:
-        return NetUseTable()
-    else:
-        return parse_populated_net_use_table(string)
+    return parse_net_use_lines(iter_lines(string))
+
+
+def _standardize_or_skip(row):
+    """
+    Returns the standardized form of `row` or `None` if it does not describe a disk drive.
+    """
+    try:
+        return standardize_row(row)
+    except InvalidDiskDriveError:
+        return None
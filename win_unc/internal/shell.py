@@ -1,29 +1,225 @@
-from subprocess import Popen, PIPE
+import os
+import signal
+from subprocess import DEVNULL, Popen, PIPE, TimeoutExpired, call, list2cmdline
+from threading import Thread, Timer
 
-from win_unc.errors import ShellCommandError
+from win_unc.errors import ShellCommandTimeoutError
 from win_unc.internal.loggers import no_logging
+from win_unc.internal.net_errors import get_command_error
 
 
 RETURN_CODE_SUCCESS = 0
 
+# Commands like `NET USE` may prompt for confirmation. Each new line accepts the default answer.
+STDIN_INPUT = b'\n' * 16
 
-def run(command, logger=no_logging):
+# The most output that will be kept from each of `stdout` and `stderr`. Anything beyond this is
+# read and discarded so that the command never blocks on a full pipe.
+MAX_OUTPUT_SIZE = 1024 * 1024
+
+READ_CHUNK_SIZE = 4096
+
+# How long to wait for the output pipes to close after a command has exited or been killed.
+PIPE_CLOSE_TIMEOUT = 5
+
+IS_WINDOWS = os.name == 'nt'
+
+_default_timeout = None
+
+
+def set_default_timeout(timeout):
     """
-    Executes `command` in the shell and returns `stdout` and `stderr` as a tuple in that order.
+    Sets the number of seconds that `run` waits for a command before killing it. `None` means
+    commands may run forever.
+    """
+    global _default_timeout
+    _default_timeout = timeout
 
-    `logger` may be a function that takes a string for custom logging purposes. It defaults to a
-    no-op.
+
+def get_default_timeout():
+    """
+    Returns the number of seconds that `run` waits for a command before killing it by default.
+    """
+    return _default_timeout
+
+
+class BoundedPipeReader(object):
     """
-    process = Popen(command, shell=True, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-    while process.poll() is None:
+    Reads a pipe to its end on a background thread and keeps at most `max_size` bytes of it.
+    """
+
+    def __init__(self, pipe, max_size=MAX_OUTPUT_SIZE):
+        self.pipe = pipe
+        self.max_size = max_size
+        self.truncated = False
+        self._data = bytearray()
+        self._thread = Thread(target=self._read)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _read(self):
         try:
-            # Write new lines in case the command prompts the us for some input.
-            process.stdin.write('\n'.encode('utf-8'))
-        except IOError:
+            for chunk in iter(lambda: self.pipe.read(READ_CHUNK_SIZE), b''):
+                room = self.max_size - len(self._data)
+                if len(chunk) > room:
+                    self.truncated = True
+                self._data += chunk[:max(room, 0)]
+        except (IOError, OSError, ValueError):
             pass
+        finally:
+            self.pipe.close()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def get_text(self):
+        return self._data.decode('utf-8', 'replace')
+
 
-    stdout, stderr = process.stdout.read().decode('utf-8'), process.stderr.read().decode('utf-8')
+def run(command, logger=no_logging, timeout=None, max_output_size=MAX_OUTPUT_SIZE):
+    """
+    Executes `command` and returns `stdout` and `stderr` as a tuple in that order.
+
+    `command` is a list of the program to run and its arguments, which is executed directly, or a
+              string, which is executed in the shell.
+    `logger` may be a function that takes a string for custom logging purposes. It defaults to a
+    no-op.
+    `timeout` is the number of seconds to wait for `command` to finish. If it is `None`, the
+              timeout set by `set_default_timeout` is used. When the timeout passes, `command` and
+              all of its child processes are killed and a `ShellCommandTimeoutError` is raised.
+    `max_output_size` is the maximum number of bytes kept from each of `stdout` and `stderr`.
+
+    If `command` exits with an error code, this raises a `ShellCommandError`, or a
+    `NetCommandError` if `stderr` contains a system error number.
+    """
+    timeout = _default_timeout if timeout is None else timeout
+    process = _start(command)
+    readers = [BoundedPipeReader(process.stdout, max_output_size),
+               BoundedPipeReader(process.stderr, max_output_size)]
+    _feed_stdin(process)
+
+    try:
+        process.wait(timeout)
+    except TimeoutExpired:
+        logger('Killing a shell command after {timeout} seconds.'.format(timeout=timeout))
+        kill_process_tree(process)
+        raise ShellCommandTimeoutError(format_command(command), timeout)
+    finally:
+        for reader in readers:
+            reader.join(PIPE_CLOSE_TIMEOUT)
+
+    stdout, stderr = [reader.get_text() for reader in readers]
     if process.returncode == RETURN_CODE_SUCCESS:
         return stdout, stderr
     else:
-        raise ShellCommandError(command, process.returncode)
+        raise get_command_error(format_command(command), process.returncode, stderr)
+
+
+def iter_output_lines(command, logger=no_logging, timeout=None):
+    """
+    Executes `command` and yields each line of its `stdout` as soon as it is written. The
+    arguments have the same meaning as for `run`.
+
+    Once all of the output has been read, this raises a `ShellCommandError` if `command` exited
+    with an error code or a `ShellCommandTimeoutError` if it was killed after `timeout` seconds.
+    If the caller stops iterating early, `command` is killed if it is still running.
+    """
+    timeout = _default_timeout if timeout is None else timeout
+    process = _start(command)
+    stderr_reader = BoundedPipeReader(process.stderr)
+    _feed_stdin(process)
+
+    timed_out = []
+    def kill_on_timeout():
+        timed_out.append(True)
+        logger('Killing a shell command after {timeout} seconds.'.format(timeout=timeout))
+        kill_process_tree_by_pid(process.pid)
+
+    watchdog = Timer(timeout, kill_on_timeout) if timeout is not None else None
+    if watchdog:
+        watchdog.daemon = True
+        watchdog.start()
+
+    finished = False
+    try:
+        for line in process.stdout:
+            yield line.decode('utf-8', 'replace').rstrip('\r\n')
+        process.wait()
+        finished = True
+    finally:
+        if watchdog:
+            watchdog.cancel()
+        if not finished and process.poll() is None:
+            kill_process_tree(process)
+        process.stdout.close()
+        stderr_reader.join(PIPE_CLOSE_TIMEOUT)
+
+    if timed_out:
+        raise ShellCommandTimeoutError(format_command(command), timeout)
+    elif process.returncode != RETURN_CODE_SUCCESS:
+        raise get_command_error(format_command(command), process.returncode,
+                                stderr_reader.get_text())
+
+
+def format_command(command):
+    """
+    Returns `command`, a list of arguments or a string, as a Windows command line string for
+    display. Arguments are quoted the way the program they are passed to will split them again.
+    """
+    return command if isinstance(command, str) else list2cmdline(command)
+
+
+def kill_process_tree(process):
+    """
+    Kills `process` and every process that it started.
+    """
+    kill_process_tree_by_pid(process.pid)
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+
+
+def kill_process_tree_by_pid(pid):
+    """
+    Kills the process with the ID `pid` and every process that it started. The process must have
+    been started by `start_options`.
+    """
+    try:
+        if IS_WINDOWS:
+            call(['TASKKILL', '/F', '/T', '/PID', str(pid)], stdout=DEVNULL, stderr=DEVNULL)
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def start_options():
+    """
+    Returns the keyword arguments needed to start a process whose whole process tree can be
+    killed by `kill_process_tree_by_pid`.
+    """
+    # On POSIX, a new session makes the command the leader of its own process group so that the
+    # whole group can be killed on a timeout.
+    return {} if IS_WINDOWS else {'start_new_session': True}
+
+
+def _start(command):
+    # Lists of arguments are executed directly so that no shell process is needed.
+    return Popen(command, shell=isinstance(command, str), stdin=PIPE, stdout=PIPE, stderr=PIPE,
+                 **start_options())
+
+
+def _feed_stdin(process):
+    """
+    Writes `STDIN_INPUT` to `process` and closes its `stdin` without blocking the caller.
+    """
+    def feed():
+        try:
+            process.stdin.write(STDIN_INPUT)
+            process.stdin.close()
+        except (IOError, OSError, ValueError):
+            pass
+
+    thread = Thread(target=feed)
+    thread.daemon = True
+    thread.start()
@@ -0,0 +1,104 @@
+"""
+Coalesces concurrent calls of the same operation so that it runs only once at a time.
+"""
+
+import asyncio
+from threading import Event, Lock
+
+
+class _Call(object):
+    """
+    An in-flight call that other threads can wait on.
+    """
+
+    __slots__ = ('event', 'result', 'error', 'interrupted')
+
+    def __init__(self):
+        self.event = Event()
+        self.result = None
+        self.error = None
+        self.interrupted = False  # `True` if the call raised a `BaseException` that is no error.
+
+
+class SingleFlight(object):
+    """
+    Runs at most one call per key at a time. Callers that arrive while a call with the same key is
+    running wait for that call and share its result (or error) instead of starting their own.
+
+    Threads coalesce with threads through `do`. Tasks in the same event loop coalesce with each
+    other through `do_async`.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = Lock()
+        self._calls = {}
+        self._tasks = {}
+
+    def do(self, key, func):
+        """
+        Returns the result of calling `func` with no arguments, or of the call with the same `key`
+        that is already running. Errors raised by `func` are raised to every waiting caller. Other
+        exceptions, such as `KeyboardInterrupt`, are only raised to the caller that ran `func`, and
+        the waiting callers start the call again.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception as error:
+                call.error = error
+            except BaseException:
+                call.interrupted = True
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+        else:
+            call.event.wait()
+            if call.interrupted:
+                return self.do(key, func)
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(self, key, func):
+        """
+        The same as `do`, except that `func` is a coroutine function. Cancelling one waiting task
+        does not cancel the shared call.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get((loop, key))
+            if task is None:
+                task = self._tasks[(loop, key)] = loop.create_task(func())
+                task.add_done_callback(lambda _: self._forget_task(loop, key, task))
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of `calls` that were run and the number of callers
+        that were `coalesced` into a call that was already running.
+        """
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced}
+
+    def _forget_task(self, loop, key, task):
+        with self._lock:
+            if self._tasks.get((loop, key)) is task:
+                del self._tasks[(loop, key)]
@@ -0,0 +1,128 @@
+"""
+An opt-in cache of `DiskDrive` and credential-less `UncDirectory` objects. When interning is
+enabled, constructing one of these objects from a string that was seen recently returns the same
+validated object instead of cleaning and validating the string again.
+
+Interned objects are shared, so they must never be modified.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+
+from win_unc.disk_drive import DiskDrive
+from win_unc.unc_directory import UncDirectory
+
+
+DEFAULT_MAXSIZE = 1024
+
+
+class InternCache(object):
+    """
+    A bounded, thread-safe cache that discards the least recently used object when it is full.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        """
+        `maxsize` is the most objects the cache will hold.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._objects = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, factory):
+        """
+        Returns the cached object for `key`. If there is none, `factory` is called with `key` to
+        create it. Errors raised by `factory` are not cached.
+        """
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is not None:
+                self.hits += 1
+                self._objects.move_to_end(key)
+                return obj
+            self.misses += 1
+
+        obj = factory(key)
+        with self._lock:
+            self._objects[key] = obj
+            self._objects.move_to_end(key)
+            while len(self._objects) > self.maxsize:
+                self._objects.popitem(last=False)
+        return obj
+
+    def clear(self):
+        """
+        Discards all cached objects and resets the counters.
+        """
+        with self._lock:
+            self._objects.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the `hits`, `misses`, `size` and `maxsize` of this cache.
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'size': len(self._objects),
+                    'maxsize': self.maxsize}
+
+
+_disk_drives = None
+_unc_directories = None
+
+
+def enable_interning(maxsize=DEFAULT_MAXSIZE):
+    """
+    Starts interning `DiskDrive` and `UncDirectory` objects created by this library. Each kind of
+    object is kept in its own cache of at most `maxsize` objects.
+    """
+    global _disk_drives, _unc_directories
+    _disk_drives = InternCache(maxsize)
+    _unc_directories = InternCache(maxsize)
+
+
+def disable_interning():
+    """
+    Stops interning objects and discards everything that was interned.
+    """
+    global _disk_drives, _unc_directories
+    _disk_drives = None
+    _unc_directories = None
+
+
+def is_interning_enabled():
+    return _disk_drives is not None
+
+
+def get_interning_stats():
+    """
+    Returns a dictionary with the statistics (see `InternCache.get_stats`) of the `'disk_drives'`
+    and `'unc_directories'` caches or `None` if interning is disabled.
+    """
+    disk_drives, unc_directories = _disk_drives, _unc_directories
+    if disk_drives is None:
+        return None
+    return {'disk_drives': disk_drives.get_stats(),
+            'unc_directories': unc_directories.get_stats()}
+
+
+def intern_disk_drive(drive):
+    """
+    Returns a `DiskDrive` for the string `drive`. This may raise an `InvalidDiskDriveError`.
+    """
+    cache = _disk_drives
+    return cache.get(drive, DiskDrive) if cache is not None else DiskDrive(drive)
+
+
+def intern_unc_directory(path):
+    """
+    Returns a `UncDirectory` without credentials for the string `path`. This may raise an
+    `InvalidUncPathError`.
+    """
+    cache = _unc_directories
+    return cache.get(path, UncDirectory) if cache is not None else UncDirectory(path)
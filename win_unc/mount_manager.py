@@ -0,0 +1,269 @@
+"""
+Contains a manager that shares mounts of UNC directories between the parts of a program that use
+them, instead of mounting and unmounting a directory for each use.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock, Timer
+
+from win_unc.connecting import UncDirectoryMount
+from win_unc.errors import NoDrivesAvailableError, ShellCommandError
+from win_unc.internal.loggers import no_logging
+from win_unc.query import get_connection_for_unc_directory
+
+
+DEFAULT_IDLE_TIMEOUT = 60
+
+
+class MountLease(object):
+    """
+    A claim on a mount handed out by `MountManager.acquire`. The mount stays mounted at least until
+    the lease is released.
+    """
+
+    def __init__(self, manager, entry):
+        self.mount = entry.mount
+        self.disk_drive = entry.mount.disk_drive
+        self._manager = manager
+        self._entry = entry
+        self._released = False
+
+    def get_path(self):
+        """
+        Returns the path of the leased mount's disk drive (e.g. "Z:").
+        """
+        return self.disk_drive.get_drive()
+
+    def release(self):
+        """
+        Gives up this lease. Releasing a lease more than once has no effect.
+        """
+        if not self._released:
+            self._released = True
+            self._manager._release(self._entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __repr__(self):
+        return '<{cls}: {mount}>'.format(cls=self.__class__.__name__, mount=self.mount)
+
+
+class _ManagedMount(object):
+    """
+    The manager's record of one UNC directory.
+    """
+
+    def __init__(self, unc):
+        self.unc = unc
+        self.mount = None
+        self.owned = False  # `True` if the manager mounted it and must unmount it.
+        self.leases = 0
+        self.released_at = None
+        self.timer = None  # Unmounts the mount once it has been idle for the manager's timeout.
+        self.lock = Lock()  # Held while mounting or unmounting.
+
+
+class MountManager(object):
+    """
+    Hands out leases on mounted UNC directories. Each UNC directory is mounted when its first lease
+    is acquired and stays mounted while any lease is held. After the last lease is released, the
+    mount is kept for `idle_timeout` seconds in case it is needed again. When no drive letters are
+    left, idle mounts are unmounted starting with the least recently used.
+
+    UNC directories that were already mounted when first leased are used as they are and are never
+    unmounted by the manager.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, logger=no_logging, timeout=None):
+        """
+        `idle_timeout` is the number of seconds to keep a mount after its last lease is released.
+                       If it is `0`, the mount is unmounted as soon as its last lease is released.
+                       If it is `None`, idle mounts are only unmounted to free drive letters or by
+                       `evict_idle` or `close`.
+        `logger` and `timeout` are passed to each `UncDirectoryMount`.
+        """
+        self.idle_timeout = idle_timeout
+        self.logger = logger
+        self.timeout = timeout
+        self._entries = OrderedDict()  # Ordered from least to most recently used.
+        self._evictions = 0
+        self._lock = Lock()
+
+    def acquire(self, unc, disk_drive=None):
+        """
+        Returns a `MountLease` on a mount of `unc`, mounting it if needed.
+        `unc` is a `UncDirectory`.
+        `disk_drive` is the `DiskDrive` to mount `unc` to if it is not mounted yet. If it is `None`,
+                     an available drive is chosen.
+
+        This raises a `NoDrivesAvailableError` if there are no drive letters left even after
+        unmounting every idle mount, or a `ShellCommandError` if mounting fails.
+        """
+        with self._lock:
+            entry = self._entries.get(unc)
+            if entry is None:
+                entry = self._entries[unc] = _ManagedMount(unc)
+            self._entries.move_to_end(unc)
+            entry.leases += 1
+            self._cancel_timer(entry)
+
+        try:
+            with entry.lock:
+                if entry.mount is None:
+                    self._mount(entry, disk_drive)
+        except BaseException:
+            self._release(entry)
+            raise
+        return MountLease(self, entry)
+
+    def evict_idle(self, max_idle=0):
+        """
+        Unmounts every mount that has had no leases for at least `max_idle` seconds. Returns the
+        number of mounts that were removed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [entry for entry in self._entries.values()
+                    if entry.leases == 0 and now - entry.released_at >= max_idle]
+        return sum(self._evict(entry) for entry in idle)
+
+    def close(self):
+        """
+        Unmounts every idle mount. Mounts that are still leased are not affected.
+        """
+        self.evict_idle()
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of managed `mounts`, the number of active `leases` and
+        the number of `evictions` so far.
+        """
+        with self._lock:
+            return {'mounts': sum(1 for entry in self._entries.values() if entry.mount),
+                    'leases': sum(entry.leases for entry in self._entries.values()),
+                    'evictions': self._evictions}
+
+    def _mount(self, entry, disk_drive):
+        existing = get_connection_for_unc_directory(entry.unc)
+        if existing is not None and existing.disk_drive is not None:
+            entry.mount = UncDirectoryMount(entry.unc, existing.disk_drive, logger=self.logger,
+                                            timeout=self.timeout)
+            entry.owned = False
+            return
+
+        # Selecting a drive and mounting on it both fail if no drives are left, e.g. when the
+        # selected drive was taken by someone else before it was mounted.
+        while True:
+            try:
+                mount = UncDirectoryMount(entry.unc, disk_drive, logger=self.logger,
+                                          timeout=self.timeout)
+                mount.mount()
+                break
+            except NoDrivesAvailableError:
+                if not self._evict_least_recently_used():
+                    raise
+
+        entry.mount = mount
+        entry.owned = True
+
+    def _release(self, entry):
+        timer = None
+        with self._lock:
+            entry.leases -= 1
+            entry.released_at = time.monotonic()
+            if entry.leases or entry.mount is None:
+                if not entry.leases and self._entries.get(entry.unc) is entry:
+                    del self._entries[entry.unc]
+                return
+            if self.idle_timeout:
+                # Replaces the timer of an earlier release, so that each idle mount has at most one
+                # waiting thread however often it is leased and released.
+                self._cancel_timer(entry)
+                timer = entry.timer = Timer(self.idle_timeout, self._evict_if_idle, [entry])
+                timer.daemon = True
+
+        if self.idle_timeout == 0:
+            self._evict(entry)
+        elif timer is not None:
+            timer.start()
+
+    @staticmethod
+    def _cancel_timer(entry):
+        if entry.timer is not None:
+            entry.timer.cancel()
+            entry.timer = None
+
+    def _evict_if_idle(self, entry):
+        with self._lock:
+            idle = (entry.leases == 0
+                    and time.monotonic() - entry.released_at >= self.idle_timeout)
+        if idle:
+            self._evict(entry)
+
+    def _evict_least_recently_used(self):
+        """
+        Unmounts the least recently used idle mount. Returns `False` if there were none.
+        """
+        with self._lock:
+            idle = [entry for entry in self._entries.values() if entry.leases == 0 and entry.owned]
+        return any(self._evict(entry, blocking=False) for entry in idle)
+
+    def _evict(self, entry, blocking=True):
+        """
+        Unmounts `entry` if it is still idle and forgets it. Returns `True` if it was removed.
+        If `blocking` is `False` and another thread is mounting or unmounting `entry`, nothing is
+        done.
+        """
+        if not entry.lock.acquire(blocking):
+            return False
+        try:
+            with self._lock:
+                if entry.leases or entry.mount is None:
+                    return False
+                mount, entry.mount = entry.mount, None
+                self._evictions += 1
+                self._cancel_timer(entry)
+
+            if entry.owned:
+                try:
+                    mount.unmount()
+                except ShellCommandError as error:
+                    self.logger('Failed to unmount "{unc}": {error}'.format(unc=entry.unc,
+                                                                            error=error))
+
+            with self._lock:
+                if not entry.leases and self._entries.get(entry.unc) is entry:
+                    del self._entries[entry.unc]
+            return True
+        finally:
+            entry.lock.release()
+
+
+_manager = MountManager()
+
+
+def get_mount_manager():
+    """
+    Returns the process-wide `MountManager`.
+    """
+    return _manager
+
+
+def set_mount_manager(manager):
+    """
+    Replaces the process-wide `MountManager` with `manager`.
+    """
+    global _manager
+    _manager = manager
+
+
+def acquire_mount(unc, disk_drive=None):
+    """
+    Returns a `MountLease` from the process-wide `MountManager` (see `MountManager.acquire`).
+    """
+    return _manager.acquire(unc, disk_drive)
@@ -0,0 +1,113 @@
+"""
+Contains an index for finding the connection that a file path is on.
+"""
+
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+from win_unc.internal.net_use_table import get_local_key
+from win_unc.unc_directory import normalize_unc_path
+
+
+class _Node(object):
+    __slots__ = ('children', 'rows')
+
+    def __init__(self):
+        self.children = {}
+        self.rows = None
+
+
+class UncPathIndex(object):
+    """
+    A trie of the rows of a `NetUseTable` keyed on the components of their normalized remote
+    paths. Finding the row whose remote path is the longest prefix of a path takes time
+    proportional to the number of components in the path, not to the number of rows.
+    """
+
+    def __init__(self, net_use=None):
+        """
+        `net_use` is a `NetUseTable` whose rows are added to the index, or `None` for an empty
+                  index.
+        """
+        self._root = _Node()
+        self._rows_by_local = {}
+        if net_use is not None:
+            for row in net_use.rows:
+                self.add_row(row)
+
+    def add_row(self, row):
+        """
+        Adds `row`, a standardized `NetUseTable` row, to this index.
+        """
+        if row.remote is not None:
+            node = self._root
+            for component in split_unc_path(row.remote.get_normalized_path()):
+                node = node.children.setdefault(component, _Node())
+            if node.rows is None:
+                node.rows = []
+            node.rows.append(row)
+        if row.local is not None:
+            self._rows_by_local.setdefault(row.local.get_drive(), []).append(row)
+
+    def get_rows(self, path):
+        """
+        Returns the rows for the connection that contains `path` or an empty list if there is
+        none. `path` is a string like "\\\\server\\share\\dir\\file.txt" or "Z:\\dir\\file.txt". If
+        several connections contain a UNC `path`, the rows for the longest remote path are
+        returned.
+        """
+        path = path.strip().replace('/', '\\')
+        if len(path) >= 2 and path[1] == ':':
+            return list(self._rows_by_local.get(get_local_key(path[0]), []))
+        elif not path.startswith('\\\\'):
+            return []
+
+        node, rows = self._root, []
+        for component in split_unc_path(normalize_unc_path(path)):
+            node = node.children.get(component)
+            if node is None:
+                break
+            if node.rows:
+                rows = node.rows
+        return list(rows)
+
+    def get_row(self, path):
+        """
+        Returns the row for the connection that contains `path` or `None` if there is none. Rows
+        that are mounted on a disk drive are preferred.
+        """
+        rows = self.get_rows(path)
+        return next((row for row in rows if row.local is not None), rows[0] if rows else None)
+
+    def get_rows_for_paths(self, paths):
+        """
+        Returns a dictionary mapping each path in the iterable `paths` to what `get_row` returns
+        for it.
+        """
+        return dict((path, self.get_row(path)) for path in paths)
+
+
+def split_unc_path(path):
+    """
+    Returns a list of the components of the UNC path `path` without its leading backslashes.
+    """
+    return path.lstrip('\\').split('\\')
+
+
+_indexes = WeakKeyDictionary()
+_indexes_lock = Lock()
+
+
+def get_path_index(net_use):
+    """
+    Returns a `UncPathIndex` for the `NetUseTable` `net_use`. The index is built the first time it
+    is needed for each table and shared after that, so `net_use` must not be modified after this is
+    called.
+    """
+    with _indexes_lock:
+        index = _indexes.get(net_use)
+    if index is None:
+        index = UncPathIndex(net_use)
+        with _indexes_lock:
+            index = _indexes.setdefault(net_use, index)
+    return index
@@ -0,0 +1,132 @@
+"""
+Contains a class for translating paths between their UNC form (e.g. "\\\\server\\share\\file.txt")
+and their mounted form (e.g. "Z:\\file.txt").
+"""
+
+from threading import Lock
+from time import monotonic
+
+from win_unc.internal.current_state import get_current_net_use_table
+from win_unc.path_index import UncPathIndex, split_unc_path
+
+
+# The default number of seconds that a `PathTranslator` may use a `NET USE` snapshot for.
+DEFAULT_MAX_AGE = 5
+
+
+class _PrefixMaps(object):
+    """
+    The prefix maps a `PathTranslator` builds from one `NetUseTable`.
+    """
+
+    __slots__ = ('table', 'mounted_index', 'remote_by_drive')
+
+    def __init__(self, table):
+        self.table = table
+        self.mounted_index = UncPathIndex()
+        self.remote_by_drive = {}
+        for row in table.rows:
+            if row.local is not None and row.remote is not None:
+                self.mounted_index.add_row(row)
+                self.remote_by_drive.setdefault(row.local.get_drive()[0], row.remote.get_path())
+
+
+class PathTranslator(object):
+    """
+    Translates paths between UNC paths and paths on mounted disk drives using the mounts in the
+    current `NET USE` table. The mounts are turned into prefix maps once per snapshot, so each
+    translation takes time proportional to the depth of the path, not to the number of mounts.
+    """
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE):
+        """
+        `max_age` is the number of seconds a `NET USE` snapshot may be used for before the
+                  translator checks for a newer one. The prefix maps are only rebuilt if the
+                  snapshot it gets is not the one it already has.
+        """
+        self.max_age = max_age
+        self._maps = None
+        self._checked_at = None
+        self._lock = Lock()
+
+    def to_drive_path(self, path):
+        """
+        Returns `path`, a UNC path string, translated to a path on the disk drive that its share is
+        mounted on or `None` if no mount contains it. If several mounts contain `path`, the one
+        with the longest remote path is used.
+        For example, "\\\\server\\share\\dir\\file.txt" is translated to "Z:\\dir\\file.txt" if
+        "\\\\server\\share" is mounted on "Z:".
+        """
+        return self._to_drive_path(self._get_maps(), path)
+
+    def to_unc_path(self, path):
+        """
+        Returns `path`, a path string on a disk drive, translated to a UNC path or `None` if its
+        disk drive is not a mounted UNC directory.
+        For example, "Z:\\dir\\file.txt" is translated to "\\\\server\\share\\dir\\file.txt" if
+        "\\\\server\\share" is mounted on "Z:".
+        """
+        return self._to_unc_path(self._get_maps(), path)
+
+    def to_drive_paths(self, paths):
+        """
+        Yields each path in the iterable `paths` translated by `to_drive_path`, or unchanged if it
+        cannot be translated. `paths` may be an endless stream. The snapshot is refreshed as
+        `max_age` passes.
+        """
+        for path in paths:
+            translated = self._to_drive_path(self._get_maps(), path)
+            yield path if translated is None else translated
+
+    def to_unc_paths(self, paths):
+        """
+        Yields each path in the iterable `paths` translated by `to_unc_path`, or unchanged if it
+        cannot be translated.
+        """
+        for path in paths:
+            translated = self._to_unc_path(self._get_maps(), path)
+            yield path if translated is None else translated
+
+    def refresh(self):
+        """
+        Rebuilds the prefix maps from a new `NET USE` snapshot.
+        """
+        self._update(get_current_net_use_table(fresh=True))
+
+    def _get_maps(self):
+        maps, checked_at = self._maps, self._checked_at
+        if maps is None or monotonic() - checked_at > self.max_age:
+            maps = self._update(get_current_net_use_table(self.max_age))
+        return maps
+
+    def _update(self, table):
+        with self._lock:
+            if self._maps is None or self._maps.table is not table:
+                self._maps = _PrefixMaps(table)
+            self._checked_at = monotonic()
+            return self._maps
+
+    @staticmethod
+    def _to_drive_path(maps, path):
+        path = path.strip().replace('/', '\\')
+        if not path.startswith('\\\\'):
+            return None
+        row = maps.mounted_index.get_row(path)
+        if row is None:
+            return None
+
+        depth = len(split_unc_path(row.remote.get_normalized_path()))
+        rest = split_unc_path(path)[depth:]
+        return row.local.get_drive() + '\\' + '\\'.join(rest)
+
+    @staticmethod
+    def _to_unc_path(maps, path):
+        path = path.strip().replace('/', '\\')
+        if len(path) < 2 or path[1] != ':':
+            return None
+
+        remote = maps.remote_by_drive.get(path[0].upper())
+        if remote is None:
+            return None
+        rest = path[2:].lstrip('\\')
+        return remote + '\\' + rest if rest else remote
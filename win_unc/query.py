@@ -1,41 +1,89 @@
-from win_unc.connecting import UncDirectoryConnection, UncDirectoryMount
-from win_unc.internal.current_state import get_current_net_use_table
+from win_unc.connecting import UncDirectoryMount
+from win_unc.path_index import get_path_index
+from win_unc.internal.connection_rows import get_connection_for_row, get_first_connection
+from win_unc.internal.current_state import (
+    get_current_net_use_table, get_net_use_query_stats, get_net_use_table_ttl,
+    invalidate_net_use_table, set_net_use_table_ttl)
 
 
-__all__ = ['get_current_connections', 'get_connection_for_unc_directory', 'get_connection_for_disk_drive']
+__all__ = ['get_current_connections', 'get_connection_for_unc_directory', 'get_connection_for_disk_drive',
+           'get_connections_for_unc_directories', 'get_connections_for_disk_drives',
+           'get_connection_for_path', 'get_connections_for_paths',
+           'get_net_use_table_ttl', 'set_net_use_table_ttl', 'invalidate_net_use_table',
+           'get_net_use_query_stats']
 
 
-def get_current_connections():
+def get_current_connections(max_age=None, fresh=False):
     """
     Returns a list of `UncDirectoryConnection` or `UncDirectoryMount` objects. Each object
     represents a connection or mount currently recognized by the system.
+    `max_age` and `fresh` control the reuse of cached `NET USE` snapshots (see
+    `set_net_use_table_ttl`).
     """
-    net_use = get_current_net_use_table()
-    return [_get_connection_or_mount(row['remote'], row['local']) for row in net_use.rows]
+    net_use = get_current_net_use_table(max_age, fresh)
+    return [get_connection_for_row(row) for row in net_use.rows]
 
 
-def get_connection_for_unc_directory(unc):
+def get_connection_for_unc_directory(unc, max_age=None, fresh=False):
     """
     Returns a `UncDirectoryConnection` or `UncDirectoryMount` representing a connected or mounted
     UNC directory that matches a given UNC directory (`unc`) or `None` if no system connections or
     mounts match `unc`.
     `unc` is a `UncDirectory`.
     """
-    net_use = get_current_net_use_table()
-    matching = net_use.get_matching_rows(remote=unc)
-    return _get_connection_or_mount(matching[0]['remote'], matching[0]['local']) if matching else None
+    net_use = get_current_net_use_table(max_age, fresh)
+    return get_first_connection(net_use.get_matching_rows(remote=unc))
 
 
-def get_connection_for_disk_drive(disk_drive):
+def get_connection_for_disk_drive(disk_drive, max_age=None, fresh=False):
     """
     Returns a `UncDirectoryMount` representing a mounted UNC directory that matches a disk drive
     (`disk_drive`) or `None` if no system mounts match `disk_drive`.
     `disk_drive` is a `DiskDrive`.
     """
-    net_use = get_current_net_use_table()
+    net_use = get_current_net_use_table(max_age, fresh)
     matching = net_use.get_matching_rows(local=disk_drive)
     return UncDirectoryMount(matching[0]['remote'], matching[0]['local']) if matching else None
 
 
-def _get_connection_or_mount(unc, disk_drive=None):
-    return UncDirectoryMount(unc, disk_drive) if disk_drive else UncDirectoryConnection(unc)
+def get_connections_for_unc_directories(uncs, max_age=None, fresh=False):
+    """
+    Returns a dictionary mapping each `UncDirectory` in the iterable `uncs` to what
+    `get_connection_for_unc_directory` would return for it. All of them are looked up in the
+    same `NET USE` snapshot.
+    """
+    net_use = get_current_net_use_table(max_age, fresh)
+    return {unc: get_first_connection(net_use.get_matching_rows(remote=unc)) for unc in uncs}
+
+
+def get_connections_for_disk_drives(disk_drives, max_age=None, fresh=False):
+    """
+    Returns a dictionary mapping each `DiskDrive` in the iterable `disk_drives` to what
+    `get_connection_for_disk_drive` would return for it. All of them are looked up in the same
+    `NET USE` snapshot.
+    """
+    net_use = get_current_net_use_table(max_age, fresh)
+    return {disk_drive: get_first_connection(net_use.get_matching_rows(local=disk_drive))
+            for disk_drive in disk_drives}
+
+
+def get_connection_for_path(path, max_age=None, fresh=False):
+    """
+    Returns a `UncDirectoryConnection` or `UncDirectoryMount` for the connection that contains
+    `path` or `None` if no connection does. Mounts are preferred over connections without a disk
+    drive.
+    `path` is a string like "\\\\server\\share\\dir\\file.txt" or "Z:\\dir\\file.txt". If several
+           connections contain a UNC `path`, the one with the longest remote path is returned.
+    """
+    return get_connections_for_paths([path], max_age, fresh)[path]
+
+
+def get_connections_for_paths(paths, max_age=None, fresh=False):
+    """
+    Returns a dictionary mapping each path in the iterable `paths` to what
+    `get_connection_for_path` would return for it. All of them are looked up in the same
+    `NET USE` snapshot.
+    """
+    index = get_path_index(get_current_net_use_table(max_age, fresh))
+    rows = index.get_rows_for_paths(paths)
+    return dict((path, get_first_connection([row] if row else [])) for path, row in rows.items())
@@ -0,0 +1,156 @@
+"""
+Contains functions for bringing the system's UNC connections in line with a desired set of
+connections using as few shell commands as possible.
+"""
+
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from win_unc.connecting import DEFAULT_MAX_WORKERS, UncDirectoryConnection, UncDirectoryMount
+from win_unc.disk_drive import DiskDrive
+from win_unc.internal.current_state import get_current_net_use_table
+from win_unc.internal.net_use_table import get_connection_key, get_local_key, get_remote_key
+from win_unc.unc_credentials import UncCredentials
+from win_unc.unc_directory import UncDirectory
+
+
+KEEP = 'keep'
+CONNECT = 'connect'
+DISCONNECT = 'disconnect'
+REMAP = 'remap'
+
+# The `NET USE` status of a connection whose last attempt to connect failed.
+UNAVAILABLE = 'unavailable'
+
+# One step of a reconciliation plan.
+# `action` is `KEEP`, `CONNECT`, `DISCONNECT` or `REMAP`.
+# `connection` is the `UncDirectoryConnection` to keep, connect or disconnect, or the one to connect
+#              in place of `previous` for `REMAP`.
+# `previous` is the connection to disconnect first for `REMAP`, otherwise `None`. It is the
+#            `UncDirectoryMount` that is using the disk drive, or the desired connection itself if
+#            its status is "Unavailable".
+PlannedAction = namedtuple('PlannedAction', ['action', 'connection', 'previous'])
+
+# The outcome of one `PlannedAction`.
+# `changed` is `True` if shell commands were run successfully for `planned`.
+# `error` is the exception raised while carrying out `planned` or `None` if there was no error.
+ActionResult = namedtuple('ActionResult', ['planned', 'changed', 'error'])
+
+
+def plan_reconciliation(desired, prune=False, net_use=None):
+    """
+    Returns a list of `PlannedAction`s that would make the system's connections match `desired`.
+    `desired` is an iterable of `UncDirectoryConnection` objects or of `(UncDirectory, DiskDrive)`
+              pairs whose `DiskDrive` may be `None`.
+    `prune` must be `True` to also disconnect every connection that is not in `desired`.
+    Desired connections that exist with the status "Unavailable" are remapped.
+    `net_use` is the `NetUseTable` to compare against. If it is `None`, a fresh `NET USE`
+              snapshot is taken.
+
+    Connections in `desired` that share a disk drive with a different UNC directory cause a
+    `ValueError`.
+    """
+    desired = [_get_connection(item) for item in desired]
+    net_use = get_current_net_use_table(fresh=True) if net_use is None else net_use
+    rows = net_use.get_rows_by_connection()
+
+    plan, wanted, remapped = [], set(), set()
+    for conn in desired:
+        key = (get_local_key(conn.disk_drive), get_remote_key(conn.unc))
+        if key in wanted:
+            continue
+        elif conn.disk_drive and any(other[0] == key[0] for other in wanted):
+            raise ValueError('More than one UNC directory is desired on {drive}.'.format(
+                drive=conn.disk_drive))
+        wanted.add(key)
+
+        row = rows.get(key)
+        if row is not None and row.status != UNAVAILABLE:
+            plan.append(PlannedAction(KEEP, conn, None))
+        elif row is not None:
+            # A previous attempt to connect failed, so the connection is made again.
+            remapped.add(key)
+            plan.append(PlannedAction(REMAP, conn, _get_connection((row.remote, row.local))))
+        elif conn.disk_drive and net_use.get_matching_rows(local=conn.disk_drive):
+            row = net_use.get_matching_rows(local=conn.disk_drive)[0]
+            remapped.add(get_connection_key(row))
+            plan.append(PlannedAction(REMAP, conn, UncDirectoryMount(row.remote, row.local)))
+        else:
+            plan.append(PlannedAction(CONNECT, conn, None))
+
+    if prune:
+        plan += [PlannedAction(DISCONNECT, _get_connection((row.remote, row.local)), None)
+                 for key, row in rows.items() if key not in wanted and key not in remapped]
+    return plan
+
+
+def apply_plan(plan, max_workers=DEFAULT_MAX_WORKERS, dry_run=False):
+    """
+    Carries out a plan from `plan_reconciliation` and returns a list of `ActionResult`s in the
+    same order. Errors are returned, not raised.
+    Disconnections are run first so that their disk drives are free, then connections and
+    remappings. Each phase runs up to `max_workers` shell commands at the same time.
+    `dry_run` must be `True` to return the results without running any commands.
+    """
+    results = [ActionResult(planned, False, None) for planned in plan]
+    if dry_run:
+        return results
+
+    phases = [[index for index, planned in enumerate(plan) if planned.action == DISCONNECT],
+              [index for index, planned in enumerate(plan) if planned.action in (CONNECT, REMAP)]]
+    for phase in phases:
+        if not phase:
+            continue
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(phase)))) as executor:
+            futures = dict((index, executor.submit(_carry_out, plan[index])) for index in phase)
+        for index, future in futures.items():
+            error = future.exception()
+            results[index] = ActionResult(plan[index], error is None, error)
+    return results
+
+
+def reconcile(desired, prune=False, max_workers=DEFAULT_MAX_WORKERS, dry_run=False):
+    """
+    Plans and applies a reconciliation from one `NET USE` snapshot. See `plan_reconciliation` and
+    `apply_plan` for the meaning of the arguments.
+    """
+    return apply_plan(plan_reconciliation(desired, prune), max_workers, dry_run)
+
+
+def read_manifest(file):
+    """
+    Returns a list of `UncDirectoryConnection` objects read from the JSON file object `file`. The
+    file must contain an object like this, where every field but "path" is optional:
+
+        {"mounts": [{"path": "\\\\\\\\server\\\\share", "drive": "Z:",
+                     "username": "user", "password": "pass", "persistent": false}]}
+
+    Entries without a "drive" are connected without a local mount point.
+    """
+    connections = []
+    for entry in json.load(file).get('mounts', []):
+        creds = UncCredentials(entry.get('username'), entry.get('password'))
+        unc = UncDirectory(entry['path'], creds)
+        drive = DiskDrive(entry['drive']) if entry.get('drive') else None
+        connections.append(_get_connection((unc, drive), entry.get('persistent', False)))
+    return connections
+
+
+def _carry_out(planned):
+    if planned.action == DISCONNECT:
+        planned.connection.disconnect()
+    else:
+        if planned.action == REMAP:
+            planned.previous.disconnect()
+        planned.connection.connect()
+
+
+def _get_connection(item, persistent=False):
+    if isinstance(item, UncDirectoryConnection):
+        return item
+    unc, disk_drive = item
+    if disk_drive:
+        return UncDirectoryMount(unc, disk_drive, persistent)
+    else:
+        return UncDirectoryConnection(unc, persistent=persistent)
@@ -1,3 +1,12 @@
+_CONTROL_CHARACTERS = ''.join(map(chr, range(0, 31)))
+
+# Translation tables are built once since building them is much slower than using them.
+_USERNAME_TABLE = str.maketrans('', '', r'"/[]:;|=,+*?<>' + '\0')
+_PATH_TABLE = str.maketrans('', '', r'<>"/|?*' + _CONTROL_CHARACTERS)
+_UNC_PATH_TABLE = str.maketrans('', '', r'<>"/|?*:' + _CONTROL_CHARACTERS)
+_FILE_NAME_TABLE = str.maketrans('', '', r'<>"/|?*:' + '\\' + _CONTROL_CHARACTERS)
+
+
 def sanitize_for_shell(string):
     """
     Return `string` with double quotes escaped for use in a Windows shell command.
@@ -9,22 +18,22 @@ def sanitize_username(name):
     """
     This applies only to Windows usernames (logons).
     """
-    return name.translate(str.maketrans('', '', r'"/[]:;|=,+*?<>' + '\0'))
+    return name.translate(_USERNAME_TABLE)
 
 
 def sanitize_path(path):
     """
     This applies only to Windows paths.
     """
-    return path.translate(str.maketrans('', '', r'<>"/|?*' + ''.join(map(chr, range(0, 31)))))
+    return path.translate(_PATH_TABLE)
 
 
 def sanitize_unc_path(path):
-    return sanitize_path(path).translate(str.maketrans('', '', ':'))
+    return path.translate(_UNC_PATH_TABLE)
 
 
 def sanitize_file_name(file_name):
     """
     This applies only to Windows file names.
     """
-    return sanitize_path(file_name).translate(str.maketrans('', '', ':\\'))
+    return file_name.translate(_FILE_NAME_TABLE)
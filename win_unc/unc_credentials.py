@@ -13,6 +13,8 @@ class UncCredentials(object):
     username and a password.
     """
 
+    __slots__ = ('_username', '_password')
+
     def __init__(self, username=None, password=None):
         b"""
         Returns a new `UncCredentials` object. Both `username` and `password` are optional.
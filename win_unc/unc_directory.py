@@ -10,6 +10,8 @@ class UncDirectory(object):
     credentials that are required to connect to the UNC path.
     """
 
+    __slots__ = ('_path', '_creds')
+
     def __init__(self, path, creds=None):
         """
         Returns a new `UncDirectory` class.
@@ -45,8 +47,7 @@ class UncDirectory(object):
         Returns the normalized path for this `UncDirectory`. Differing UNC paths that all point to
         the same network location will have the same normalized path.
         """
-        path = self._path.lower()
-        return path[:-5] if path.endswith(r'\ipc$') else path.rstrip('\\')
+        return normalize_unc_path(self._path)
 
     def get_path(self):
         """
@@ -54,6 +55,13 @@ class UncDirectory(object):
         """
         return self._path
 
+    def get_host(self):
+        """
+        Returns the lowercase host name of the server of this `UncDirectory` (e.g. "server" for
+        "\\\\Server\\share").
+        """
+        return self.get_normalized_path().lstrip('\\').split('\\', 1)[0]
+
     def get_username(self):
         """
         Returns the username associated with the credentials of this `UncDirectory` or `None`
@@ -98,7 +106,7 @@ class UncDirectory(object):
         return not self.__eq__(other)
 
     def __hash__(self):
-        return hash(str(self))
+        return hash((self.get_normalized_path(), self._creds))
 
     def __str__(self):
         return self.get_auth_path()
@@ -107,6 +115,15 @@ class UncDirectory(object):
         return '<{cls}: "{str}">'.format(cls=self.__class__.__name__, str=self.get_auth_path())
 
 
+def normalize_unc_path(path):
+    """
+    Returns the normalized form of the UNC path `path` as defined by `UncDirectory`'s
+    `get_normalized_path` method. `path` is not validated.
+    """
+    path = clean_unc_path(path).lower()
+    return path[:-5] if path.endswith(r'\ipc$') else path
+
+
 def is_unc_directory_string(string):
     """
     Returns `True` when `string` represents a `UncDirectory` as defined by `UncDirectory`'s
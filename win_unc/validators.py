@@ -1,4 +1,3 @@
-from win_unc.internal.utils import take_while
 from win_unc.sanitizors import sanitize_username, sanitize_unc_path
 
 
@@ -17,7 +16,8 @@ def is_valid_unc_path(string):
     (see `sanitize_unc_path`).
     """
     return (len(string) > 2
-            and len(take_while(lambda c: c == '\\', string)) == 2
+            and string.startswith('\\\\')
+            and not string.startswith('\\\\\\')
             and string == string.strip()
             and string == sanitize_unc_path(string))
 
@@ -0,0 +1,151 @@
+"""
+Contains classes for watching the system's UNC connections for changes.
+"""
+
+import asyncio
+from collections import namedtuple
+from threading import Event, Lock, Thread
+
+from win_unc.internal.connection_rows import get_connection_for_row
+from win_unc.internal.current_state import (
+    get_current_net_use_table, get_current_net_use_table_async)
+from win_unc.internal.loggers import no_logging
+
+
+DEFAULT_INTERVAL = 5
+
+# A connection that was not in the previous snapshot.
+# `connection` is a `UncDirectoryConnection` or `UncDirectoryMount`.
+# `status` is the connection's status (see `UncDirectoryConnection.get_connection_status`).
+ConnectionAdded = namedtuple('ConnectionAdded', ['connection', 'status'])
+
+# A connection from the previous snapshot that is gone. `status` is its last known status.
+ConnectionRemoved = namedtuple('ConnectionRemoved', ['connection', 'status'])
+
+# A connection whose status changed between snapshots (e.g. from `'ok'` to `'disconnected'`).
+ConnectionStatusChanged = namedtuple('ConnectionStatusChanged',
+                                     ['connection', 'old_status', 'new_status'])
+
+
+class ConnectionWatcher(object):
+    """
+    Compares consecutive `NET USE` snapshots and reports the connections that were added, removed
+    or changed status. Connections are identified by their local drive and normalized UNC path.
+
+    Snapshots can be taken on demand with `poll`, on a background thread with `start`, or from
+    `asyncio` code by iterating over the watcher with `async for`.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_age=None, logger=no_logging):
+        """
+        `interval` is the number of seconds between snapshots taken by `start` or `async for`.
+        `max_age` controls the reuse of cached `NET USE` snapshots (see
+                  `get_current_net_use_table`).
+        `logger` is a function that takes exactly one string parameter. It is called with errors
+                 raised while polling on the background thread.
+        """
+        self.interval = interval
+        self.max_age = max_age
+        self.logger = logger
+        self._callbacks = []
+        self._table = None
+        self._lock = Lock()
+        self._stopping = Event()
+        self._thread = None
+
+    def add_callback(self, callback):
+        """
+        Makes `callback` get called with each event found by every future poll.
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def poll(self):
+        """
+        Takes a `NET USE` snapshot, calls the callbacks with each change since the previous
+        snapshot and returns a list of those changes. The first poll only records a snapshot and
+        returns an empty list.
+        """
+        return self._update(get_current_net_use_table(self.max_age))
+
+    async def poll_async(self):
+        """
+        The same as `poll`, except that the event loop is not blocked while `NET USE` runs.
+        """
+        return self._update(await get_current_net_use_table_async(self.max_age))
+
+    def start(self):
+        """
+        Starts polling every `interval` seconds on a background thread.
+        """
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = Thread(target=self._poll_until_stopped)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops polling on the background thread and waits for it to finish.
+        """
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def _poll_until_stopped(self):
+        while not self._stopping.is_set():
+            try:
+                self.poll()
+            except Exception as error:
+                self.logger('Failed to poll the network connections: {0}'.format(error))
+            self._stopping.wait(self.interval)
+
+    def _update(self, table):
+        with self._lock:
+            previous, self._table = self._table, table
+        events = get_table_changes(previous, table) if previous is not None else []
+        for event in events:
+            for callback in list(self._callbacks):
+                callback(event)
+        return events
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    async def __aiter__(self):
+        """
+        Polls every `interval` seconds and yields each change.
+        """
+        while True:
+            for event in await self.poll_async():
+                yield event
+            await asyncio.sleep(self.interval)
+
+
+def get_table_changes(old, new):
+    """
+    Returns a list of events describing how the `NetUseTable` `new` differs from `old`. Removed
+    connections come first, then added ones, then status changes.
+    """
+    if old is new:
+        return []
+
+    old_rows = old.get_rows_by_connection()
+    new_rows = new.get_rows_by_connection()
+
+    events = [ConnectionRemoved(get_connection_for_row(row), row.status)
+              for key, row in old_rows.items() if key not in new_rows]
+    events += [ConnectionAdded(get_connection_for_row(row), row.status)
+               for key, row in new_rows.items() if key not in old_rows]
+    events += [ConnectionStatusChanged(get_connection_for_row(row), old_rows[key].status,
+                                       row.status)
+               for key, row in new_rows.items()
+               if key in old_rows and old_rows[key].status != row.status]
+    return events